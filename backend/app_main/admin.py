@@ -1,10 +1,16 @@
 from django.contrib import admin
 
 from .models import (
+    BulkExportJob,
+    DatasetGeneration,
     DocumentCalculation,
     DocumentCalculationCategory,
     NormativeCoefficient,
+    SheetSyncJob,
+    SheetSyncSnapshot,
+    XlsxImportJob,
 )
+from .sheets_sync import activate_generation
 
 
 @admin.register(NormativeCoefficient)
@@ -58,3 +64,133 @@ class DocumentCalculationAdmin(admin.ModelAdmin):
 class DocumentCalculationCategoryAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "created_at", "updated_at")
     search_fields = ("name",)
+
+
+@admin.register(BulkExportJob)
+class BulkExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "document_type",
+        "status",
+        "done",
+        "total",
+        "created_at",
+        "finished_at",
+        "expires_at",
+    )
+    list_filter = ("document_type", "status")
+    readonly_fields = (
+        "slot",
+        "total",
+        "done",
+        "archive",
+        "failed_documents",
+        "error",
+        "started_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+
+
+@admin.register(XlsxImportJob)
+class XlsxImportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "original_name",
+        "dry_run",
+        "mode",
+        "status",
+        "phase",
+        "processed_rows",
+        "total_rows",
+        "created_count",
+        "updated_count",
+        "error_count",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "phase", "mode", "dry_run")
+    readonly_fields = (
+        "phase",
+        "total_rows",
+        "processed_rows",
+        "checkpoint_row",
+        "valid_count",
+        "created_count",
+        "updated_count",
+        "unchanged_count",
+        "error_count",
+        "errors",
+        "error",
+        "started_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+    actions = ["resume_jobs"]
+
+    @admin.action(description="Yozish bosqichida to'xtagan importlarni checkpoint'dan davom ettirish")
+    def resume_jobs(self, request, queryset):
+        resumed = (
+            queryset.filter(status=XlsxImportJob.Status.FAILED, phase=XlsxImportJob.Phase.WRITE)
+            .exclude(file="")
+            .update(status=XlsxImportJob.Status.QUEUED, error="", finished_at=None)
+        )
+        self.message_user(request, f"Qayta navbatga qo'yildi: {resumed} ta")
+
+
+@admin.register(SheetSyncSnapshot)
+class SheetSyncSnapshotAdmin(admin.ModelAdmin):
+    """Yozuvni o'chirish keyingi sinxronizatsiyani to'liq bajartiradi (--force kabi)."""
+
+    list_display = ("source", "record_count", "revision", "synced_at", "checked_at")
+    readonly_fields = ("source", "revision", "content_hash", "database_state", "record_count", "synced_at", "checked_at")
+
+
+@admin.register(SheetSyncJob)
+class SheetSyncJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "status",
+        "phase",
+        "skipped",
+        "created_count",
+        "updated_count",
+        "deleted_count",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "skipped")
+    readonly_fields = (
+        "source",
+        "phase",
+        "skipped",
+        "fetched_rows",
+        "record_count",
+        "created_count",
+        "updated_count",
+        "unchanged_count",
+        "deleted_count",
+        "timings",
+        "log",
+        "error",
+        "started_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+
+
+@admin.register(DatasetGeneration)
+class DatasetGenerationAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "source", "record_count", "created_at", "activated_at", "retired_at")
+    list_filter = ("status",)
+    readonly_fields = ("status", "source", "record_count", "activated_at", "retired_at")
+    actions = ["activate_generations"]
+
+    @admin.action(description="Tanlangan oldingi avlodni qayta faollashtirish (rollback)")
+    def activate_generations(self, request, queryset):
+        generations = list(queryset.filter(status=DatasetGeneration.Status.PREVIOUS)[:2])
+        if len(generations) != 1:
+            self.message_user(request, "Bitta oldingi (previous) avlodni tanlang.", level="error")
+            return
+        activate_generation(generations[0])
+        self.message_user(request, f"Avlod #{generations[0].id} faollashtirildi")
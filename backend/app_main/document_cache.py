@@ -0,0 +1,61 @@
+"""Tayyor (render qilingan) .docx hujjatlari keshi.
+
+Kalit — render natijasiga ta'sir qiluvchi barcha kirishlarning xeshi: render
+engine (DOCUMENT_RENDER_ENGINE), hujjat yozuvi maydonlari, OrganizationSettings,
+faol NormativeCoefficient qatori va shablon faylining xeshi. Render deterministik bo'lgani uchun bir xil kalit —
+bayt-bayt bir xil fayl; shu kalitdan kuchli ETag ham olinadi.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Render kodi o'zgarganda eski kesh yozuvlarini bekor qilish uchun oshiriladi
+RENDER_VERSION = 2
+
+CACHE_ALIAS = "documents"
+
+# Natijaga ta'sir qilmaydigan maydonlar
+_IGNORED_FIELDS = {"updated_at"}
+
+
+def _model_state(obj) -> list | None:
+    if obj is None:
+        return None
+    return [
+        (field.attname, str(field.value_from_object(obj)))
+        for field in obj._meta.concrete_fields
+        if field.attname not in _IGNORED_FIELDS
+    ]
+
+
+def document_cache_key(template_name: str, template_sha256: str, doc, org, matrix) -> str:
+    """Render kirishlarining sha256 xeshi (hex)."""
+    payload = json.dumps(
+        [
+            RENDER_VERSION,
+            # "docx" va "xml" engine'lari bir xil matnli, lekin bayt jihatdan farqli fayl beradi
+            settings.DOCUMENT_RENDER_ENGINE,
+            template_name,
+            template_sha256,
+            _model_state(doc),
+            _model_state(org),
+            _model_state(matrix),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_document(key: str) -> bytes | None:
+    return caches[CACHE_ALIAS].get(key)
+
+
+def has_cached_document(key: str) -> bool:
+    return caches[CACHE_ALIAS].has_key(key)
+
+
+def set_cached_document(key: str, data: bytes) -> None:
+    caches[CACHE_ALIAS].set(key, data)
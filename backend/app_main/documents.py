@@ -0,0 +1,979 @@
+"""Hujjatlarni (.docx) render qilish: shartnoma, kalendar reja, TZ, bayonnoma, kalkulatsiya.
+
+HTTP view'larga bog'liq emas. Render uchun kerakli umumiy ma'lumotlar
+(tashkilot sozlamalari, faol koeffitsientlar) RenderContext'da bir marta
+yuklanadi — bitta hujjat ham, yuzlab hujjatli bulk eksport ham o'zgarmas
+miqdordagi so'rovlar bilan render qilinadi.
+"""
+
+import copy
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.conf import settings
+from django.utils import timezone
+from docx.table import _Row as _TableRow
+
+from .document_cache import (
+    document_cache_key,
+    get_cached_document,
+    has_cached_document,
+    set_cached_document,
+)
+from .docx_templates import TEMPLATES_DIR, fill_paragraph, get_template, save_document
+from .models import DocumentCalculation, NormativeCoefficient, OrganizationSettings
+
+logger = logging.getLogger(__name__)
+
+# Bulk ZIP ichida render bo'lmagan hujjatlar ro'yxati yoziladigan fayl
+FAILED_LIST_NAME = "XATOLAR.txt"
+
+BOLD_PLACEHOLDERS = frozenset({
+    "shnq_name",
+    "shartnoma_number",
+    "institute_director",
+    "deputy_minister",
+    "economics_head",
+    "total_pages",
+    "final_total_amount",
+    "final_total_amount_words",
+    "amount_2026",
+    "amount_2027",
+    "mhb_amount",
+    "mhi_amount",
+    "executor_organization",
+    "development_deadline",
+    "created_at",
+    "notes",
+    "normative_type",
+})
+
+# ---------------------------------------------------------------------------
+# Raqamni o'zbek tilida so'zga o'girish (lotin)
+# ---------------------------------------------------------------------------
+_ONES = [
+    "", "bir", "ikki", "uch", "to'rt", "besh",
+    "olti", "yetti", "sakkiz", "to'qqiz",
+]
+_TENS = [
+    "", "o'n", "yigirma", "o'ttiz", "qirq", "ellik",
+    "oltmish", "yetmish", "sakson", "to'qson",
+]
+
+
+def _three_digits_to_words(n: int) -> str:
+    """0–999 oralig'idagi sonni so'zga o'giradi."""
+    if n == 0:
+        return ""
+    parts = []
+    if n >= 100:
+        h = n // 100
+        parts.append(_ONES[h] + " yuz")  # 100 → "bir yuz" (nafaqat "yuz")
+        n %= 100
+    if n >= 10:
+        parts.append(_TENS[n // 10])
+        n %= 10
+    if n:
+        parts.append(_ONES[n])
+    return " ".join(parts)
+
+
+def _fmt_money(value) -> str:
+    """Summani mingliklar probel bilan ajratib, 2 xona kasr bilan formatlaydi.
+
+    Misol: 511644672.00 → "511 644 672.00",  2369128.5 → "2 369 128.50"
+    """
+    try:
+        q = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError, ValueError):
+        return str(value)
+    return f"{q:,.2f}".replace(",", " ")  # '511 644 672.00'
+
+
+def number_to_uz_words(amount) -> str:
+    """
+    Decimal/float/int sonni o'zbek tilida so'zga o'giradi.
+    Misol: 276578765.50 → "Ikki yuz yetmish olti million besh yuz yetmish sakkiz ming
+                           yetti yuz oltmish besh so'm ellik tiyin"
+    """
+    from decimal import Decimal as D
+    amount = D(str(amount)).quantize(D("0.01"))
+    integer_part = int(amount)
+    tiyin_part = int(round((amount - integer_part) * 100))
+
+    if integer_part == 0 and tiyin_part == 0:
+        return "nol so'm"
+
+    chunks = [
+        (1_000_000_000_000, "trillion"),
+        (1_000_000_000, "milliard"),
+        (1_000_000, "million"),
+        (1_000, "ming"),
+    ]
+
+    parts = []
+    remaining = integer_part
+    for divisor, name in chunks:
+        if remaining >= divisor:
+            q = remaining // divisor
+            remaining %= divisor
+            # "bir ming" emas, faqat "ming"
+            if q == 1 and name == "ming":
+                parts.append("ming")
+            else:
+                parts.append(_three_digits_to_words(q) + " " + name)
+
+    if remaining:
+        parts.append(_three_digits_to_words(remaining))
+
+    result = " ".join(p.strip() for p in parts if p.strip())
+    # Birinchi harfni katta qilamiz
+    result = result[0].upper() + result[1:] if result else "Nol"
+    result += " so'm"
+
+    if tiyin_part:
+        result += " " + _three_digits_to_words(tiyin_part) + " tiyin"
+
+    return result
+
+
+def _fill_docx(template_path: str, placeholders: dict, post_process=None, engine=None) -> bytes:
+    """Shablon Word faylni to'ldiradi va deterministik .docx baytlarini qaytaradi.
+
+    post_process(docx_doc) — saqlashdan oldin hujjatga qo'shimcha o'zgartirish
+    (masalan Kalkulatsiya uchun 1-ilova jadvalini qo'shish) kiritish uchun.
+    engine — "xml" yoki "docx" (berilmasa settings.DOCUMENT_RENDER_ENGINE).
+    """
+    # Shablon worker'da bir marta o'qiladi; bu yerda faqat uning nusxasi olinadi
+    compiled = get_template(template_path)
+    if (engine or settings.DOCUMENT_RENDER_ENGINE) == "xml":
+        doc = compiled.new_xml_document()
+        compiled.fill(doc.element, placeholders, BOLD_PLACEHOLDERS)
+        if post_process is not None:
+            post_process(doc)
+        return compiled.save_xml_document(doc)
+
+    doc, paragraphs = compiled.new_document()
+    if compiled.placeholder_runs is not None:
+        # Normallashtirilgan shablon: faqat {{kalit}} run'lari almashtiriladi
+        compiled.fill(doc.element, placeholders, BOLD_PLACEHOLDERS)
+    else:
+        for para, parts in paragraphs:
+            fill_paragraph(para, placeholders, BOLD_PLACEHOLDERS, parts)
+    if post_process is not None:
+        post_process(doc)
+    return save_document(doc)
+
+
+# ---------------------------------------------------------------------------
+# Kalendar reja — bosqich choraklari (boshlanishi/tugashi) va yillik JAMI qatorlari
+# ---------------------------------------------------------------------------
+
+_QUARTER_ROMAN = {1: "I", 2: "II", 3: "III", 4: "IV"}
+
+# development_deadline'dan olingan (yil, chorak) → 4 bosqichning
+# ((boshlanish_yil, boshlanish_chorak), (tugash_yil, tugash_chorak)) qiymatlari.
+# Sheets'da faqat quyidagi 5 ta qiymat uchraydi (foydalanuvchi tasdiqlagan).
+_KALENDAR_STAGE_MAP = {
+    (2026, 3): [((2026, 3), (2026, 3)), ((2026, 3), (2026, 3)),
+                ((2026, 3), (2026, 3)), ((2026, 3), (2026, 3))],
+    (2026, 4): [((2026, 3), (2026, 3)), ((2026, 3), (2026, 3)),
+                ((2026, 3), (2026, 4)), ((2026, 4), (2026, 4))],
+    (2027, 2): [((2026, 3), (2026, 4)), ((2027, 1), (2027, 1)),
+                ((2027, 1), (2027, 2)), ((2027, 2), (2027, 2))],
+    (2027, 3): [((2026, 3), (2026, 4)), ((2027, 1), (2027, 2)),
+                ((2027, 2), (2027, 3)), ((2027, 3), (2027, 3))],
+    (2027, 4): [((2026, 3), (2026, 4)), ((2027, 1), (2027, 2)),
+                ((2027, 2), (2027, 3)), ((2027, 3), (2027, 4))],
+}
+
+
+def _parse_deadline_quarter(text):
+    """'2026-yil IV-chorak' → (2026, 4). Aniqlanmasa None."""
+    if not text:
+        return None
+    m_year = re.search(r"(20\d{2})", text)
+    if not m_year:
+        return None
+    year = int(m_year.group(1))
+    up = text.upper()
+    for roman, val in (("IV", 4), ("III", 3), ("II", 2), ("I", 1)):
+        if re.search(r"(?<![A-Z])" + roman + r"(?![A-Z])", up):
+            return (year, val)
+    return None
+
+
+def _fmt_quarter(yq):
+    """(2026, 4) → '2026-yil IV-chorak'."""
+    year, q = yq
+    return f"{year}-yil {_QUARTER_ROMAN[q]}-chorak"
+
+
+def _compute_kalendar_stages(doc, stage_amounts):
+    """development_deadline'dan bosqich choraklari + yillik JAMI guruhlarini hisoblaydi.
+
+    stage_amounts: [I, II, III, IV] bosqich summalari (Decimal).
+    Qaytaradi dict yoki None (deadline nomalum bo'lsa):
+        {
+          "labels": [(start_str, end_str), ...4 ta],
+          "stage_years": [yil, ...4 ta],          # har bosqichning boshlanish yili
+          "year_totals": [(yil, summa), ...],      # ko'rinish tartibida
+          "multi_year": bool,
+        }
+    """
+    parsed = _parse_deadline_quarter(doc.development_deadline)
+    if parsed is None or parsed not in _KALENDAR_STAGE_MAP:
+        return None
+    stages = _KALENDAR_STAGE_MAP[parsed]
+    labels = [(_fmt_quarter(s), _fmt_quarter(e)) for (s, e) in stages]
+    stage_years = [s[0] for (s, _e) in stages]
+
+    year_totals = {}
+    order = []
+    for i, year in enumerate(stage_years):
+        if year not in year_totals:
+            year_totals[year] = Decimal("0.00")
+            order.append(year)
+        year_totals[year] += stage_amounts[i]
+
+    return {
+        "labels": labels,
+        "stage_years": stage_years,
+        "year_totals": [(y, year_totals[y]) for y in order],
+        "multi_year": len(order) > 1,
+    }
+
+
+def _set_cell_text(cell, text):
+    """Katak matnini birinchi run formatlashini saqlagan holda almashtiradi."""
+    para = cell.paragraphs[0]
+    if para.runs:
+        para.runs[0].text = text
+        for r in para.runs[1:]:
+            r.text = ""
+    else:
+        para.add_run(text)
+    for p in cell.paragraphs[1:]:
+        for r in p.runs:
+            r.text = ""
+
+
+def _set_jami_row(row, label, amount):
+    """JAMI qatorini to'ldiradi: [label, '', '', summa]."""
+    cells = row.cells
+    _set_cell_text(cells[0], label)
+    _set_cell_text(cells[1], "")
+    _set_cell_text(cells[2], "")
+    _set_cell_text(cells[3], _fmt_money(amount))
+
+
+# 12-jadval (VHM/sahifa koeffitsienti) — Kalkulatsiya 1-ilovasi uchun.
+# Har bir tuple: (Yangi, Qayta, O'zgartirish)  [I/II/III toifa]
+_TABLE_12 = {
+    "technical_regulation": {"1": (15, 8, 3), "2": (28, 14, 5), "3": (43, 22, 7)},
+    "shnq": {"1": (14, 7, 2), "2": (26, 13, 4), "3": (40, 20, 7)},
+    "eurocode": {"1": (13, 7, 2), "2": (24, 12, 4), "3": (37, 19, 6)},
+    "nizom": {"1": (12, 6, 2), "2": (23, 12, 4), "3": (34, 17, 6)},
+    "standard": {"1": (11, 6, 2), "2": (21, 11, 4), "3": (32, 16, 5)},
+    "methodical_guide": {"1": (10, 5, 2), "2": (19, 10, 3), "3": (29, 15, 5)},
+}
+
+# (label, mos_normativ_turlar, TABLE_12_kaliti)
+_JADVAL_12_GROUPS = [
+    ("Texnik reglament", ["technical_regulation"], "technical_regulation"),
+    ("Shaharsozlik normalari va qoidalari, Milliy qurilish normalari", ["shnq", "mqn"], "shnq"),
+    ("Xalqaro yoki xorijiy normalar", ["eurocode"], "eurocode"),
+    ("Qurilishda qo'llaniladigan nizom, qoida, yo'riqnoma, tartib va sh.k.", ["nizom"], "nizom"),
+    ("Standartlar, Idoraviy qurilish normalari, smeta-resurs normalari", ["standard", "srn", "qr"], "standard"),
+    ("Qo'llanma, ma'lumotnoma, boshqa majburiy bo'lmagan hujjatlar", ["methodical_guide"], "methodical_guide"),
+]
+
+_LEVEL_ROMAN = {"1": "I", "2": "II", "3": "III"}
+
+
+def _category_column_index(document_category: str):
+    """Hujjat toifasi → jadval ustuni (0=Yangi, 1=Qayta, 2=O'zgartirish)."""
+    if document_category == "new":
+        return 0
+    if document_category in ("rework_harmonization", "rework_modification"):
+        return 1
+    if document_category == "additional_change":
+        return 2
+    return None
+
+
+def _selected_vhm(doc):
+    """Hujjat uchun tanlangan VHM/sahifa koeffitsienti (12-jadvaldan) — masalan 14."""
+    group = next((g for g in _JADVAL_12_GROUPS if doc.normative_type in g[1]), None)
+    col = _category_column_index(doc.document_category)
+    level = str(doc.complexity_level)
+    if group is None or col is None or level not in _TABLE_12.get(group[2], {}):
+        return None
+    return _TABLE_12[group[2]][level][col]
+
+
+# Normativ tur → to'liq nom (Kalkulatsiya sarlavhasi uchun — gap o'rtasida, kichik harf bilan)
+NORMATIVE_TYPE_FULL = {
+    "shnq": "shaharsozlik normalari va qoidalari",
+    "mqn": "milliy qurilish normalari",
+    "standard": "milliy standart",
+    "srn": "smeta-resurs normalari",
+    "qr": "idoraviy qurilish normalari",
+    "technical_regulation": "texnik reglament",
+    "eurocode": "xalqaro yoki xorijiy normalar",
+    "nizom": "nizom, qoida, yo'riqnoma",
+    "methodical_guide": "qo'llanma, ma'lumotnoma",
+}
+
+
+# (blok kengligi, guruh, daraja, ustun) → tayyor 12-jadval ilovasi elementlari (namuna).
+# Ilova faqat shu tanlovga bog'liq — bir necha o'nta kombinatsiya; har bir render
+# python-docx orqali ~60 ta katakni qayta qurish o'rniga namunaning nusxasini oladi.
+# View'lar thread'larda render qiladi — lug'atga faqat qulf ostida murojaat qilinadi;
+# _APPENDIX_FRAGMENTS_MAX'dan ortiq tanlov keshlanmaydi (har safar quriladi).
+_APPENDIX_FRAGMENTS: dict[tuple, list] = {}
+_APPENDIX_FRAGMENTS_MAX = 128
+_appendix_lock = threading.Lock()
+
+
+def _build_koeffitsient_appendix(docx_doc, sel_group, sel_level, sel_col) -> list:
+    """12-jadvalni (va tanlov izohini) hujjat oxiriga quradi; qo'shilgan elementlarni qaytaradi."""
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.shared import Pt, RGBColor
+
+    FONT = "Times New Roman"
+    LIGHT = "EDEDF7"   # tanlangan guruh — ochiq lavanda
+    DARK = "1A227F"    # aynan tanlangan katak — to'q ko'k
+
+    def shade(cell, fill_hex):
+        tcPr = cell._tc.get_or_add_tcPr()
+        for existing in tcPr.findall(qn("w:shd")):  # eski shading'ni almashtiramiz
+            tcPr.remove(existing)
+        shd = OxmlElement("w:shd")
+        shd.set(qn("w:val"), "clear")
+        shd.set(qn("w:fill"), fill_hex)
+        tcPr.append(shd)
+
+    def set_borders(table):
+        # "Table Grid" uslubi shablonda bo'lmasligi mumkin — chegarani XML orqali qo'yamiz
+        tblPr = table._tbl.tblPr
+        borders = OxmlElement("w:tblBorders")
+        for edge in ("top", "left", "bottom", "right", "insideH", "insideV"):
+            el = OxmlElement(f"w:{edge}")
+            el.set(qn("w:val"), "single")
+            el.set(qn("w:sz"), "4")
+            el.set(qn("w:space"), "0")
+            el.set(qn("w:color"), "999999")
+            borders.append(el)
+        tblPr.append(borders)
+
+    def valign_center(cell):
+        tcPr = cell._tc.get_or_add_tcPr()
+        for existing in tcPr.findall(qn("w:vAlign")):
+            tcPr.remove(existing)
+        v = OxmlElement("w:vAlign")
+        v.set(qn("w:val"), "center")
+        tcPr.append(v)
+
+    def set_row_height(row, twips, rule="atLeast"):
+        trPr = row._tr.get_or_add_trPr()
+        h = OxmlElement("w:trHeight")
+        h.set(qn("w:val"), str(twips))
+        h.set(qn("w:hRule"), rule)
+        trPr.append(h)
+
+    def set_cell(cell, text, *, bold=False, color=None, align="left", size=8):
+        cell.text = ""
+        valign_center(cell)  # matn katakda vertikal markazda
+        p = cell.paragraphs[0]
+        p.alignment = WD_ALIGN_PARAGRAPH.CENTER if align == "center" else WD_ALIGN_PARAGRAPH.LEFT
+        run = p.add_run(text)
+        run.bold = bold
+        run.font.size = Pt(size)
+        run.font.name = FONT
+        if color:
+            run.font.color.rgb = RGBColor.from_string(color)
+
+    created = []  # yangi qo'shilgan elementlar (keyin Nb tagiga ko'chiramiz)
+
+    # --- Jadval ---
+    headers = ["Hujjat turi", "Murakkablik darajasi", "Yangi", "Qayta", "O'zgartirish"]
+    table = docx_doc.add_table(rows=1, cols=len(headers))
+    created.append(table._tbl)
+    set_borders(table)
+    for ci, htext in enumerate(headers):
+        set_cell(table.rows[0].cells[ci], htext, bold=True, align="center", size=9)
+        shade(table.rows[0].cells[ci], "D9D9E8")
+    set_row_height(table.rows[0], 340)
+
+    # Faqat ushbu hujjatga tegishli guruhni ko'rsatamiz (tur aniqlansa);
+    # aks holda barcha guruhlar (zaxira).
+    if sel_group is not None:
+        groups_to_show = [(sel_group, _JADVAL_12_GROUPS[sel_group])]
+    else:
+        groups_to_show = list(enumerate(_JADVAL_12_GROUPS))
+
+    for gi, (label, _types, tkey) in groups_to_show:
+        first_row_cells = None
+        group_rows = []
+        for level in ("1", "2", "3"):
+            row = table.add_row()
+            set_row_height(row, 340)  # barcha qatorlar teng va past balandlikda (~0.6 sm)
+            group_rows.append(row)
+            cells = row.cells
+            if first_row_cells is None:
+                first_row_cells = cells
+            values = _TABLE_12[tkey][level]  # (Yangi, Qayta, O'zgartirish)
+            # ustun 0 — nom (keyin vertikal birlashtiramiz)
+            set_cell(cells[0], label if level == "1" else "", size=8)
+            set_cell(cells[1], _LEVEL_ROMAN[level], align="center", size=8)
+            for k in range(3):
+                set_cell(cells[2 + k], str(values[k]), align="center", size=8)
+
+            is_sel_group = gi == sel_group
+            if is_sel_group:
+                for c in cells:
+                    shade(c, LIGHT)
+                # aynan tanlangan katak
+                if sel_col is not None and level == sel_level:
+                    target = cells[2 + sel_col]
+                    shade(target, DARK)
+                    set_cell(target, str(values[sel_col]), bold=True, color="FFFFFF", align="center", size=9)
+
+        # nom ustunini (0) 3 qatorga birlashtirish — matn katak markazida (vertikal + gorizontal)
+        merged = first_row_cells[0]
+        for r2 in group_rows[1:]:
+            merged = merged.merge(r2.cells[0])
+        merged.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        valign_center(merged)
+
+    # --- Tanlov izohi ---
+    if sel_group is not None and sel_col is not None:
+        cat_name = {0: "Yangi", 1: "Qayta", 2: "O'zgartirish"}[sel_col]
+        note = docx_doc.add_paragraph()
+        note.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        r = note.add_run(
+            f"Ushbu normativ hujjat uchun tanlangan: "
+            f"Murakkablik darajasi {_LEVEL_ROMAN[sel_level]}, {cat_name} - "
+            f"{_TABLE_12[_JADVAL_12_GROUPS[sel_group][2]][sel_level][sel_col]}"
+        )
+        r.italic = True
+        r.font.name = FONT
+        r.font.size = Pt(9)
+        created.append(note._p)
+
+    return created
+
+
+def _find_nb_anchor(body):
+    """"Nb – ... qiymat (N);" paragrafi (body'ning to'g'ridan-to'g'ri bolasi) yoki None."""
+    from docx.oxml.ns import qn
+
+    w_t, w_tab, w_br = qn("w:t"), qn("w:tab"), qn("w:br")
+    for p_elem in body.iterchildren(qn("w:p")):
+        # Paragraph.text bilan bir xil matn, lekin proksilarsiz (lxml darajasida)
+        text = "".join(
+            (el.text or "") if el.tag == w_t else "\t" if el.tag == w_tab else "\n"
+            for el in p_elem.iter(w_t, w_tab, w_br)
+        ).strip()
+        if text.startswith("Nb ") and ("qiymat" in text or "me'yorlariga" in text):
+            return p_elem
+    return None
+
+
+def _append_koeffitsient_appendix(docx_doc, doc):
+    """Kalkulatsiya hujjati oxiriga 12-jadvalni (1-ilova) qo'shadi.
+
+    Ushbu hujjat uchun tanlangan koeffitsient (turi × toifa × ish turi) ajratib ko'rsatiladi.
+    Jadval har bir tanlov uchun bir marta quriladi, keyin _APPENDIX_FRAGMENTS'dan nusxalanadi.
+    """
+    # Tanlangan pozitsiya
+    sel_group = next(
+        (i for i, (_, types, _) in enumerate(_JADVAL_12_GROUPS) if doc.normative_type in types),
+        None,
+    )
+    sel_level = str(doc.complexity_level)
+    sel_col = _category_column_index(doc.document_category)  # 0/1/2 yoki None
+
+    # Jadval "Nb – ... qiymat (N);" qatoridan keyin joylashadi (o'sha qiymat qayerdan
+    # kelganini ko'rsatuvchi javob). Ankor sifatida Nb paragrafini topamiz.
+    body = docx_doc.element.body
+    anchor = _find_nb_anchor(body)
+
+    key = (docx_doc._block_width, sel_group, sel_level, sel_col)
+    with _appendix_lock:
+        fragment = _APPENDIX_FRAGMENTS.get(key)
+        if fragment is not None:
+            created = [copy.deepcopy(el) for el in fragment]
+    if fragment is None:
+        created = _build_koeffitsient_appendix(docx_doc, sel_group, sel_level, sel_col)
+        with _appendix_lock:
+            if len(_APPENDIX_FRAGMENTS) < _APPENDIX_FRAGMENTS_MAX:
+                _APPENDIX_FRAGMENTS.setdefault(key, [copy.deepcopy(el) for el in created])
+    elif anchor is None:
+        # add_table/add_paragraph kabi — body oxiriga, sectPr'dan oldin
+        sect_pr = body.sectPr
+        for el in created:
+            if sect_pr is not None:
+                sect_pr.addprevious(el)
+            else:
+                body.append(el)
+
+    # --- Yangi qo'shilgan elementlarni Nb qatoridan keyinga ko'chiramiz ---
+    if anchor is not None:
+        ref = anchor
+        for el in created:
+            ref.addnext(el)  # lxml elementni ko'chiradi (nusxa emas)
+            ref = el
+
+# ---------------------------------------------------------------------------
+# Render konteksti va hujjat turlari
+# ---------------------------------------------------------------------------
+
+
+class RenderContext:
+    """Barcha hujjatlar uchun umumiy kirishlar: sozlamalar va faol koeffitsientlar.
+
+    load() — 2 ta so'rov; keyin istalgancha hujjat bazaga murojaatsiz render qilinadi.
+    Pickle qilinadi — process pool worker'lariga shu holida uzatiladi.
+    """
+
+    def __init__(self, org, matrices: dict):
+        self.org = org
+        self.matrices = matrices
+
+    @classmethod
+    def load(cls) -> "RenderContext":
+        org = OrganizationSettings.get_instance()
+        return cls(org, NormativeCoefficient.active_by_type())
+
+    def matrix_for(self, doc):
+        """Hujjat turi uchun faol NormativeCoefficient qatori (yo'q bo'lsa None)."""
+        return self.matrices.get(doc.normative_type)
+
+
+class DocumentType:
+    """Hujjat turi: shablon, fayl nomlari va saqlashdan oldingi qo'shimcha ishlov."""
+
+    def __init__(self, key, template_name, file_prefix, archive_name, post_process=None):
+        self.key = key
+        self.template_name = template_name
+        self.file_prefix = file_prefix
+        self.archive_name = archive_name
+        self.post_process = post_process
+
+    @property
+    def template_path(self) -> str:
+        return os.path.join(TEMPLATES_DIR, self.template_name)
+
+    def filename(self, doc) -> str:
+        return f"{self.file_prefix}_{doc.id}.docx"
+
+    def cache_key(self, doc, context) -> str:
+        """Render kirishlari xeshi — doc hali o'zgartirilmagan (bazadagi) holda olinadi."""
+        return self.cache_keys([doc], context)[0]
+
+    def cache_keys(self, docs, context) -> list[str]:
+        """Bir nechta hujjat uchun cache_key (shablon xeshi bir marta olinadi)."""
+        template_sha256 = get_template(self.template_path).sha256
+        return [
+            document_cache_key(self.template_name, template_sha256, doc, context.org, context.matrix_for(doc))
+            for doc in docs
+        ]
+
+
+def build_placeholders(doc, context) -> dict:
+    """Hujjat uchun barcha shablonlarda ishlatiladigan placeholder qiymatlari.
+
+    doc joyida yangilanadi: VHM va yakuniy summa formuladan qayta hisoblanadi
+    (post-process funksiyalari shu qiymatlardan foydalanadi).
+    """
+    org = context.org
+    # Formuladan to'g'ri yakuniy summani hisoblash (DB'dagi eski qiymat emas)
+    # apply_normative_coefficients() → NormativeCoefficient jadvalidan VHM oladi
+    # recalculate_final_total_amount() → VHM × pages × MROT × 2.1 × 1.12 [× 1.4]
+    doc.apply_normative_coefficients(context.matrices)
+    doc.recalculate_final_total_amount()
+    # doc.final_total_amount endi to'g'ri hisoblangan qiymat (DB'ga saqlanmaydi)
+
+    # 2.1-band uchun yillar bo'yicha taqsimot (Google Sheets'dan keladigan qiymatlar):
+    #   2026-yilga = planned_amount (2026-yilga rejalashtirilgan)
+    #   2027-yil uchun = umumiy - 2026 - 01.01.2026 holatiga bajarilgan (completed_amount)
+    # 01.01.2026 holatidagi summa 2025-yil uchun bajarilgan hisoblanadi.
+    # Sheets'da summalar ming so'mda saqlanadi — umumiy (formula) so'mda bo'lgani uchun ×1000.
+    SHEET_SCALE = Decimal("1000")
+    amount_2026 = (doc.planned_amount or Decimal("0.00")) * SHEET_SCALE
+    completed_2025 = (doc.completed_amount or Decimal("0.00")) * SHEET_SCALE
+    amount_2027 = doc.final_total_amount - amount_2026 - completed_2025
+    if amount_2027 < 0:
+        amount_2027 = Decimal("0.00")
+
+    # Kalkulatsiya uchun: MHb (bazaviy narx) va MHi (ilmiy-tadqiqot narxi)
+    #   final = base × 1.4 (agar tadqiqot bo'lsa) → base = final / 1.4, MHi = final - base
+    #   tadqiqot bo'lmasa → base = final, MHi = 0
+    research_factor = Decimal("1.4") if doc.is_research_required else Decimal("1")
+    mhb_amount = (doc.final_total_amount / research_factor).quantize(
+        Decimal("0.01"), rounding=ROUND_HALF_UP
+    )
+    mhi_amount = doc.final_total_amount - mhb_amount
+    if mhi_amount < 0:
+        mhi_amount = Decimal("0.00")
+
+    # Kalendar reja bosqich summalari: I=30%, II=30%, III=30%, IV=10% (oxirgisi qoldiq)
+    _kr_total = doc.final_total_amount
+    kr_stage1 = (_kr_total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    kr_stage2 = (_kr_total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    kr_stage3 = (_kr_total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    kr_stage4 = _kr_total - kr_stage1 - kr_stage2 - kr_stage3  # ~10%, yig'indi umumiyga teng
+
+    # Kalendar reja bosqich choraklari — development_deadline'dan avtomatik hisoblanadi
+    kr_info = _compute_kalendar_stages(
+        doc, [kr_stage1, kr_stage2, kr_stage3, kr_stage4]
+    )
+
+    placeholders = {
+        # Hujjat ma'lumotlari
+        "shnq_name": doc.name,
+        "doc_id": str(doc.id),
+        "normative_type": doc.normative_type,
+        "document_category": doc.document_category,
+        "total_pages": str(doc.total_pages),
+        "complexity_level": str(doc.complexity_level),
+        # TZ (Texnik topshiriq) uchun — o'qiladigan ko'rinishdagi qiymatlar
+        "complexity_label": doc.get_complexity_level_display(),
+        "complexity_roman": {"1": "I", "2": "II", "3": "III"}.get(str(doc.complexity_level), str(doc.complexity_level)),
+        "document_category_label": doc.get_document_category_display(),
+        "sources_count": str(doc.sources_count),
+        "research_status": "Ha" if doc.is_research_required else "Yo'q",
+        # Nb izohi uchun — 12-jadvaldan tanlangan VHM/sahifa koeffitsienti (masalan 14)
+        "vhm_value": str(_selected_vhm(doc) if _selected_vhm(doc) is not None else ""),
+        # Kalkulatsiya: normativ tur to'liq nomi + MHb/MHi summalari
+        "normative_type_full": NORMATIVE_TYPE_FULL.get(doc.normative_type, "normativ hujjat"),
+        "mhb_amount": _fmt_money(mhb_amount),
+        "mhi_amount": _fmt_money(mhi_amount),
+        "executor_organization": doc.executor_organization or "",
+        "development_deadline": doc.development_deadline or "",
+        "shartnoma_number": doc.contract_number or DocumentCalculation.default_contract_number(doc.id),
+        "current_year_percent": str(doc.current_year_percent),
+        "next_year_percent": str(max(Decimal("0"), Decimal("100") - doc.current_year_percent)),
+        "current_year_amount": _fmt_money(
+            doc.final_total_amount * doc.current_year_percent / Decimal("100")
+        ),
+        "next_year_amount": _fmt_money(
+            doc.final_total_amount * max(Decimal("0"), Decimal("100") - doc.current_year_percent) / Decimal("100")
+        ),
+        "notes": doc.notes or "",
+        "final_total_amount": _fmt_money(doc.final_total_amount),
+        "final_total_amount_words": f"({number_to_uz_words(doc.final_total_amount)})",
+        # 2.1-band: yillar bo'yicha taqsimot
+        "amount_2026": _fmt_money(amount_2026),
+        "amount_2027": _fmt_money(amount_2027),
+        "created_at": doc.created_at.strftime("%d.%m.%Y") if doc.created_at else "",
+        # Tashkilot sozlamalari
+        "institute_director": org.institute_director,
+        "deputy_minister": org.deputy_minister,
+        "economics_head": org.economics_head,
+        # Kalendar reja bosqichlari — summalar umumiy narxdan 30/30/30/10 taqsimlanadi
+        "I_start": doc.stage1_start,
+        "I_end": doc.stage1_end,
+        "I_summa": _fmt_money(kr_stage1),
+        "II_start": doc.stage2_start,
+        "II_end": doc.stage2_end,
+        "II_summa": _fmt_money(kr_stage2),
+        "III_start": doc.stage3_start,
+        "III_end": doc.stage3_end,
+        "III_summa": _fmt_money(kr_stage3),
+        "IV_start": doc.stage4_start,
+        "IV_end": doc.stage4_end,
+        "IV_summa": _fmt_money(kr_stage4),
+    }
+
+    # development_deadline aniqlansa — bosqich choraklarini hisoblangan qiymat bilan almashtiramiz
+    if kr_info is not None:
+        for key, (start, end) in zip(("I", "II", "III", "IV"), kr_info["labels"]):
+            placeholders[f"{key}_start"] = start
+            placeholders[f"{key}_end"] = end
+
+    return placeholders
+
+
+def _post_process_shartnoma(docx_doc, doc):
+    """Shartnoma: 2027 summasiga qarab "Shundan..." jumlasi va 1.3-band muddati."""
+    scale = Decimal("1000")
+    amount_2026 = (doc.planned_amount or Decimal("0")) * scale
+    completed_2025 = (doc.completed_amount or Decimal("0")) * scale
+    amount_2027 = doc.final_total_amount - amount_2026 - completed_2025
+
+    if amount_2027 <= 0:
+        # 2027 uchun summa yo'q → "Shundan 2026-yilga ..." jumlasini olib tashlaymiz
+        for p in docx_doc.paragraphs:
+            if p.text.strip().startswith("Shundan 2026-yilga"):
+                p._p.getparent().remove(p._p)
+                break
+    else:
+        # 2027 uchun summa bor → 1.3-band muddati 2026-yil → 2027-yil 31-dekabrgacha
+        for p in docx_doc.paragraphs:
+            if "31-dekabrgacha" not in p.text:
+                continue
+            runs = p.runs
+            anchor_i = next(
+                (i for i, r in enumerate(runs) if "-yil" in r.text and "dekabr" in r.text),
+                None,
+            )
+            if anchor_i and anchor_i > 0:
+                prev = runs[anchor_i - 1]
+                if prev.text.endswith("6"):  # yil oxirgi raqami: ...2026 → ...2027
+                    prev.text = prev.text[:-1] + "7"
+            break
+
+
+def _post_process_kalendar(docx_doc, doc):
+    """Kalendar reja jadvalidagi JAMI qatorini yillar bo'yicha joylashtiradi.
+
+    Bir yil (2026'da tugasa): mavjud JAMI qatori "JAMI: 2026-yil uchun".
+    Ikki yil (2027'ga o'tsa): I-bosqichdan keyin "JAMI: 2026-yil uchun",
+    oxirida "JAMI: 2027-yil uchun". Summalar bosqichlar yig'indisi.
+    """
+    total = doc.final_total_amount
+    s1 = (total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    s2 = (total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    s3 = (total * Decimal("0.30")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    s4 = total - s1 - s2 - s3
+    info = _compute_kalendar_stages(doc, [s1, s2, s3, s4])
+    if info is None:
+        return
+
+    # JAMI qatori bo'lgan jadvalni topamiz
+    table = None
+    jami_idx = None
+    for t in docx_doc.tables:
+        for ri, row in enumerate(t.rows):
+            if row.cells[0].text.strip().upper().startswith("JAMI"):
+                table, jami_idx = t, ri
+                break
+        if table is not None:
+            break
+    if table is None:
+        return
+
+    year_totals = info["year_totals"]
+    stage_years = info["stage_years"]
+
+    # Mavjud (oxirgi) JAMI qatori → oxirgi yil guruhi
+    last_year, last_amount = year_totals[-1]
+    _set_jami_row(table.rows[jami_idx], f"JAMI: {last_year}-yil uchun", last_amount)
+
+    if not info["multi_year"]:
+        return
+
+    # Bosqich qatorlari: jami_idx-4 .. jami_idx-1 (I, II, III, IV)
+    stage_row_trs = [table.rows[jami_idx - 4 + i]._tr for i in range(4)]
+    jami_tr = table.rows[jami_idx]._tr  # nusxa uchun namuna (formatlash saqlanadi)
+
+    # Oxirgidan tashqari har bir yil guruhi uchun: guruhning oxirgi bosqichidan
+    # keyin JAMI qatorini kiritamiz
+    for year, amount in year_totals[:-1]:
+        last_stage_i = max(i for i, y in enumerate(stage_years) if y == year)
+        new_tr = copy.deepcopy(jami_tr)
+        stage_row_trs[last_stage_i].addnext(new_tr)
+        new_row = _TableRow(new_tr, table)
+        _set_jami_row(new_row, f"JAMI: {year}-yil uchun", amount)
+
+
+DOCUMENT_TYPES = {
+    doc_type.key: doc_type
+    for doc_type in (
+        DocumentType("shartnoma", "shartnoma.docx", "shartnoma", "shartnomalar.zip", _post_process_shartnoma),
+        DocumentType(
+            "kalendar_reja", "kalendar_reja.docx", "kalendar_reja", "kalendar_rejalar.zip", _post_process_kalendar
+        ),
+        DocumentType("texnik_topshiriq", "TZ.docx", "TZ", "texnik_topshiriqlar.zip"),
+        DocumentType("bayonnoma", "bayonnoma.docx", "bayonnoma", "bayonnomalar.zip"),
+        # Kalkulatsiya oxiriga 12-jadval (1-ilova) tanlangan koeffitsient ajratilgan holda qo'shiladi
+        DocumentType(
+            "kalkulatsiya", "Kalkul.docx", "kalkulatsiya", "kalkulatsiyalar.zip", _append_koeffitsient_appendix
+        ),
+    )
+}
+
+
+def render_document(doc_type, doc, context, placeholders=None) -> bytes:
+    """Bitta hujjatni render qiladi va .docx baytlarini qaytaradi.
+
+    placeholders — build_placeholders() natijasi (bir hujjatdan bir nechta shablon
+    render qilinganda qayta hisoblamaslik uchun); berilmasa shu yerda hisoblanadi.
+    """
+    if placeholders is None:
+        placeholders = build_placeholders(doc, context)
+    post_process = doc_type.post_process
+    return _fill_docx(
+        doc_type.template_path,
+        placeholders,
+        post_process=(lambda docx_doc: post_process(docx_doc, doc)) if post_process else None,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Bulk eksport: parallel render va oqimli ZIP
+# ---------------------------------------------------------------------------
+
+
+def _render_bulk_document(task):
+    """Process pool ichida bitta hujjatni render qiladi (xato bo'lsa log va None).
+
+    Bazaga murojaat qilinmaydi — barcha kirishlar (hujjat va RenderContext)
+    ota jarayonda oldindan yuklanib, task ichida keladi. Xato bitta hujjat
+    tufayli butun arxivni to'xtatmaydi: iter_zip_entries uni XATOLAR.txt'ga yozadi.
+    """
+    type_key, doc, context = task
+    try:
+        return render_document(DOCUMENT_TYPES[type_key], doc, context)
+    except Exception:
+        logger.exception("Hujjat render qilinmadi: %s #%s", type_key, doc.id)
+        return None
+
+
+def _render_pool_size(task_count: int) -> int:
+    workers = settings.DOCUMENT_RENDER_WORKERS or os.cpu_count() or 1
+    return max(1, min(workers, task_count))
+
+
+def _cached_or_render(doc_type, doc, key, context):
+    """Keshdagi tayyor hujjat; bo'lmasa joyida render qilib keshga yozadi."""
+    docx_bytes = get_cached_document(key)
+    if docx_bytes is None:
+        docx_bytes = _render_bulk_document((doc_type.key, doc, context))
+        if docx_bytes is not None:
+            set_cached_document(key, docx_bytes)
+    return docx_bytes
+
+
+def render_documents(doc_type, docs, context):
+    """Hujjatlarni render qiladi; natijalar (bytes yoki None) docs tartibida.
+
+    Har bir hujjat uchun avval tayyor hujjatlar keshi tekshiriladi (kalit — render
+    kirishlari xeshi: yozuv maydonlari, sozlamalar, koeffitsient, shablon xeshi).
+    Faqat eskirgan yoki yangi yozuvlar render qilinib keshga yoziladi — bitta yozuv
+    o'zgarganda butun eksport bitta render bilan qayta yig'iladi.
+
+    Render parallel (DOCUMENT_RENDER_WORKERS); fork orqali yaratilgan worker'lar
+    ota jarayonda oldindan o'qilgan (issiq) shablon keshini meros qilib oladi.
+    """
+    if not os.path.exists(doc_type.template_path):
+        return
+    # Kalitlar render'dan oldin olinadi (render doc'ni joyida o'zgartiradi);
+    # shu bilan shablon fork'dan oldin o'qiladi — worker'lar uni meros oladi
+    keys = doc_type.cache_keys(docs, context)
+    misses = [not has_cached_document(key) for key in keys]
+    workers = _render_pool_size(sum(misses))
+    if workers == 1:
+        for doc, key in zip(docs, keys):
+            yield _cached_or_render(doc_type, doc, key, context)
+        return
+    mp_context = (
+        multiprocessing.get_context("fork")
+        if "fork" in multiprocessing.get_all_start_methods()
+        else None
+    )
+
+    def result(doc, key, future):
+        if future is None:
+            return _cached_or_render(doc_type, doc, key, context)
+        docx_bytes = future.result()
+        if docx_bytes is not None:
+            set_cached_document(key, docx_bytes)
+        return docx_bytes
+
+    # Oldinda ko'pi bilan workers × 2 ta render vazifasi — natijalar iste'molchidan
+    # (tarmoqdan) tezroq tayyor bo'lsa ham xotirada to'planib qolmaydi.
+    # Keshdagi hujjatlar navbatda faqat kalit bo'lib turadi va yield paytida o'qiladi.
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+        pending = deque()
+        in_flight = 0
+        for doc, key, miss in zip(docs, keys, misses):
+            future = pool.submit(_render_bulk_document, (doc_type.key, doc, context)) if miss else None
+            pending.append((doc, key, future))
+            if future is not None:
+                in_flight += 1
+            while in_flight >= window:
+                doc_, key_, future_ = pending.popleft()
+                if future_ is not None:
+                    in_flight -= 1
+                yield result(doc_, key_, future_)
+        while pending:
+            yield result(*pending.popleft())
+
+
+class _ZipStreamBuffer:
+    """ZipFile yozgan baytlarni yig'ib, bo'laklab uzatish uchun (seek'siz oqim)."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip_chunks(entries):
+    """(fayl_nomi, baytlar) juftliklaridan ZIP arxivini bo'laklab yield qiladi.
+
+    .docx o'zi allaqachon siqilgan zip — qayta siqmaymiz (ZIP_STORED).
+    """
+    buf = _ZipStreamBuffer()
+    date_time = timezone.localtime().timetuple()[:6]
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = zipfile.ZIP_STORED
+            zf.writestr(info, data)
+            yield buf.pop()
+    yield buf.pop()
+
+
+def iter_zip_entries(doc_type, docs, rendered, failed: list | None = None):
+    """Render natijalaridan (ZIP ichidagi nom, .docx baytlari) juftliklari.
+
+    Render bo'lmagan (None) hujjatlar arxivga kirmaydi — ularning ro'yxati oxirida
+    XATOLAR.txt bo'lib qo'shiladi va failed ro'yxatiga (berilgan bo'lsa) yoziladi.
+    Nomlar takrorlanmaydi.
+    """
+    used_names = set()
+    missing = []
+    for doc, docx_bytes in zip(docs, rendered):
+        if docx_bytes is None:
+            missing.append(f"{doc_type.filename(doc)} — {doc.name}")
+            continue
+        safe = re.sub(r"[^\w\s.\-]", "", doc.name or "").strip()[:80] or "hujjat"
+        fname = f"{doc_type.file_prefix}_{doc.id}_{safe}.docx"
+        # nomlar takrorlanmasin
+        base, ext = os.path.splitext(fname)
+        n = 1
+        while fname in used_names:
+            fname = f"{base}_{n}{ext}"
+            n += 1
+        used_names.add(fname)
+        yield fname, docx_bytes
+    if missing:
+        if failed is not None:
+            failed.extend(missing)
+        text = "Render qilinmagan hujjatlar (server jurnalida batafsil):\n" + "\n".join(missing) + "\n"
+        yield FAILED_LIST_NAME, text.encode("utf-8")
@@ -0,0 +1,646 @@
+"""Word (.docx) shablonlari reestri va placeholder almashtirish mexanizmi.
+
+Har bir shablon worker jarayonida bir marta o'qiladi (parse qilinadi) va
+``{{placeholder}}`` saqlovchi paragraflar ro'yxati oldindan indekslanadi.
+Har bir render uchun tayyor hujjatning arzon nusxasi beriladi. Shablon fayli
+o'zgarsa (mtime), keyingi so'rovda avtomatik qayta yuklanadi.
+
+Paragraf matni bitta oldindan kompilyatsiya qilingan regex bilan bo'laklarga
+ajratiladi va bir o'tishda to'ldiriladi — ish hajmi placeholder kalitlari
+soniga bog'liq emas.
+
+Ikki render engine bor (DOCUMENT_RENDER_ENGINE): "docx" — butun python-docx
+hujjatining nusxasi va Paragraph/Run proksilari orqali; "xml" — faqat
+word/document.xml lxml daraxti nusxalanadi va oldindan hisoblangan joylardagi
+run'lar to'g'ridan-to'g'ri to'ldiriladi. document.xml ikkalasida bayt-bayt bir
+xil; "xml" engine qolgan zip a'zolarini shablondan siqilgan holida ko'chiradi.
+
+``manage.py compile_templates`` shablonlarni normallashtiradi (Word bo'lib
+yuborgan har bir ``{{kalit}}`` o'z run'iga yig'iladi) va placeholders.json
+manifestini yozadi. Manifest shablonga mos bo'lsa, render faqat shu run'larning
+matnini almashtiradi — paragrafning qolgan run'lari va formatlashi tegilmaydi.
+Shu sababli bold_keys'da bo'lmagan placeholder shablonda qalin run'da tursa,
+qiymat ham qalin chiqadi; manifestsiz fill_runs yo'li esa qalin kalitli
+paragrafdagi qolgan matnni oddiy (qalin emas) run'ga yozadi.
+"""
+
+import copy
+import hashlib
+import io
+import json
+import os
+import re
+import struct
+import threading
+import zipfile
+import zlib
+from typing import NamedTuple
+
+from django.conf import settings
+from docx import Document as DocxDocument
+from docx.document import Document as DocxDocumentProxy
+from docx.opc.oxml import serialize_part_xml
+from docx.opc.pkgwriter import PackageWriter
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+TEMPLATES_DIR = os.path.join(settings.BASE_DIR, "contract_templates")
+
+# Zip a'zolari uchun qat'iy sana — bir xil kirish har doim bayt-bayt bir xil .docx beradi
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+
+# compile_templates yozadigan manifest: har bir shablon uchun placeholder run'lari joyi
+MANIFEST_NAME = "placeholders.json"
+
+
+def split_placeholders(text: str) -> list[str]:
+    """Matnni bo'laklarga ajratadi: [matn, kalit, matn, kalit, ..., matn].
+
+    Juft indekslar — oddiy matn, toq indekslar — placeholder kalitlari.
+    """
+    return PLACEHOLDER_RE.split(text)
+
+
+def _set_bold(rpr, bold: bool):
+    """w:rPr'da qalinlikni yoqadi (w:b + w:bCs) yoki olib tashlaydi."""
+    from docx.oxml import OxmlElement
+
+    if bold:
+        b_elem = rpr.find(qn("w:b"))
+        if b_elem is None:
+            b_elem = OxmlElement("w:b")
+            rpr.insert(0, b_elem)
+        b_elem.attrib.pop(qn("w:val"), None)
+        # bCs ham qo'shish (Kirill/lotin uchun)
+        bcs = rpr.find(qn("w:bCs"))
+        if bcs is None:
+            bcs = OxmlElement("w:bCs")
+            rpr.insert(1, bcs)
+    else:
+        # bold elementni olib tashlaymiz
+        for tag in ("w:b", "w:bCs"):
+            el = rpr.find(qn(tag))
+            if el is not None:
+                rpr.remove(el)
+
+
+def _is_bold_rpr(rpr) -> bool:
+    if rpr is None:
+        return False
+    b_elem = rpr.find(qn("w:b"))
+    return b_elem is not None and b_elem.get(qn("w:val"), "true") not in ("0", "false", "off")
+
+
+def _make_run(p_elem, text: str, template_rpr, bold: bool):
+    """Yangi w:r element yaratadi."""
+    from docx.oxml import OxmlElement
+
+    r_elem = OxmlElement("w:r")
+
+    # Run properties nusxasi
+    if template_rpr is not None:
+        new_rpr = copy.deepcopy(template_rpr)
+    else:
+        new_rpr = OxmlElement("w:rPr")
+
+    _set_bold(new_rpr, bold)
+    r_elem.append(new_rpr)
+
+    t_elem = OxmlElement("w:t")
+    t_elem.text = text
+    if text != text.strip():
+        t_elem.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+    r_elem.append(t_elem)
+    p_elem.append(r_elem)
+
+
+def _is_image_r(r_elem) -> bool:
+    return r_elem.find(qn("w:drawing")) is not None or r_elem.find(qn("w:pict")) is not None
+
+
+def is_image_run(run) -> bool:
+    """Run rasm (muhr/QR) yoki grafik saqlaydimi?"""
+    return _is_image_r(run._r)
+
+
+def fill_paragraph(para, placeholders: dict, bold_keys=frozenset(), parts=None):
+    """Paragraph ichidagi placeholder'larni to'ldiradi (rasm/muhr run'larini saqlaydi).
+
+    parts — split_placeholders() natijasi (shablon kompilyatsiyasida oldindan
+    hisoblangan bo'lsa); berilmasa run'lar matnidan shu yerda olinadi.
+    bold_keys'dagi placeholder qiymatlari alohida qalin (bold) run bo'lib chiqadi.
+    Ma'lum bo'lmagan kalitlar ``{{kalit}}`` ko'rinishida o'zgarishsiz qoladi.
+    """
+    if parts is None:
+        parts = split_placeholders("".join(run.text for run in para.runs))
+    text_runs = [run._r for run in para.runs if not is_image_run(run)]
+    fill_runs(para._p, text_runs, placeholders, parts, bold_keys)
+
+
+def fill_runs(p_elem, text_runs: list, placeholders: dict, parts: list[str], bold_keys=frozenset()):
+    """fill_paragraph'ning element (lxml) darajasidagi yadrosi.
+
+    text_runs — paragrafning rasm bo'lmagan w:r elementlari (hujjat tartibida).
+    Ikkala render engine ham shu funksiyadan foydalanadi — natija bir xil.
+    """
+    keys = parts[1::2]
+    if not any(key in placeholders for key in keys):
+        return
+
+    def resolve(key):
+        return str(placeholders[key]) if key in placeholders else f"{{{{{key}}}}}"
+
+    # Bold kerak bo'lmasa — oddiy almashtirish (rasm run'lariga tegmaymiz)
+    if not any(key in bold_keys for key in keys):
+        full_text = "".join(part if i % 2 == 0 else resolve(part) for i, part in enumerate(parts))
+        for i, r_elem in enumerate(text_runs):
+            r_elem.text = full_text if i == 0 else ""
+        return
+
+    # Bold kerak: matn run'larini bo'lib qayta yaratamiz, rasm run'larini saqlaymiz
+    template_rpr = text_runs[0].find(qn("w:rPr")) if text_runs else None
+
+    # Faqat matn run'larini o'chirish (rasm/muhr o'z joyida qoladi)
+    for r_elem in text_runs:
+        p_elem.remove(r_elem)
+
+    # Bir o'tishda: oddiy matn va non-bold qiymatlar buferga yig'iladi,
+    # bold placeholder uchrasa bufer oddiy run bo'lib chiqadi, qiymat esa bold run.
+    buffer = []
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            buffer.append(part)
+        elif part in bold_keys:
+            text = "".join(buffer)
+            if text:
+                _make_run(p_elem, text, template_rpr, bold=False)
+            buffer = []
+            _make_run(p_elem, placeholders.get(part, f"{{{{{part}}}}}"), template_rpr, bold=True)
+        else:
+            buffer.append(resolve(part))
+    text = "".join(buffer)
+    if text:
+        _make_run(p_elem, text, template_rpr, bold=False)
+
+
+def fill_placeholder_run(r_elem, key: str, placeholders: dict, bold_keys=frozenset()):
+    """Normallashtirilgan shablondagi ``{{kalit}}`` run'ini qiymat bilan almashtiradi.
+
+    Faqat shu run o'zgaradi — paragrafdagi boshqa run'lar va ularning formatlashi
+    shablondagidek qoladi. bold_keys'dagi qiymatlar qalin qilinadi; qolganlari
+    run'ning shablondagi formatlashini (qalinligini ham) saqlaydi.
+    """
+    if key not in placeholders:
+        return
+    r_elem.text = str(placeholders[key])
+    if key in bold_keys:
+        _set_bold(r_elem.get_or_add_rPr(), True)
+
+
+# Normallashtirishda faqat shunday bolalari bo'lgan run'lar qayta yoziladi
+# (maydon kodlari, izoh havolalari va h.k. bo'lgan run'larga tegilmaydi)
+_SIMPLE_RUN_CHILDREN = frozenset({
+    qn("w:rPr"), qn("w:t"), qn("w:tab"), qn("w:br"), qn("w:lastRenderedPageBreak"),
+})
+
+
+def _text_runs(p_elem) -> list:
+    """Paragrafning rasm bo'lmagan to'g'ridan-to'g'ri w:r bolalari (Paragraph.runs kabi)."""
+    return [child for child in p_elem if child.tag == qn("w:r") and not _is_image_r(child)]
+
+
+def normalize_paragraph(p_elem) -> bool:
+    """Paragrafdagi har bir ``{{kalit}}``ni o'zining alohida run'iga ajratadi.
+
+    Word tokenni bir necha run'ga bo'lib yuboradi ("{{", "shnq_name", "}}").
+    Token u boshlangan run formatlashi bilan bitta run'ga yig'iladi; atrofdagi
+    matn o'z run'i formatlashida qoladi. Paragraf o'zgargan bo'lsa True.
+    Qayta yozilishi kerak bo'lgan run oddiy bo'lmasa ValueError.
+    """
+    from docx.oxml import OxmlElement
+
+    runs = _text_runs(p_elem)
+    texts = [r_elem.text for r_elem in runs]
+    full_text = "".join(texts)
+    matches = list(PLACEHOLDER_RE.finditer(full_text))
+    if not matches:
+        return False
+
+    bounds = []
+    pos = 0
+    for text in texts:
+        bounds.append((pos, pos + len(text)))
+        pos += len(text)
+
+    # Matn bo'laklari: (boshi, oxiri, tokenmi)
+    segments = []
+    cursor = 0
+    for match in matches:
+        if match.start() > cursor:
+            segments.append((cursor, match.start(), False))
+        segments.append((match.start(), match.end(), True))
+        cursor = match.end()
+    if cursor < len(full_text):
+        segments.append((cursor, len(full_text), False))
+
+    # Har bir run uchun yangi matnlar: token boshlangan run'ga to'liq tushadi,
+    # oddiy matn esa run chegaralari bo'yicha bo'linadi
+    pieces = [[] for _ in runs]
+    for start, end, is_token in segments:
+        for i, (run_start, run_end) in enumerate(bounds):
+            if is_token:
+                if run_start <= start < run_end:
+                    pieces[i].append(full_text[start:end])
+                    break
+            else:
+                lo, hi = max(run_start, start), min(run_end, end)
+                if lo < hi:
+                    pieces[i].append(full_text[lo:hi])
+
+    changed = False
+    for r_elem, text, run_pieces in zip(runs, texts, pieces):
+        if not text or run_pieces == [text]:
+            continue
+        if any(child.tag not in _SIMPLE_RUN_CHILDREN for child in r_elem):
+            raise ValueError(f"Run'da matndan boshqa elementlar bor, bo'lib bo'lmaydi: {text!r}")
+        rpr = r_elem.find(qn("w:rPr"))
+        for piece in run_pieces:
+            new_r = OxmlElement("w:r")
+            if rpr is not None:
+                new_r.append(copy.deepcopy(rpr))
+            new_r.text = piece
+            r_elem.addprevious(new_r)
+        p_elem.remove(r_elem)
+        changed = True
+    return changed
+
+
+def _element_path(root, elem) -> tuple[int, ...]:
+    """root'dan elem'gacha bolalar indekslari yo'li."""
+    path = []
+    node = elem
+    while node is not root:
+        parent = node.getparent()
+        path.append(parent.index(node))
+        node = parent
+    return tuple(reversed(path))
+
+
+def _resolve_path(root, path):
+    node = root
+    for i in path:
+        node = node[i]
+    return node
+
+
+def load_manifest(templates_dir: str = TEMPLATES_DIR) -> dict:
+    """compile_templates yozgan placeholder manifesti (bo'lmasa bo'sh lug'at)."""
+    try:
+        with open(os.path.join(templates_dir, MANIFEST_NAME), encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+class CompiledTemplate:
+    """Bir marta o'qilgan shablon va uning placeholder paragraflari indeksi."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, "rb") as fh:
+            data = fh.read()
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        # Asl nusxa faqat nusxalash uchun: unga python-docx proksilari (doc.paragraphs
+        # va h.k.) orqali murojaat qilinmaydi — aks holda keshlangan ichki element
+        # havolalari deepcopy'da asl daraxtdan ajralib qoladi.
+        self._master = DocxDocument(io.BytesIO(data))
+        # Shablon zip a'zolari siqilgan holida — "xml" engine ularni o'zgarishsiz ko'chiradi
+        self._raw_members = _read_raw_members(data)
+        # (w:p elementining body ichidagi tartib raqami, split_placeholders bo'laklari)
+        self.placeholder_paragraphs = self._index_placeholders(copy.deepcopy(self._master))
+        # "xml" engine uchun: faqat word/document.xml daraxti nusxalanadi; paragraflar
+        # ildizdan bolalar indekslari yo'li bilan topiladi (butun daraxtni aylanmasdan)
+        self._document_part = self._master.part
+        self._document_element = self._master.element
+        self.placeholder_locations = self._index_locations()
+        # compile_templates bilan normallashtirilgan shablon: [(run yo'li, kalit), ...];
+        # manifest bo'lmasa yoki shablon keyin o'zgargan bo'lsa None
+        self.placeholder_runs = self._manifest_runs()
+
+    @staticmethod
+    def _index_placeholders(doc) -> list[tuple[int, list[str]]]:
+        """Placeholder saqlovchi paragraflar o'rni va matnining bo'laklari.
+
+        Aylanish tartibi avvalgi _fill_docx bilan bir xil: avval body paragraflari,
+        keyin jadval kataklari. Birlashtirilgan kataklar python-docx'da bir necha
+        marta qaytadi — har bir paragraf faqat bir marta olinadi.
+        """
+        positions = {p: i for i, p in enumerate(doc.element.body.iter(qn("w:p")))}
+
+        paragraphs = list(doc.paragraphs)
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    paragraphs.extend(cell.paragraphs)
+
+        indexed = []
+        seen = set()
+        for para in paragraphs:
+            idx = positions.get(para._p)
+            if idx is None or idx in seen:
+                continue
+            parts = split_placeholders("".join(run.text for run in para.runs))
+            if len(parts) > 1:
+                seen.add(idx)
+                indexed.append((idx, parts))
+        return indexed
+
+    def _manifest_runs(self) -> list[tuple[tuple[int, ...], str]] | None:
+        entry = load_manifest(os.path.dirname(self.path)).get(os.path.basename(self.path))
+        if not entry or entry.get("sha256") != self.sha256:
+            return None
+        runs = [(tuple(item["path"]), item["key"]) for item in entry["placeholders"]]
+        # Yo'llar shu shablonga mosligini tekshiramiz — aks holda eski usul
+        for path, key in runs:
+            try:
+                r_elem = _resolve_path(self._document_element, path)
+            except IndexError:
+                return None
+            if r_elem.tag != qn("w:r") or r_elem.text != f"{{{{{key}}}}}":
+                return None
+        return runs
+
+    def normalize(self) -> int:
+        """Placeholder paragraflaridagi tokenlarni alohida run'larga ajratadi (shablonning
+        o'zida, compile_templates uchun). O'zgargan paragraflar soni."""
+        all_paragraphs = list(self._document_element.body.iter(qn("w:p")))
+        changed = sum(normalize_paragraph(all_paragraphs[idx]) for idx, _ in self.placeholder_paragraphs)
+        self.placeholder_locations = self._index_locations()
+        return changed
+
+    def manifest_entries(self, bold_keys=frozenset()) -> list[dict]:
+        """Har bir ``{{kalit}}`` run'i: paragraf raqami, run yo'li, qalin chiqadimi.
+
+        Faqat token run'ning butun matni bo'lgan (normallashtirilgan) joylar olinadi.
+        """
+        root = self._document_element
+        all_paragraphs = list(root.body.iter(qn("w:p")))
+        entries = []
+        for idx, _ in self.placeholder_paragraphs:
+            for r_elem in _text_runs(all_paragraphs[idx]):
+                match = PLACEHOLDER_RE.fullmatch(r_elem.text)
+                if match is None:
+                    continue
+                key = match.group(1)
+                entries.append({
+                    "key": key,
+                    "paragraph": idx,
+                    "path": list(_element_path(root, r_elem)),
+                    "bold": key in bold_keys or _is_bold_rpr(r_elem.find(qn("w:rPr"))),
+                })
+        return entries
+
+    def is_normalized(self) -> bool:
+        """Har bir placeholder alohida run'da turibdimi (bo'lingan token yo'q)."""
+        found = sum(len(parts) // 2 for _, parts in self.placeholder_paragraphs)
+        return found == len(self.manifest_entries())
+
+    def to_bytes(self) -> bytes:
+        """Shablonning joriy (masalan normallashtirilgan) holati .docx baytlari."""
+        return self.save_xml_document(DocxDocumentProxy(self._document_element, self._document_part))
+
+    def fill(self, element, placeholders: dict, bold_keys=frozenset()):
+        """document.xml daraxti nusxasidagi placeholder'larni to'ldiradi.
+
+        Normallashtirilgan shablonda faqat ``{{kalit}}`` run'lari almashtiriladi;
+        aks holda paragraf run'lari birlashtirilib qayta yoziladi (fill_runs).
+        Barcha elementlar o'zgartirishdan oldin topiladi.
+        """
+        if self.placeholder_runs is not None:
+            targets = [(_resolve_path(element, path), key) for path, key in self.placeholder_runs]
+            for r_elem, key in targets:
+                fill_placeholder_run(r_elem, key, placeholders, bold_keys)
+            return
+        targets = []
+        for path, run_indices, parts in self.placeholder_locations:
+            p_elem = _resolve_path(element, path)
+            children = list(p_elem)
+            targets.append((p_elem, [children[i] for i in run_indices], parts))
+        for p_elem, text_runs, parts in targets:
+            fill_runs(p_elem, text_runs, placeholders, parts, bold_keys)
+
+    def _index_locations(self) -> list[tuple[tuple[int, ...], tuple[int, ...], list[str]]]:
+        """(paragraf yo'li, rasm bo'lmagan w:r bolalar indekslari, bo'laklar) ro'yxati."""
+        root = self._document_element
+        all_paragraphs = list(root.body.iter(qn("w:p")))
+        locations = []
+        for idx, parts in self.placeholder_paragraphs:
+            p_elem = all_paragraphs[idx]
+            # python-docx Paragraph.runs bilan bir xil: faqat to'g'ridan-to'g'ri w:r bolalar
+            run_indices = tuple(
+                i for i, child in enumerate(p_elem) if child.tag == qn("w:r") and not _is_image_r(child)
+            )
+            locations.append((_element_path(root, p_elem), run_indices, parts))
+        return locations
+
+    def new_xml_document(self):
+        """"xml" engine uchun nusxa: faqat document.xml daraxti nusxalanadi.
+
+        Qaytadi — shu daraxt ustidagi yupqa python-docx proksisi (fill() va
+        post-process uchun); qolgan qismlar shablonniki (faqat o'qiladi).
+        """
+        element = copy.deepcopy(self._document_element)
+        return DocxDocumentProxy(element, self._document_part)
+
+    def save_xml_document(self, docx_doc) -> bytes:
+        """new_xml_document() nusxasini .docx baytlariga saqlaydi.
+
+        Faqat document.xml qayta serializatsiya qilinib siqiladi; qolgan a'zolar
+        (styles, numbering, theme, muhr rasmlari va h.k.) shablon zip'idan siqilgan
+        oqimi bilan bayt-bayt ko'chiriladi — "xml" engine ularni o'zgartirmaydi.
+        """
+        document_xml = serialize_part_xml(docx_doc.element)
+        document_name = self._document_part.partname.membername
+        members = [
+            _deflate_member(member.name, document_xml) if member.name == document_name else member
+            for member in self._raw_members
+        ]
+        return _write_zip(members)
+
+    def new_document(self):
+        """Render uchun mustaqil nusxa: (docx_doc, [(paragraf, bo'laklar), ...])."""
+        doc = copy.deepcopy(self._master)
+        body = doc.element.body
+        all_paragraphs = list(body.iter(qn("w:p")))
+        paragraphs = [
+            (Paragraph(all_paragraphs[i], doc._body), parts) for i, parts in self.placeholder_paragraphs
+        ]
+        return doc, paragraphs
+
+
+class _RawMember(NamedTuple):
+    """Zip a'zosi: siqilgan (raw) oqim va uni qayta ochmasdan yozish uchun metama'lumot."""
+
+    name: str
+    compress_type: int
+    flag_bits: int
+    crc: int
+    file_size: int
+    data: bytes
+
+
+# Local file header'dagi fayl nomi va extra maydon uzunliklari indekslari
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+# 3-bit — CRC/o'lchamlar a'zodan keyingi data descriptor'da; biz ularni header'ga yozamiz
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8_NAME = 0x800
+
+
+def _read_raw_members(data: bytes) -> list[_RawMember]:
+    """Zip a'zolarining siqilgan oqimlarini (ochmasdan) arxivdagi tartibda o'qiydi."""
+    members = []
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for info in zf.infolist():
+            offset = info.header_offset
+            header = struct.unpack(zipfile.structFileHeader, data[offset:offset + zipfile.sizeFileHeader])
+            start = (
+                offset
+                + zipfile.sizeFileHeader
+                + header[_FH_FILENAME_LENGTH]
+                + header[_FH_EXTRA_FIELD_LENGTH]
+            )
+            members.append(_RawMember(
+                name=info.filename,
+                compress_type=info.compress_type,
+                flag_bits=info.flag_bits & ~(_FLAG_DATA_DESCRIPTOR | _FLAG_UTF8_NAME),
+                crc=info.CRC,
+                file_size=info.file_size,
+                data=data[start:start + info.compress_size],
+            ))
+    return members
+
+
+def _deflate_member(name: str, content: bytes) -> _RawMember:
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    data = compressor.compress(content) + compressor.flush()
+    return _RawMember(name, zipfile.ZIP_DEFLATED, 0, zlib.crc32(content), len(content), data)
+
+
+def _write_zip(members: list[_RawMember]) -> bytes:
+    """Tayyor siqilgan oqimlardan zip arxivi yozadi (qat'iy sana, zip64'siz)."""
+    buf = io.BytesIO()
+    infos = []
+    for member in members:
+        info = zipfile.ZipInfo(member.name, date_time=ZIP_DATE_TIME)
+        info.compress_type = member.compress_type
+        info.flag_bits = member.flag_bits
+        info.CRC = member.crc
+        info.compress_size = len(member.data)
+        info.file_size = member.file_size
+        info.header_offset = buf.tell()
+        buf.write(info.FileHeader(zip64=False))
+        buf.write(member.data)
+        infos.append(info)
+
+    dt = ZIP_DATE_TIME
+    dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+    dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+    central_dir_offset = buf.tell()
+    for info in infos:
+        try:
+            name, flag_bits = info.filename.encode("ascii"), info.flag_bits
+        except UnicodeEncodeError:
+            name, flag_bits = info.filename.encode("utf-8"), info.flag_bits | _FLAG_UTF8_NAME
+        buf.write(struct.pack(
+            zipfile.structCentralDir,
+            zipfile.stringCentralDir,
+            info.create_version,
+            info.create_system,
+            info.extract_version,
+            info.reserved,
+            flag_bits,
+            info.compress_type,
+            dostime,
+            dosdate,
+            info.CRC,
+            info.compress_size,
+            info.file_size,
+            len(name),
+            0,
+            0,
+            0,
+            info.internal_attr,
+            info.external_attr,
+            info.header_offset,
+        ))
+        buf.write(name)
+    central_dir_size = buf.tell() - central_dir_offset
+    buf.write(struct.pack(
+        zipfile.structEndArchive,
+        zipfile.stringEndArchive,
+        0,
+        0,
+        len(infos),
+        len(infos),
+        central_dir_size,
+        central_dir_offset,
+        0,
+    ))
+    return buf.getvalue()
+
+
+class _DeterministicZipWriter:
+    """python-docx PhysPkgWriter o'rnini bosuvchi yozuvchi: a'zolar qat'iy sana bilan."""
+
+    def __init__(self, fileobj):
+        self._zipf = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, pack_uri, blob):
+        info = zipfile.ZipInfo(pack_uri.membername, date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self._zipf.writestr(info, blob)
+
+    def close(self):
+        self._zipf.close()
+
+
+def save_document(doc) -> bytes:
+    """Hujjatni deterministik .docx baytlariga saqlaydi (doc.save() o'rniga).
+
+    doc.save() zip a'zolariga joriy vaqtni yozadi — natijada bir xil hujjat har
+    safar boshqa baytlar bo'lib chiqadi. Bu yerda PackageWriter bilan bir xil
+    tartibda, lekin qat'iy sana bilan yoziladi.
+    """
+    package = doc.part.package
+    for part in package.parts:
+        part.before_marshal()
+    buf = io.BytesIO()
+    writer = _DeterministicZipWriter(buf)
+    PackageWriter._write_content_types_stream(writer, package.parts)
+    PackageWriter._write_pkg_rels(writer, package.rels)
+    PackageWriter._write_parts(writer, package.parts)
+    writer.close()
+    return buf.getvalue()
+
+
+_registry: dict[str, CompiledTemplate] = {}
+_registry_lock = threading.Lock()
+
+
+def get_template(template_path: str) -> CompiledTemplate:
+    """Shablonni reestrdan oladi; birinchi marta yoki fayl o'zgarganda qayta o'qiydi.
+
+    Fayl bo'lmasa FileNotFoundError ko'taradi.
+    """
+    mtime_ns = os.stat(template_path).st_mtime_ns
+    with _registry_lock:
+        compiled = _registry.get(template_path)
+        if compiled is None or compiled.mtime_ns != mtime_ns:
+            compiled = CompiledTemplate(template_path)
+            _registry[template_path] = compiled
+    return compiled
+
@@ -0,0 +1,169 @@
+"""Fon bulk eksport vazifalari: navbat, render, arxivni saqlash va tozalash.
+
+Navbat — bazadagi BulkExportJob jadvali (Redis/Celery shart emas). Vazifalarni
+`manage.py run_export_worker` bajaradi; HTTP so'rov faqat navbatga qo'yadi va
+progressni o'qiydi, shuning uchun katta eksport gunicorn worker'ini band qilmaydi.
+"""
+
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .documents import DOCUMENT_TYPES, RenderContext, iter_zip_chunks, iter_zip_entries, render_documents
+from .models import BulkExportJob, DocumentCalculation
+
+logger = logging.getLogger(__name__)
+
+# Progress va heartbeat bazaga ko'pi bilan shuncha soniyada bir marta yoziladi
+PROGRESS_INTERVAL = 1.0
+
+EXPORTS_DIR = "exports"
+
+
+def enqueue_export(document_type: str) -> tuple[BulkExportJob, bool]:
+    """Eksportni navbatga qo'yadi: (vazifa, yangi_yaratildimi).
+
+    Shu turdagi hali boshlanmagan vazifa bo'lsa, yangisi yaratilmaydi — o'sha qaytadi.
+    """
+    job = (
+        BulkExportJob.objects.filter(document_type=document_type, status=BulkExportJob.Status.QUEUED)
+        .order_by("id")
+        .first()
+    )
+    if job is not None:
+        return job, False
+    return BulkExportJob.objects.create(document_type=document_type), True
+
+
+def claim_next_job() -> BulkExportJob | None:
+    """Navbatdagi eng eski vazifani bo'sh slot bilan egallaydi.
+
+    Slotlar soni BULK_EXPORT_MAX_CONCURRENT; RUNNING vazifalar orasida slot unikal
+    (bazadagi shartli unique constraint), shuning uchun bir nechta worker jarayoni
+    bo'lsa ham chegaradan oshib ketmaydi. Vazifa yoki bo'sh slot bo'lmasa None.
+    """
+    max_slots = max(1, settings.BULK_EXPORT_MAX_CONCURRENT)
+    while True:
+        job_id = (
+            BulkExportJob.objects.filter(status=BulkExportJob.Status.QUEUED)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        busy = set(
+            BulkExportJob.objects.filter(status=BulkExportJob.Status.RUNNING).values_list("slot", flat=True)
+        )
+        free = [slot for slot in range(max_slots) if slot not in busy]
+        if not free:
+            return None
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                claimed = BulkExportJob.objects.filter(pk=job_id, status=BulkExportJob.Status.QUEUED).update(
+                    status=BulkExportJob.Status.RUNNING,
+                    slot=free[0],
+                    started_at=now,
+                    heartbeat_at=now,
+                    done=0,
+                )
+        except IntegrityError:
+            # slotni shu orada boshqa worker egalladi — qaytadan urinamiz
+            continue
+        if claimed:
+            return BulkExportJob.objects.get(pk=job_id)
+        # vazifani boshqa worker oldi — keyingisini olamiz
+
+
+def requeue_stale_jobs() -> int:
+    """Heartbeat'i BULK_EXPORT_STALE_SECONDS'dan beri yangilanmagan (worker to'xtagan)
+    RUNNING vazifalarni qayta navbatga qo'yadi."""
+    cutoff = timezone.now() - timedelta(seconds=settings.BULK_EXPORT_STALE_SECONDS)
+    return BulkExportJob.objects.filter(status=BulkExportJob.Status.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=BulkExportJob.Status.QUEUED,
+        slot=None,
+        done=0,
+        started_at=None,
+        heartbeat_at=None,
+    )
+
+
+def expire_old_exports() -> int:
+    """Muddati o'tgan tayyor arxivlarni diskdan o'chiradi (vazifa yozuvi EXPIRED bo'lib qoladi)."""
+    expired = BulkExportJob.objects.filter(status=BulkExportJob.Status.DONE, expires_at__lt=timezone.now())
+    count = 0
+    for job in expired:
+        if job.archive:
+            job.archive.delete(save=False)
+        job.status = BulkExportJob.Status.EXPIRED
+        job.save(update_fields=["status", "archive"])
+        count += 1
+    return count
+
+
+def _track_progress(job_id: int, rendered):
+    """Render natijalarini o'tkazib yuboradi va progress/heartbeat'ni bazaga yozib boradi."""
+    done = 0
+    last_write = time.monotonic()
+    for docx_bytes in rendered:
+        done += 1
+        yield docx_bytes
+        if time.monotonic() - last_write >= PROGRESS_INTERVAL:
+            BulkExportJob.objects.filter(pk=job_id).update(done=done, heartbeat_at=timezone.now())
+            last_write = time.monotonic()
+
+
+def run_export_job(job: BulkExportJob) -> None:
+    """Egallangan vazifani bajaradi: hujjatlarni render qilib ZIP'ni MEDIA_ROOT ostiga yozadi.
+
+    Arxiv avval vaqtinchalik `.part` faylga yoziladi va tayyor bo'lgach atomar
+    almashtiriladi — yarim yozilgan fayl hech qachon yuklab olinmaydi.
+    """
+    doc_type = DOCUMENT_TYPES[job.document_type]
+    relative_path = f"{EXPORTS_DIR}/{job.pk}/{doc_type.archive_name}"
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    tmp_path = f"{path}.part"
+    try:
+        if not os.path.exists(doc_type.template_path):
+            raise FileNotFoundError(f"Shablon fayl topilmadi: {doc_type.template_name}")
+
+        docs = list(DocumentCalculation.objects.all().order_by("id"))
+        context = RenderContext.load()
+        job.total = len(docs)
+        BulkExportJob.objects.filter(pk=job.pk).update(total=job.total, heartbeat_at=timezone.now())
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rendered = _track_progress(job.pk, render_documents(doc_type, docs, context))
+        failed = []
+        with open(tmp_path, "wb") as fh:
+            for chunk in iter_zip_chunks(iter_zip_entries(doc_type, docs, rendered, failed)):
+                fh.write(chunk)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        logger.exception("Bulk eksport #%s bajarilmadi", job.pk)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        BulkExportJob.objects.filter(pk=job.pk).update(
+            status=BulkExportJob.Status.FAILED,
+            slot=None,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+        return
+
+    finished_at = timezone.now()
+    BulkExportJob.objects.filter(pk=job.pk).update(
+        status=BulkExportJob.Status.DONE,
+        slot=None,
+        done=job.total,
+        failed_documents=failed,
+        archive=relative_path,
+        finished_at=finished_at,
+        expires_at=finished_at + timedelta(hours=settings.BULK_EXPORT_TTL_HOURS),
+    )
@@ -0,0 +1,238 @@
+"""
+XlsxReader (zip + lxml iterparse) va openpyxl read_only o'qish tezligini solishtirish.
+
+Ishlatish:
+    python manage.py benchmark_xlsx_reader
+    python manage.py benchmark_xlsx_reader --rows 50000 --extra-columns 20 --repeat 3
+    python manage.py benchmark_xlsx_reader --file ../baza.xlsx
+
+--file berilmasa vaqtinchalik fayl yaratiladi: XLSX import ustunlari va
+importda o'qilmaydigan qo'shimcha ustunlar, satrlar Excel'dagidek umumiy satrlar
+jadvalida (sharedStrings.xml). Uch holat o'lchanadi: openpyxl (to'liq qatorlar),
+XlsxReader (to'liq qatorlar) va XlsxReader (faqat import ustunlari — XlsxSheet
+shunday o'qiydi). Natijalar openpyxl bilan qiymatma-qiymat solishtiriladi.
+"""
+
+import os
+import random
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand, CommandError
+from openpyxl import load_workbook
+
+from app_main.xlsx_import import REQUIRED_HEADERS, normalize_header
+from app_main.xlsx_reader import XlsxFormatError, XlsxReader
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    "</Types>"
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Лист1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+    'Target="sharedStrings.xml"/></Relationships>'
+)
+
+
+def _column_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _sample_rows(rows: int, extra_columns: int):
+    """Sarlavha va import formatidagi tasodifiy qatorlar (takrorlanadigan seed bilan)."""
+    rng = random.Random(1)
+    types = ["shnq", "mqn", "standard", "srn", "qr", "technical_regulation", "eurocode", "nizom"]
+    categories = ["new", "rework_harmonization", "rework_modification", "additional_change"]
+    yield [*REQUIRED_HEADERS, "final_total_amount", *(f"extra_{i}" for i in range(extra_columns))]
+    for i in range(rows):
+        yield [
+            f"{i % 37 + 1}. Bob. Sinov kategoriyasi",
+            f"SHNQ {i // 100}.{i % 100:02d}-26 Sinov hujjati {i}",
+            f"{2026 + i % 2}-yil {'I' * (i % 3 + 1)}V-chorak",
+            "Texnik me'yorlash va standartlashtirish ilmiy-tadqiqot instituti",
+            "" if i % 3 else f"Izoh {i}",
+            rng.randint(10, 300),
+            rng.choice(types),
+            rng.choice(categories),
+            rng.randint(1, 3),
+            rng.choice([0, 1250.5, 33000.125]),
+            None if i % 2 else 100000 + i * 0.5,
+            *(rng.choice([f"qo'shimcha {i % 50}", rng.random() * 1000, None]) for _ in range(extra_columns)),
+        ]
+
+
+def write_sample_xlsx(path: str, rows: int, extra_columns: int) -> None:
+    """Excel kabi (umumiy satrlar, r atributlari, <dimension>) .xlsx yozadi."""
+    strings = {}
+    width = len(REQUIRED_HEADERS) + 1 + extra_columns
+    letters = [_column_letters(i) for i in range(width)]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as fh:
+            fh.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f'<dimension ref="A1:{letters[-1]}{rows + 1}"/><sheetData>'.encode("utf-8")
+            )
+            for row_number, values in enumerate(_sample_rows(rows, extra_columns), start=1):
+                cells = []
+                for letter, value in zip(letters, values):
+                    if value is None or value == "":
+                        continue
+                    ref = f"{letter}{row_number}"
+                    if isinstance(value, str):
+                        index = strings.setdefault(value, len(strings))
+                        cells.append(f'<c r="{ref}" t="s"><v>{index}</v></c>')
+                    else:
+                        cells.append(f'<c r="{ref}"><v>{value!r}</v></c>')
+                fh.write(f'<row r="{row_number}">{"".join(cells)}</row>'.encode("utf-8"))
+            fh.write(b"</sheetData></worksheet>")
+        shared = "".join(f"<si><t>{escape(text)}</t></si>" for text in strings)
+        archive.writestr(
+            "xl/sharedStrings.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            f'count="{len(strings)}" uniqueCount="{len(strings)}">{shared}</sst>',
+        )
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+
+
+def _read_openpyxl(path: str, columns=None):
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.active
+        worksheet.reset_dimensions()
+        rows = []
+        for values in worksheet.iter_rows(values_only=True):
+            if columns is not None:
+                values = tuple(values[i] if i < len(values) else None for i in columns)
+            if any(value is not None for value in values):
+                rows.append(values)
+        return rows
+    finally:
+        workbook.close()
+
+
+def _trim(values: tuple) -> tuple:
+    """Oxiridagi None'larsiz — openpyxl qatorlarni varaq kengligigacha to'ldiradi."""
+    end = len(values)
+    while end and values[end - 1] is None:
+        end -= 1
+    return tuple(values[:end])
+
+
+def _read_native(path: str, columns=None):
+    with XlsxReader(path) as reader:
+        return [values for _, values in reader.rows(columns)]
+
+
+class Command(BaseCommand):
+    help = "XlsxReader va openpyxl o'qish tezligini solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="O'lchanadigan .xlsx (berilmasa vaqtinchalik fayl yaratiladi)")
+        parser.add_argument("--rows", type=int, default=50000, help="Yaratiladigan qatorlar soni")
+        parser.add_argument(
+            "--extra-columns",
+            type=int,
+            default=10,
+            help="Importda o'qilmaydigan qo'shimcha ustunlar soni",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Har bir o'lchov necha marta (eng yaxshisi olinadi)")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        tmp_dir = None
+        if not path:
+            tmp_dir = tempfile.TemporaryDirectory()
+            path = os.path.join(tmp_dir.name, "benchmark.xlsx")
+            started = time.perf_counter()
+            write_sample_xlsx(path, options["rows"], options["extra_columns"])
+            self.stdout.write(
+                f"Fayl yaratildi: {options['rows']} qator, "
+                f"{os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - started:.1f} s"
+            )
+        try:
+            self._run(path, max(1, options["repeat"]))
+        except XlsxFormatError as e:
+            raise CommandError(str(e)) from e
+        finally:
+            if tmp_dir is not None:
+                tmp_dir.cleanup()
+
+    def _run(self, path: str, repeat: int):
+        with XlsxReader(path) as reader:
+            header = next(reader.rows(), (None, ()))[1]
+        header_index = {normalize_header(value): idx for idx, value in enumerate(header)}
+        columns = [header_index[name] for name in REQUIRED_HEADERS if name in header_index]
+        self.stdout.write(f"Ustunlar: {len(header)} ta, import o'qiydigani: {len(columns)} ta")
+
+        cases = [
+            ("openpyxl (to'liq qator)", _read_openpyxl, None),
+            ("XlsxReader (to'liq qator)", _read_native, None),
+            ("XlsxReader (import ustunlari)", _read_native, columns),
+        ]
+        results = {}
+        baseline = None
+        for label, reader, selected in cases:
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = reader(path, selected)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = rows
+            baseline = baseline or best
+            self.stdout.write(
+                f"  {label:32s} {best:7.2f} s  {len(rows) / best:9.0f} qator/s  x{baseline / best:.1f}"
+            )
+
+        expected = results["openpyxl (to'liq qator)"]
+        full_mismatch = sum(
+            _trim(a) != _trim(b) for a, b in zip(expected, results["XlsxReader (to'liq qator)"])
+        )
+        projected = [tuple(row[i] if i < len(row) else None for i in columns) for row in expected]
+        projected_mismatch = sum(a != b for a, b in zip(projected, results["XlsxReader (import ustunlari)"]))
+        if len(expected) != len(results["XlsxReader (to'liq qator)"]) or full_mismatch or projected_mismatch:
+            self.stderr.write(self.style.ERROR(
+                f"Natijalar farq qiladi: {full_mismatch} / {projected_mismatch} ta qator"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Natijalar openpyxl bilan bir xil ({len(expected)} qator)"))
@@ -0,0 +1,115 @@
+"""
+Word shablonlarini normallashtiradi va placeholder manifestini yozadi.
+
+Ishlatish:
+    python manage.py compile_templates
+    python manage.py compile_templates --check
+
+Word tahrirlashda ``{{kalit}}`` tokenini bir necha run'ga bo'lib yuboradi
+("{{", "shnq_name", "}}"). Buyruq har bir tokenni u boshlangan run formatlashi
+bilan bitta run'ga yig'adi, shablonni qayta yozadi va contract_templates/
+placeholders.json'ga har bir kalit qayerda turgani va qalin chiqishini yozadi.
+Render shu manifest bo'yicha faqat tegishli run'larni to'ldiradi.
+
+--check — hech narsa yozmaydi; shablon normallashtirilmagan yoki manifest
+eskirgan bo'lsa xato bilan tugaydi (CI uchun).
+"""
+
+import hashlib
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_main.documents import BOLD_PLACEHOLDERS, DOCUMENT_TYPES, RenderContext, build_placeholders
+from app_main.docx_templates import MANIFEST_NAME, TEMPLATES_DIR, CompiledTemplate, load_manifest
+from app_main.models import DocumentCalculation, OrganizationSettings
+
+
+def _supplied_keys() -> set[str]:
+    """Kod beradigan placeholder kalitlari (bo'sh hujjat uchun build_placeholders)."""
+    return set(build_placeholders(DocumentCalculation(), RenderContext(OrganizationSettings(), {})))
+
+
+def _format_manifest(manifest: dict) -> str:
+    """Manifest JSON'i: har bir placeholder bitta qatorda (diff'lar o'qilishi uchun)."""
+    lines = ["{"]
+    for ti, (name, entry) in enumerate(manifest.items()):
+        lines.append(f"  {json.dumps(name, ensure_ascii=False)}: {{")
+        lines.append(f'    "sha256": {json.dumps(entry["sha256"])},')
+        lines.append('    "placeholders": [')
+        items = entry["placeholders"]
+        for pi, item in enumerate(items):
+            comma = "," if pi < len(items) - 1 else ""
+            lines.append(f"      {json.dumps(item, ensure_ascii=False)}{comma}")
+        lines.append("    ]")
+        lines.append("  }," if ti < len(manifest) - 1 else "  }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+class Command(BaseCommand):
+    help = "Shablonlardagi bo'lingan {{placeholder}} run'larini birlashtiradi va manifest yozadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Faqat tekshiradi: normallashtirish yoki manifestni yangilash kerak bo'lsa xato",
+        )
+
+    def handle(self, *args, **options):
+        check = options["check"]
+        supplied = _supplied_keys()
+        old_manifest = load_manifest()
+        manifest = {}
+        stale = []
+
+        for doc_type in DOCUMENT_TYPES.values():
+            path = doc_type.template_path
+            if not os.path.exists(path):
+                raise CommandError(f"Shablon fayl topilmadi: {doc_type.template_name}")
+
+            compiled = CompiledTemplate(path)
+            try:
+                changed = compiled.normalize()
+            except ValueError as exc:
+                raise CommandError(f"{doc_type.template_name}: {exc}") from exc
+
+            sha256 = compiled.sha256
+            if changed:
+                stale.append(doc_type.template_name)
+                data = compiled.to_bytes()
+                sha256 = hashlib.sha256(data).hexdigest()
+                if not check:
+                    with open(path, "wb") as fh:
+                        fh.write(data)
+
+            entries = compiled.manifest_entries(BOLD_PLACEHOLDERS)
+            if not compiled.is_normalized():
+                raise CommandError(f"{doc_type.template_name}: ba'zi placeholder'lar alohida run'ga ajratilmadi")
+            manifest[doc_type.template_name] = {"sha256": sha256, "placeholders": entries}
+
+            keys = {entry["key"] for entry in entries}
+            bold = sum(entry["bold"] for entry in entries)
+            self.stdout.write(
+                f"{doc_type.template_name}: {len(entries)} ta placeholder ({len(keys)} ta kalit, "
+                f"{bold} ta qalin), {changed} ta paragraf normallashtirildi"
+            )
+            for key in sorted(keys - supplied):
+                self.stderr.write(self.style.WARNING(
+                    f"  {doc_type.template_name}: {{{{{key}}}}} uchun kod qiymat bermaydi"
+                ))
+
+        if manifest != old_manifest:
+            stale.append(MANIFEST_NAME)
+
+        if check:
+            if stale:
+                raise CommandError(f"Eskirgan: {', '.join(stale)} — `manage.py compile_templates` ishga tushiring")
+            self.stdout.write(self.style.SUCCESS("Shablonlar va manifest dolzarb."))
+            return
+
+        with open(os.path.join(TEMPLATES_DIR, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+            fh.write(_format_manifest(manifest))
+        self.stdout.write(self.style.SUCCESS(f"Manifest yozildi: {MANIFEST_NAME}"))
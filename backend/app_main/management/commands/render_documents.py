@@ -0,0 +1,255 @@
+"""
+Hujjatlarni oflayn (web worker'lardan tashqarida) oldindan render qilib papkaga yozish.
+
+Ishlatish:
+    python manage.py render_documents --out /data/hujjatlar
+    python manage.py render_documents --template kalkul,shartnoma --out DIR --jobs 4
+    python manage.py render_documents --out DIR --document-category new --normative-type shnq,mqn
+    python manage.py render_documents --out DIR --category "1. Bob. Umumiy qoidalar"
+    python manage.py render_documents --out DIR --id-from 100 --id-to 200 --force
+
+Fayllar DIR/<hujjat turi>/<prefiks>_<id>.docx ko'rinishida yoziladi. Render
+DocumentContractAPIView bilan bir xil kod (render_document) orqali bajariladi.
+
+Har bir tur papkasida .manifest.json — fayl nomi → render kirishlari xeshi
+(hujjatlar keshi kaliti: yozuv maydonlari, sozlamalar, koeffitsient, shablon
+xeshi). Kalit o'zgarmagan va fayl mavjud bo'lsa hujjat qayta render qilinmaydi.
+"""
+
+import copy
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app_main.documents import DOCUMENT_TYPES, RenderContext, render_document
+from app_main.models import DocumentCalculation, DocumentCalculationCategory
+
+MANIFEST_NAME = ".manifest.json"
+
+
+def _resolve_types(value: str | None) -> list:
+    """--template qiymati → DocumentType ro'yxati.
+
+    Tur kaliti (kalkulatsiya), fayl prefiksi (TZ) yoki shablon nomi (Kalkul,
+    Kalkul.docx) qabul qilinadi, katta-kichik harf farqsiz.
+    """
+    if not value:
+        return list(DOCUMENT_TYPES.values())
+    aliases = {}
+    for doc_type in DOCUMENT_TYPES.values():
+        stem = os.path.splitext(doc_type.template_name)[0]
+        for alias in (doc_type.key, doc_type.file_prefix, stem, doc_type.template_name):
+            aliases[alias.lower()] = doc_type
+    types = []
+    for name in value.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in aliases:
+            raise CommandError(f"Noma'lum shablon: {name} (mavjud: {', '.join(DOCUMENT_TYPES)})")
+        if aliases[name] not in types:
+            types.append(aliases[name])
+    return types
+
+
+def _split_choices(value: str | None, choices, option: str) -> list[str]:
+    if not value:
+        return []
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    valid = {choice for choice, _ in choices}
+    unknown = [item for item in items if item not in valid]
+    if unknown:
+        raise CommandError(f"{option}: noma'lum qiymat {', '.join(unknown)} (mavjud: {', '.join(sorted(valid))})")
+    return items
+
+
+def _render_to_file(task):
+    """Bitta hujjatni render qilib faylga (atomar) yozadi: (fayl nomi, soniya, xato)."""
+    type_key, doc, context, path = task
+    started = time.perf_counter()
+    try:
+        data = render_document(DOCUMENT_TYPES[type_key], doc, context)
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        return os.path.basename(path), time.perf_counter() - started, str(exc) or exc.__class__.__name__
+    return os.path.basename(path), time.perf_counter() - started, None
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Eng yaqin rang (nearest-rank) bo'yicha persentil; ro'yxat bo'sh bo'lmasligi kerak."""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values) / 100) - 1))
+    return sorted_values[index]
+
+
+def _load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+class Command(BaseCommand):
+    help = "Hujjatlarni oflayn render qilib papkaga yozadi (faqat o'zgarganlari)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", required=True, help="Natija papkasi")
+        parser.add_argument(
+            "--template",
+            help=f"Vergul bilan ajratilgan hujjat turlari (standart — barchasi: {', '.join(DOCUMENT_TYPES)})",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=0,
+            help="Parallel render jarayonlari soni (0 — DOCUMENT_RENDER_WORKERS yoki CPU soni)",
+        )
+        parser.add_argument(
+            "--category",
+            action="append",
+            help="Hisob kategoriyasi nomi bo'yicha filtr (bir nechta bo'lsa — takrorlanadi)",
+        )
+        parser.add_argument("--document-category", help="document_category bo'yicha filtr (vergul bilan)")
+        parser.add_argument("--normative-type", help="normative_type bo'yicha filtr (vergul bilan)")
+        parser.add_argument("--id-from", type=int, help="Shu id'dan boshlab (shu jumladan)")
+        parser.add_argument("--id-to", type=int, help="Shu id'gacha (shu jumladan)")
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Dolzarb fayllarni ham qayta render qiladi",
+        )
+
+    def handle(self, *args, **options):
+        types = _resolve_types(options["template"])
+        queryset = DocumentCalculation.objects.all().order_by("id")
+        if options["category"]:
+            # Nomlarda vergul bo'lishi mumkin — shuning uchun ajratilmaydi, opsiya takrorlanadi
+            names = [name.strip() for name in options["category"]]
+            unknown = set(names) - set(
+                DocumentCalculationCategory.objects.filter(name__in=names).values_list("name", flat=True)
+            )
+            if unknown:
+                raise CommandError(f"--category: kategoriya topilmadi: {', '.join(sorted(unknown))}")
+            queryset = queryset.filter(calculation_category__name__in=names)
+        document_categories = _split_choices(
+            options["document_category"], DocumentCalculation.DocumentCategory.choices, "--document-category"
+        )
+        if document_categories:
+            queryset = queryset.filter(document_category__in=document_categories)
+        normative_types = _split_choices(
+            options["normative_type"],
+            DocumentCalculation._meta.get_field("normative_type").choices,
+            "--normative-type",
+        )
+        if normative_types:
+            queryset = queryset.filter(normative_type__in=normative_types)
+        if options["id_from"] is not None:
+            queryset = queryset.filter(id__gte=options["id_from"])
+        if options["id_to"] is not None:
+            queryset = queryset.filter(id__lte=options["id_to"])
+
+        docs = list(queryset)
+        context = RenderContext.load()
+        jobs = options["jobs"] or settings.DOCUMENT_RENDER_WORKERS or os.cpu_count() or 1
+        self.stdout.write(f"{len(docs)} ta yozuv, {len(types)} ta hujjat turi, {jobs} ta jarayon")
+
+        all_times = []
+        total_rendered = total_skipped = total_failed = 0
+        started = time.perf_counter()
+        for doc_type in types:
+            if not os.path.exists(doc_type.template_path):
+                raise CommandError(f"Shablon fayl topilmadi: {doc_type.template_name}")
+            rendered, skipped, failed, times = self._render_type(doc_type, docs, context, options, jobs)
+            total_rendered += rendered
+            total_skipped += skipped
+            total_failed += failed
+            all_times.extend(times)
+        elapsed = time.perf_counter() - started
+
+        summary = (
+            f"Jami: {total_rendered} ta render, {total_skipped} ta dolzarb, {total_failed} ta xato, "
+            f"{elapsed:.1f} s{self._throughput(total_rendered, elapsed, all_times)}"
+        )
+        if total_failed:
+            self.stderr.write(self.style.ERROR(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    def _render_type(self, doc_type, docs, context, options, jobs):
+        out_dir = os.path.join(options["out"], doc_type.key)
+        os.makedirs(out_dir, exist_ok=True)
+        manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+        manifest = _load_manifest(manifest_path)
+
+        # Kalitlar render'dan oldin olinadi (render doc'ni joyida o'zgartiradi)
+        keys = doc_type.cache_keys(docs, context)
+        tasks = []
+        task_keys = {}
+        for doc, key in zip(docs, keys):
+            filename = doc_type.filename(doc)
+            path = os.path.join(out_dir, filename)
+            if not options["force"] and manifest.get(filename) == key and os.path.exists(path):
+                continue
+            # nusxa: jarayonning o'zida render qilinganda doc keyingi turlar uchun o'zgarmasin
+            tasks.append((doc_type.key, copy.copy(doc), context, path))
+            task_keys[filename] = key
+        skipped = len(docs) - len(tasks)
+
+        started = time.perf_counter()
+        times = []
+        failed = 0
+        workers = max(1, min(jobs, len(tasks)))
+        if workers == 1:
+            results = map(_render_to_file, tasks)
+            pool = None
+        else:
+            # fork: worker'lar ota jarayonda o'qilgan shablon keshini meros qiladi
+            mp_context = (
+                multiprocessing.get_context("fork")
+                if "fork" in multiprocessing.get_all_start_methods()
+                else None
+            )
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+            results = pool.map(_render_to_file, tasks, chunksize=4)
+        try:
+            for filename, seconds, error in results:
+                if error is not None:
+                    failed += 1
+                    manifest.pop(filename, None)
+                    self.stderr.write(self.style.ERROR(f"  {doc_type.key}/{filename}: {error}"))
+                    continue
+                times.append(seconds)
+                manifest[filename] = task_keys[filename]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            # Qisman bajarilgan ish ham saqlanadi — keyingi ishga tushirishda davom etadi
+            with open(f"{manifest_path}.part", "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh, ensure_ascii=False, indent=0, sort_keys=True)
+            os.replace(f"{manifest_path}.part", manifest_path)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{doc_type.key}: {len(times)} ta render, {skipped} ta dolzarb, {failed} ta xato, "
+            f"{elapsed:.1f} s{self._throughput(len(times), elapsed, times)}"
+        )
+        return len(times), skipped, failed, times
+
+    @staticmethod
+    def _throughput(count: int, elapsed: float, times: list[float]) -> str:
+        if not times:
+            return ""
+        ordered = sorted(times)
+        return (
+            f", {count / elapsed if elapsed else 0:.1f} hujjat/s, "
+            f"p50 {_percentile(ordered, 50) * 1000:.0f} ms, p95 {_percentile(ordered, 95) * 1000:.0f} ms"
+        )
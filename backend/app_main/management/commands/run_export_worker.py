@@ -0,0 +1,149 @@
+"""
+Fon vazifalarini bajaruvchi worker: bulk eksportlar (BulkExportJob),
+XLSX importlar (XlsxImportJob) va Sheets sinxronizatsiyasi (SheetSyncJob).
+
+Ishlatish:
+    python manage.py run_export_worker
+    python manage.py run_export_worker --once
+    python manage.py run_export_worker --poll-interval 10
+    python manage.py run_export_worker --queue imports --queue syncs
+
+--queue berilmasa worker barcha navbatlarni ketma-ket bajaradi. Uzoq
+eksport import va sinxronizatsiyalarni ushlab turmasligi uchun har bir
+navbatga alohida worker (docker-compose'dagi alohida servis) ajratiladi.
+
+Bir nechta worker ishga tushirilishi mumkin — bir vaqtda bajariladigan
+eksportlar soni baribir BULK_EXPORT_MAX_CONCURRENT bilan cheklanadi.
+Worker to'xtab qolgan import keyingi worker'da oxirgi checkpoint'dan davom etadi.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app_main.exports import claim_next_job, expire_old_exports, requeue_stale_jobs, run_export_job
+from app_main.models import BulkExportJob, SheetSyncJob, XlsxImportJob
+from app_main.sheets_sync import claim_next_sync_job, fail_stale_sync_jobs, run_sync_job
+from app_main.xlsx_import import claim_next_import_job, requeue_stale_import_jobs, run_import_job
+
+QUEUES = ("exports", "imports", "syncs")
+
+
+class Command(BaseCommand):
+    help = (
+        "Navbatdagi bulk ZIP eksport, XLSX import va Sheets sinxronizatsiya vazifalarini fonda bajaradi, "
+        "eski arxivlarni o'chiradi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Navbat bo'shagach to'xtaydi (cron uchun)",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Navbat bo'sh bo'lganda tekshirish oralig'i (soniya)",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            choices=QUEUES,
+            help="Faqat shu navbatni bajaradi (bir necha marta berish mumkin). Standart: barchasi",
+        )
+
+    def handle(self, *args, **options):
+        once = options["once"]
+        poll_interval = options["poll_interval"]
+
+        queues = [queue for queue in QUEUES if queue in (options["queue"] or QUEUES)]
+
+        self.stdout.write(f"Fon vazifalari worker'i ishga tushdi: {', '.join(queues)}.")
+        while True:
+            close_old_connections()
+            self._maintain(queues)
+
+            if "exports" in queues:
+                job = claim_next_job()
+                if job is not None:
+                    self._run_export(job)
+                    continue
+            if "imports" in queues:
+                import_job = claim_next_import_job()
+                if import_job is not None:
+                    self._run_import(import_job)
+                    continue
+            if "syncs" in queues:
+                sync_job = claim_next_sync_job()
+                if sync_job is not None:
+                    self._run_sync(sync_job)
+                    continue
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    def _maintain(self, queues):
+        # Har bir worker faqat o'zi bajaradigan navbatni tozalaydi
+        if "exports" in queues:
+            expired = expire_old_exports()
+            if expired:
+                self.stdout.write(f"Muddati o'tgan arxivlar o'chirildi: {expired} ta")
+        requeued = 0
+        if "exports" in queues:
+            requeued += requeue_stale_jobs()
+        if "imports" in queues:
+            requeued += requeue_stale_import_jobs()
+        if requeued:
+            self.stdout.write(f"To'xtab qolgan vazifalar qayta navbatga qo'yildi: {requeued} ta")
+        if "syncs" in queues:
+            stale_syncs = fail_stale_sync_jobs()
+            if stale_syncs:
+                self.stdout.write(f"To'xtab qolgan sinxronizatsiyalar bekor qilindi: {stale_syncs} ta")
+
+    def _run_export(self, job):
+        self.stdout.write(f"Eksport #{job.id} ({job.document_type}) boshlandi...")
+        started = time.monotonic()
+        run_export_job(job)
+        job.refresh_from_db()
+        elapsed = time.monotonic() - started
+        if job.status == BulkExportJob.Status.DONE:
+            self.stdout.write(self.style.SUCCESS(
+                f"Eksport #{job.id} tayyor: {job.total} ta hujjat, {elapsed:.1f} s"
+            ))
+        else:
+            self.stderr.write(self.style.ERROR(f"Eksport #{job.id} xatolik bilan tugadi: {job.error}"))
+
+    def _run_import(self, job):
+        mode = "tekshiruv" if job.dry_run else "import"
+        self.stdout.write(f"XLSX {mode} #{job.id} ({job.original_name}) boshlandi...")
+        started = time.monotonic()
+        run_import_job(job)
+        job.refresh_from_db()
+        elapsed = time.monotonic() - started
+        if job.status == XlsxImportJob.Status.DONE:
+            self.stdout.write(self.style.SUCCESS(
+                f"XLSX {mode} #{job.id} tayyor: {job.created_count} ta yangi, "
+                f"{job.updated_count} ta yangilangan, {job.unchanged_count} ta o'zgarmagan, "
+                f"{job.error_count} ta xato, {elapsed:.1f} s"
+            ))
+        else:
+            self.stderr.write(self.style.ERROR(f"XLSX {mode} #{job.id} xatolik bilan tugadi: {job.error}"))
+
+    def _run_sync(self, job):
+        self.stdout.write(f"Sheets sinxronizatsiyasi #{job.id} boshlandi...")
+        started = time.monotonic()
+        run_sync_job(job)
+        job.refresh_from_db()
+        elapsed = time.monotonic() - started
+        if job.status != SheetSyncJob.Status.DONE:
+            self.stderr.write(self.style.ERROR(f"Sheets sinxronizatsiyasi #{job.id} xatolik bilan tugadi: {job.error}"))
+        elif job.skipped:
+            self.stdout.write(f"Sheets sinxronizatsiyasi #{job.id}: manba o'zgarmagan, {elapsed:.1f} s")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Sheets sinxronizatsiyasi #{job.id} tayyor: {job.created_count} ta yangi, "
+                f"{job.updated_count} ta yangilangan, {job.deleted_count} ta o'chirilgan, {elapsed:.1f} s"
+            ))
@@ -1,31 +1,59 @@
 """
-Google Sheets dan ma'lumotlarni bazaga yuklash.
+Google Sheets (yoki eksport qilingan fayl) dan ma'lumotlarni bazaga yuklash.
 
 Ishlatish:
     python manage.py sync_from_sheets
     python manage.py sync_from_sheets --dry-run
     python manage.py sync_from_sheets --credentials /path/to/key.json
+    python manage.py sync_from_sheets --spreadsheet <id> --gid <gid>
+    python manage.py sync_from_sheets --file ../baza.xlsx
+    python manage.py sync_from_sheets --file eksport.csv
+    python manage.py sync_from_sheets --force
+    python manage.py sync_from_sheets --file ../baza.xlsx --reload
+    python manage.py sync_from_sheets --rollback
+
+Manba (app_main.sheet_sources): Google Sheets yoki --file bilan lokal .xlsx /
+.csv. Hammasi Sheets jadvali ko'rinishidagi qatorlarni oqim bilan beradi va bir
+xil _parse_rows → _save_to_db yo'lidan o'tadi — Sheets'ga ulanmasdan takrorlanadigan
+sinxronizatsiya va o'lchov uchun. .xlsx fayl XLSX import formatida ham (birinchi
+qatorda category, name, ... sarlavhalari — masalan loyihadagi baza.xlsx) bo'lishi
+mumkin; unda qatorlar XLSX import bilan bir xil qoidalar (RowBuilder) bo'yicha o'qiladi.
+
+Baza o'chirib qayta yaratilmaydi: yozuvlar mavjud qatorlar bilan solishtirilib
+faqat yangi, o'zgargan va o'chirilgan qatorlar bitta tranzaksiyada yoziladi
+(app_main.sheets_sync). --dry-run rejalashtirilgan o'zgarishlar sonini ko'rsatadi.
+
+Manba o'zgarmagan bo'lsa hech narsa yozilmaydi (SheetSyncSnapshot): manba versiyasi
+(Sheets — Drive modifiedTime, fayl — mtime va hajm) oxirgi sinxronizatsiyadagidek
+bo'lsa jadval o'qilmaydi ham; versiya o'zgargan (yoki olinmagan) bo'lsa tarkib
+xeshi (fayl baytlari yoki o'qilgan qiymatlar) solishtiriladi. Baza o'shandan beri
+qo'lda o'zgartirilgan bo'lsa sinxronizatsiya baribir bajariladi. --force — har doim
+to'liq sinxronlash.
+
+--reload — to'liq qayta yuklash: yozuvlar avval yangi ma'lumotlar avlodiga
+(DatasetGeneration) yoziladi, keyin bitta qisqa tranzaksiyada jadvalga qo'llanadi
+(qatorlar id'si saqlanadi); hisobot, dashboard va hujjat so'rovlari yarim yuklangan
+jadvalni ko'rmaydi. Almashtirilgan holat saqlanadi — --rollback uni qaytaradi.
 """
 
-import os
+import time
 from decimal import Decimal, InvalidOperation
 
-import gspread
-from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.core.management.color import no_style
-from django.db import connection
-from google.oauth2.service_account import Credentials
-
-from app_main.models import DocumentCalculation, DocumentCalculationCategory
-
-SPREADSHEET_ID = "1-Ctzg2RPBiSUM-d7Ps74QSNW5mKcG79ZlOrOwdSv9Fg"
-SHEET_GID = 1494376803
-
-SCOPES = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-]
+from django.db import transaction
+
+from app_main.models import DocumentCalculation
+from app_main.sheet_sources import (
+    SHEET_COLUMNS,
+    SHEET_GID,
+    SPREADSHEET_ID,
+    GoogleSheetSource,
+    SheetSourceError,
+    find_credentials,
+    source_for_path,
+)
+from app_main.sheets_sync import ContentHasher, Snapshot, reload_records, rollback_generation, sync_records
+from app_main.xlsx_import import RowBuilder, XlsxImportError, XlsxSheet
 
 # Холати (document_category) mapping
 STATUS_MAP = {
@@ -97,7 +125,10 @@ def _is_data_row(row):
 
 
 class Command(BaseCommand):
-    help = "Google Sheets dan hujjatlarni bazaga yuklaydi (eski ma'lumotlar o'chiriladi)"
+    help = "Google Sheets (yoki .xlsx/.csv eksport) dan hujjatlarni bazaga sinxronlaydi (faqat farqlar yoziladi)"
+
+    # Fon vazifasi (sheets_sync.run_sync_job) bosqich o'zgarishini kuzatadi: on_phase("read" | "write")
+    on_phase = None
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -105,68 +136,78 @@ class Command(BaseCommand):
             default=None,
             help="Service account JSON fayl yo'li",
         )
+        parser.add_argument(
+            "--spreadsheet",
+            default=SPREADSHEET_ID,
+            help="Google Sheets jadvali ID'si",
+        )
+        parser.add_argument(
+            "--gid",
+            type=int,
+            default=SHEET_GID,
+            help="Varaq gid'i (topilmasa birinchi varaq)",
+        )
         parser.add_argument(
             "--dry-run",
             action="store_true",
             help="Faqat parsing qilib ko'rsatadi, bazaga yozmayd",
         )
+        parser.add_argument(
+            "--file",
+            default=None,
+            help="Google Sheets o'rniga .xlsx yoki .csv fayldan o'qish (masalan baza.xlsx)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Manba o'zgarmagan bo'lsa ham to'liq sinxronlash",
+        )
+        parser.add_argument(
+            "--reload",
+            action="store_true",
+            help="Yangi avlodga to'liq yuklash, atomar qo'llash va oldingi holatni rollback uchun saqlash",
+        )
+        parser.add_argument(
+            "--rollback",
+            action="store_true",
+            help="Oldingi ma'lumotlar avlodini qayta faollashtirish (manba o'qilmaydi)",
+        )
 
     def handle(self, *args, **options):
-        credentials_path = options["credentials"]
-        if not credentials_path:
-            candidates = [
-                # Docker container: /app/credentials.json
-                "/app/credentials.json",
-                # Local dev: loyiha ildizi (backend/../)
-                os.path.join(settings.BASE_DIR.parent, "adreska-246ee-e5b2502b05d5.json"),
-                # manage.py yonida
-                os.path.join(settings.BASE_DIR, "adreska-246ee-e5b2502b05d5.json"),
-            ]
-            for candidate in candidates:
-                if os.path.exists(candidate):
-                    credentials_path = candidate
-                    break
-
-        if not credentials_path or not os.path.exists(str(credentials_path)):
-            self.stderr.write(self.style.ERROR(
-                "Credentials fayl topilmadi. --credentials flag bilan yo'l bering."
-            ))
+        # Natija (fon vazifasi o'qiydi): sonlar, o'qilgan qatorlar, bosqichlar vaqti;
+        # sinxronizatsiya bo'lmasa None va self.error — sababi
+        self.result = None
+        self.error = None
+        self.fetched_rows = None
+        self.timings = {}
+        # dry-run snapshot'ni o'qimaydi va saqlamaydi — har doim to'liq solishtiradi
+        self.snapshot = None
+        self.revision = ""
+        self.content_hash = ""
+        self.source_key = ""
+
+        if options["rollback"]:
+            self._rollback()
             return
 
-        self.stdout.write(f"Credentials: {credentials_path}")
-
-        try:
-            creds = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
-            gc = gspread.authorize(creds)
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Google autentifikatsiya xatosi: {e}"))
+        source = self._source(options)
+        if source is None:
             return
-
-        self.stdout.write("Google Sheets ga ulanmoqda...")
+        self._phase("read")
+        started = time.perf_counter()
         try:
-            spreadsheet = gc.open_by_key(SPREADSHEET_ID)
-            worksheet = None
-            for ws in spreadsheet.worksheets():
-                if ws.id == SHEET_GID:
-                    worksheet = ws
-                    break
-            if worksheet is None:
-                worksheet = spreadsheet.worksheets()[0]
-            self.stdout.write(f"Sheet: '{worksheet.title}'")
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Spreadsheet ochishda xato: {e}"))
+            with source:
+                records = self._read_source(source, options)
+        except (SheetSourceError, XlsxImportError) as e:
+            self._fail(str(e))
             return
-
-        self.stdout.write("Ma'lumotlar yuklanmoqda...")
-        try:
-            all_values = worksheet.get_all_values()
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Ma'lumot o'qishda xato: {e}"))
+        finally:
+            self.timings["read"] = round(time.perf_counter() - started, 3)
+        # None — manba o'zgarmagan (self.result allaqachon to'ldirilgan)
+        if records is None:
+            self._complete_result(self.result["unchanged"])
             return
-
-        self.stdout.write(f"Jami {len(all_values)} qator o'qildi.")
-        records = self._parse_rows(all_values)
-        self.stdout.write(f"Hujjat qatorlari aniqlandi: {len(records)}")
+        self.stdout.write(f"Hujjat qatorlari aniqlandi: {len(records)} ({self.timings['read']:.2f} s)")
 
         if options["dry_run"]:
             self.stdout.write("DRY RUN - bazaga yozilmaydi.")
@@ -178,16 +219,128 @@ class Command(BaseCommand):
                     f"{rec['name'][:50]}"
                 )
             self.stdout.write(f"  ... (hammasi {len(records)} ta)")
+            self.stdout.write(f"Rejalashtirilgan o'zgarishlar: {self._format_result(sync_records(records, dry_run=True))}")
+            return
+
+        self._phase("write")
+        self.result = self._save_to_db(records, reload=options["reload"])
+        if self.result is not None:
+            self._complete_result(len(records))
+
+    def _rollback(self):
+        generation = rollback_generation()
+        if generation is None:
+            self._fail("Rollback uchun oldingi ma'lumotlar avlodi yo'q.")
             return
+        self.stdout.write(self.style.SUCCESS(
+            f"Avlod #{generation.id} ({generation.record_count} ta yozuv) qayta faollashtirildi."
+        ))
 
-        self._save_to_db(records)
+    def _phase(self, phase):
+        if self.on_phase is not None:
+            self.on_phase(phase)
+
+    def _fail(self, message):
+        self.error = message
+        self.stderr.write(self.style.ERROR(message))
+
+    def _complete_result(self, record_count):
+        self.result.update(fetched_rows=self.fetched_rows, records=record_count, timings=self.timings)
+
+    def _source(self, options):
+        if options["file"]:
+            return source_for_path(options["file"])
+        credentials_path = find_credentials(options["credentials"])
+        if not credentials_path:
+            self._fail("Credentials fayl topilmadi. --credentials flag bilan yo'l bering.")
+            return None
+        self.stdout.write(f"Credentials: {credentials_path}")
+        return GoogleSheetSource(credentials_path, options["spreadsheet"], options["gid"])
+
+    def _read_source(self, source, options):
+        """Manba → yozuvlar; manba va baza oxirgi sinxronizatsiyadagidek bo'lsa None."""
+        self.stdout.write(f"Manba: {source.label}")
+        self.source_key = source.key
+        if not options["dry_run"]:
+            # --reload — aniq so'ralgan to'liq yuklash, o'zgarmagan manba ham o'tkazib yuborilmaydi
+            self.snapshot = Snapshot(source.key, force=options["force"] or options["reload"])
+
+        self.revision = source.revision()
+        if not self.revision:
+            self.stdout.write("Manba versiyasi yo'q, tarkib xeshi solishtiriladi.")
+        elif self._skip_unchanged(revision=self.revision):
+            return None
+        # Fayl xeshi tahlildan oldin (arzon); Sheets'da qiymatlar o'qilayotganda hisoblanadi
+        self.content_hash = source.content_hash() if self.snapshot is not None else ""
+        if self.content_hash and self._skip_unchanged(content_hash=self.content_hash):
+            return None
+
+        if source.import_layout:
+            self.stdout.write("XLSX import formatidagi fayl.")
+            return self._parse_import_rows(source.path)
+        hasher = ContentHasher(source.rows())
+        records = self._parse_rows(hasher)
+        self.fetched_rows = hasher.row_count
+        self.stdout.write(f"Manbadan {hasher.row_count} qator o'qildi.")
+        if not self.content_hash:
+            self.content_hash = hasher.hexdigest()
+            if self._skip_unchanged(content_hash=self.content_hash):
+                return None
+        return records
+
+    def _skip_unchanged(self, revision="", content_hash=""):
+        """Manba va baza oxirgi sinxronizatsiyadagidek bo'lsa natijani to'ldirib True qaytaradi."""
+        if self.snapshot is None or not self.snapshot.unchanged(revision, content_hash):
+            return False
+        self.snapshot.touch(self.revision)
+        self.result = self.snapshot.skipped_result()
+        self.stdout.write(self.style.SUCCESS(
+            f"Manba o'zgarmagan — sinxronizatsiya o'tkazib yuborildi ({self.result['unchanged']} ta yozuv). "
+            "Majburan: --force"
+        ))
+        return True
+
+    def _parse_import_rows(self, path):
+        """XLSX import formatidagi fayl → yozuvlar (summalar RowBuilder hisoblaganicha)."""
+        records = []
+        self.fetched_rows = 0
+        with XlsxSheet(path) as sheet:
+            builder = RowBuilder(sheet)
+            for row_number, row in sheet.rows():
+                self.fetched_rows += 1
+                instance, error = builder.build(row_number, row)
+                if error is not None:
+                    self.stderr.write(f"  {row_number}-qator o'tkazib yuborildi: {error['message']}")
+                    continue
+                if instance is None:
+                    continue
+                category = instance.calculation_category
+                records.append({
+                    "name": instance.name,
+                    "designation": instance.designation,
+                    "category_name": category.name if category else None,
+                    "normative_type": instance.normative_type,
+                    "document_category": instance.document_category,
+                    "complexity_level": instance.complexity_level,
+                    "total_pages": instance.total_pages,
+                    "final_total_amount": instance.final_total_amount,
+                    "sheet_total_amount": Decimal("0.000"),
+                    "completed_amount": instance.completed_amount,
+                    "planned_amount": instance.planned_amount,
+                    "development_deadline": instance.development_deadline,
+                    "executor_organization": instance.executor_organization,
+                    "notes": instance.notes,
+                    "selected_base_coefficient": instance.selected_base_coefficient,
+                    "selected_complexity_coefficient": instance.selected_complexity_coefficient,
+                })
+        return records
 
     def _parse_rows(self, rows):
         records = []
         current_category_name = None
 
         for row in rows:
-            while len(row) < 14:
+            while len(row) < SHEET_COLUMNS:
                 row.append("")
 
             col_a = _str(row[0])
@@ -252,58 +405,39 @@ class Command(BaseCommand):
 
         return records
 
-    def _save_to_db(self, records):
-        self.stdout.write("Eski ma'lumotlar o'chirilmoqda...")
-        deleted_count, _ = DocumentCalculation.objects.all().delete()
-        self.stdout.write(f"  {deleted_count} ta yozuv o'chirildi.")
-
-        # ID (id) ketma-ketligini 1 dan boshlash — shartnoma raqami id/26 bo'lgani uchun
+    def _save_to_db(self, records, reload=False):
+        started = time.perf_counter()
         try:
-            reset_sql = connection.ops.sequence_reset_sql(no_style(), [DocumentCalculation])
-            with connection.cursor() as cursor:
-                for sql in reset_sql:
-                    cursor.execute(sql)
-            if reset_sql:
-                self.stdout.write("  ID ketma-ketligi 1 dan boshlanadi.")
-        except Exception as exc:  # noqa: BLE001
-            self.stderr.write(f"  ID ketma-ketligini tiklashda ogohlantirish: {exc}")
-
-        self.stdout.write("Yangi ma'lumotlar yozilmoqda...")
-        created = 0
-        errors = 0
-        category_cache = {}
-
-        for rec in records:
-            cat_name = rec.get("category_name")
-            category_obj = None
-            if cat_name:
-                if cat_name not in category_cache:
-                    category_obj, _ = DocumentCalculationCategory.objects.get_or_create(name=cat_name)
-                    category_cache[cat_name] = category_obj
-                else:
-                    category_obj = category_cache[cat_name]
-
-            try:
-                DocumentCalculation.objects.create(
-                    name=rec["name"],
-                    calculation_category=category_obj,
-                    normative_type=rec["normative_type"],
-                    document_category=rec["document_category"],
-                    complexity_level=rec["complexity_level"],
-                    total_pages=rec["total_pages"],
-                    final_total_amount=rec["final_total_amount"],
-                    sheet_total_amount=rec["sheet_total_amount"],
-                    completed_amount=rec["completed_amount"],
-                    planned_amount=rec["planned_amount"],
-                    development_deadline=rec["development_deadline"],
-                    executor_organization=rec["executor_organization"],
-                    notes=rec["notes"],
-                    selected_base_coefficient=Decimal("0.00"),
-                    selected_complexity_coefficient=Decimal("1.00"),
-                )
-                created += 1
-            except Exception as e:
-                errors += 1
-                self.stderr.write(f"  XATO [{rec['name'][:40]}]: {e}")
-
-        self.stdout.write(f"\nTayyor! Yaratildi: {created} ta, Xatolar: {errors} ta")
+            if reload:
+                self.stdout.write("Yangi ma'lumotlar avlodi yuklanmoqda...")
+                # Bo'laklar alohida commit qilinadi — tashqi tranzaksiyaga o'ralmaydi
+                result = reload_records(records, source=self.source_key)
+                if self.snapshot is not None:
+                    self.snapshot.save(self.revision, self.content_hash, len(records))
+            else:
+                self.stdout.write("Farqlar bazaga yozilmoqda (bitta tranzaksiyada)...")
+                with transaction.atomic():
+                    result = sync_records(records)
+                    if self.snapshot is not None:
+                        self.snapshot.save(self.revision, self.content_hash, len(records))
+        except Exception as e:
+            # Tranzaksiya bekor qilindi — baza sinxronizatsiyadan oldingi holatida
+            self._fail(f"Bazaga yozishda xato, o'zgarishlar bekor qilindi: {e}")
+            return None
+        finally:
+            self.timings["write"] = round(time.perf_counter() - started, 3)
+        self.stdout.write(self.style.SUCCESS(
+            f"\nTayyor! {self._format_result(result)} ({self.timings['write']:.2f} s)"
+        ))
+        if reload:
+            self.stdout.write(
+                f"Avlod #{result['generation']} faollashtirildi; oldingisi saqlandi (qaytarish: --rollback)."
+            )
+        return result
+
+    @staticmethod
+    def _format_result(result):
+        return (
+            f"Yaratildi: {result['created']} ta, Yangilandi: {result['updated']} ta, "
+            f"O'zgarmadi: {result['unchanged']} ta, O'chirildi: {result['deleted']} ta"
+        )
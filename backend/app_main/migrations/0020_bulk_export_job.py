@@ -0,0 +1,72 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0019_documentcalculation_sheet_total_amount"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkExportJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "document_type",
+                    models.CharField(
+                        choices=[
+                            ("shartnoma", "Shartnoma"),
+                            ("kalendar_reja", "Kalendar reja"),
+                            ("texnik_topshiriq", "Texnik topshiriq"),
+                            ("bayonnoma", "Bayonnoma"),
+                            ("kalkulatsiya", "Kalkulatsiya"),
+                        ],
+                        max_length=32,
+                        verbose_name="Hujjat turi",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Navbatda"),
+                            ("running", "Bajarilmoqda"),
+                            ("done", "Tayyor"),
+                            ("failed", "Xatolik"),
+                            ("expired", "Muddati o'tgan"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=16,
+                        verbose_name="Holati",
+                    ),
+                ),
+                ("slot", models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Worker sloti")),
+                ("total", models.PositiveIntegerField(default=0, verbose_name="Jami hujjatlar")),
+                ("done", models.PositiveIntegerField(default=0, verbose_name="Tayyor hujjatlar")),
+                ("archive", models.FileField(blank=True, default="", upload_to="exports/", verbose_name="Arxiv")),
+                ("error", models.TextField(blank=True, default="", verbose_name="Xatolik matni")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Boshlangan vaqti")),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi faollik")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Tugagan vaqti")),
+                (
+                    "expires_at",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Arxiv amal qilish muddati"),
+                ),
+            ],
+            options={
+                "verbose_name": "Bulk eksport vazifasi",
+                "verbose_name_plural": "Bulk eksport vazifalari",
+                "ordering": ["-id"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "running")),
+                        fields=("slot",),
+                        name="bulk_export_running_slot_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0020_bulk_export_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="XlsxImportJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("file", models.FileField(blank=True, default="", upload_to="imports/", verbose_name="XLSX fayl")),
+                ("original_name", models.CharField(blank=True, default="", max_length=255, verbose_name="Fayl nomi")),
+                ("dry_run", models.BooleanField(default=False, verbose_name="Faqat tekshirish (yozmasdan)")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Navbatda"),
+                            ("running", "Bajarilmoqda"),
+                            ("done", "Tayyor"),
+                            ("failed", "Xatolik"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=16,
+                        verbose_name="Holati",
+                    ),
+                ),
+                (
+                    "phase",
+                    models.CharField(
+                        choices=[("validate", "Tekshiruv"), ("write", "Yozish")],
+                        default="validate",
+                        max_length=16,
+                        verbose_name="Bosqich",
+                    ),
+                ),
+                ("total_rows", models.PositiveIntegerField(blank=True, null=True, verbose_name="Jami qatorlar")),
+                (
+                    "processed_rows",
+                    models.PositiveIntegerField(default=0, verbose_name="Joriy bosqichda o'qilgan qatorlar"),
+                ),
+                ("checkpoint_row", models.PositiveIntegerField(default=0, verbose_name="Nazorat nuqtasi (qator)")),
+                ("valid_count", models.PositiveIntegerField(default=0, verbose_name="To'g'ri qatorlar")),
+                ("created_count", models.PositiveIntegerField(default=0, verbose_name="Yaratilgan yozuvlar")),
+                ("error_count", models.PositiveIntegerField(default=0, verbose_name="Xatolar soni")),
+                ("errors", models.JSONField(blank=True, default=list, verbose_name="Tekshiruv xatolari")),
+                ("error", models.TextField(blank=True, default="", verbose_name="Xatolik matni")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Boshlangan vaqti")),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi faollik")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Tugagan vaqti")),
+            ],
+            options={
+                "verbose_name": "XLSX import vazifasi",
+                "verbose_name_plural": "XLSX import vazifalari",
+                "ordering": ["-id"],
+            },
+        ),
+    ]
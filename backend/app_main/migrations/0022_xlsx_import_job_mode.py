@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0021_xlsx_import_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="xlsximportjob",
+            name="mode",
+            field=models.CharField(
+                choices=[("append", "Qo'shish"), ("upsert", "Qo'shish yoki yangilash")],
+                default="append",
+                max_length=16,
+                verbose_name="Rejim",
+            ),
+        ),
+        migrations.AddField(
+            model_name="xlsximportjob",
+            name="updated_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Yangilangan yozuvlar"),
+        ),
+        migrations.AddField(
+            model_name="xlsximportjob",
+            name="unchanged_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="O'zgarmagan yozuvlar"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0022_xlsx_import_job_mode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetSyncSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source", models.CharField(max_length=255, unique=True, verbose_name="Manba")),
+                (
+                    "revision",
+                    models.CharField(blank=True, default="", max_length=255, verbose_name="Manba versiyasi"),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(blank=True, default="", max_length=64, verbose_name="Ma'lumotlar xeshi"),
+                ),
+                (
+                    "database_state",
+                    models.CharField(blank=True, default="", max_length=64, verbose_name="Baza holati"),
+                ),
+                ("record_count", models.PositiveIntegerField(default=0, verbose_name="Yozuvlar soni")),
+                ("synced_at", models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi sinxronizatsiya")),
+                ("checked_at", models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi tekshiruv")),
+            ],
+            options={
+                "verbose_name": "Sheets sinxronizatsiya holati",
+                "verbose_name_plural": "Sheets sinxronizatsiya holatlari",
+            },
+        ),
+    ]
@@ -0,0 +1,79 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0023_sheet_sync_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SheetSyncJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source", models.CharField(max_length=255, verbose_name="Manba")),
+                ("force", models.BooleanField(default=False, verbose_name="Majburiy (o'zgarmagan bo'lsa ham)")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Navbatda"),
+                            ("running", "Bajarilmoqda"),
+                            ("done", "Tayyor"),
+                            ("failed", "Xatolik"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=16,
+                        verbose_name="Holati",
+                    ),
+                ),
+                (
+                    "phase",
+                    models.CharField(
+                        blank=True,
+                        choices=[("read", "O'qish"), ("write", "Yozish")],
+                        default="",
+                        max_length=16,
+                        verbose_name="Bosqich",
+                    ),
+                ),
+                (
+                    "skipped",
+                    models.BooleanField(default=False, verbose_name="Manba o'zgarmagan (o'tkazib yuborildi)"),
+                ),
+                (
+                    "fetched_rows",
+                    models.PositiveIntegerField(blank=True, null=True, verbose_name="O'qilgan qatorlar"),
+                ),
+                (
+                    "record_count",
+                    models.PositiveIntegerField(blank=True, null=True, verbose_name="Hujjat yozuvlari"),
+                ),
+                ("created_count", models.PositiveIntegerField(default=0, verbose_name="Yaratilgan yozuvlar")),
+                ("updated_count", models.PositiveIntegerField(default=0, verbose_name="Yangilangan yozuvlar")),
+                ("unchanged_count", models.PositiveIntegerField(default=0, verbose_name="O'zgarmagan yozuvlar")),
+                ("deleted_count", models.PositiveIntegerField(default=0, verbose_name="O'chirilgan yozuvlar")),
+                ("timings", models.JSONField(blank=True, default=dict, verbose_name="Bosqichlar vaqti")),
+                ("log", models.TextField(blank=True, default="", verbose_name="Jurnal")),
+                ("error", models.TextField(blank=True, default="", verbose_name="Xatolik matni")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Boshlangan vaqti")),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True, verbose_name="Oxirgi faollik")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Tugagan vaqti")),
+            ],
+            options={
+                "verbose_name": "Sheets sinxronizatsiya vazifasi",
+                "verbose_name_plural": "Sheets sinxronizatsiya vazifalari",
+                "ordering": ["-id"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status__in", ["queued", "running"])),
+                        fields=("source",),
+                        name="sheet_sync_active_source_unique",
+                    )
+                ],
+            },
+        ),
+    ]
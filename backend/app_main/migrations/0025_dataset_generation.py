@@ -0,0 +1,85 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_initial_generation(apps, schema_editor):
+    """Mavjud barcha yozuvlar birinchi faol avlodga tegishli bo'ladi."""
+    DatasetGeneration = apps.get_model("app_main", "DatasetGeneration")
+    DocumentCalculation = apps.get_model("app_main", "DocumentCalculation")
+    generation = DatasetGeneration.objects.create(
+        status="active",
+        source="initial",
+        record_count=DocumentCalculation.objects.count(),
+        activated_at=timezone.now(),
+    )
+    DocumentCalculation.objects.update(generation=generation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0024_sheet_sync_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetGeneration",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("staging", "Yuklanmoqda"),
+                            ("active", "Faol"),
+                            ("previous", "Oldingi (rollback uchun)"),
+                        ],
+                        db_index=True,
+                        default="staging",
+                        max_length=16,
+                        verbose_name="Holati",
+                    ),
+                ),
+                ("source", models.CharField(blank=True, default="", max_length=255, verbose_name="Manba")),
+                ("record_count", models.PositiveIntegerField(default=0, verbose_name="Yozuvlar soni")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")),
+                ("activated_at", models.DateTimeField(blank=True, null=True, verbose_name="Faollashtirilgan vaqti")),
+                ("retired_at", models.DateTimeField(blank=True, null=True, verbose_name="Almashtirilgan vaqti")),
+            ],
+            options={
+                "verbose_name": "Ma'lumotlar avlodi",
+                "verbose_name_plural": "Ma'lumotlar avlodlari",
+                "ordering": ["-id"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("status", "active")),
+                        fields=("status",),
+                        name="dataset_generation_single_active",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="documentcalculation",
+            name="generation",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="documents",
+                to="app_main.datasetgeneration",
+                verbose_name="Ma'lumotlar avlodi",
+            ),
+        ),
+        migrations.RunPython(create_initial_generation, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="documentcalculation",
+            name="generation",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="documents",
+                to="app_main.datasetgeneration",
+                verbose_name="Ma'lumotlar avlodi",
+            ),
+        ),
+    ]
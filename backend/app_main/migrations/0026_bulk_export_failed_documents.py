@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0025_dataset_generation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bulkexportjob",
+            name="failed_documents",
+            field=models.JSONField(blank=True, default=list, verbose_name="Render bo'lmagan hujjatlar"),
+        ),
+    ]
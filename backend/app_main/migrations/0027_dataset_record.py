@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def drop_inactive_generation_rows(apps, schema_editor):
+    """Jadvalda faqat faol avlod qatorlari qoladi; yuklanayotgan va eski avlodlar o'chiriladi."""
+    DatasetGeneration = apps.get_model("app_main", "DatasetGeneration")
+    DocumentCalculation = apps.get_model("app_main", "DocumentCalculation")
+    DocumentCalculation.objects.exclude(generation__status="active").delete()
+    DatasetGeneration.objects.exclude(status="active").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_main", "0026_bulk_export_failed_documents"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_inactive_generation_rows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="documentcalculation",
+            name="generation",
+        ),
+        migrations.CreateModel(
+            name="DatasetRecord",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("document_id", models.PositiveBigIntegerField(blank=True, null=True, verbose_name="Hujjat ID")),
+                ("data", models.JSONField(default=dict, verbose_name="Maydonlar")),
+                (
+                    "generation",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="records",
+                        to="app_main.datasetgeneration",
+                        verbose_name="Ma'lumotlar avlodi",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Avlod yozuvi",
+                "verbose_name_plural": "Avlod yozuvlari",
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -57,6 +57,11 @@ class NormativeCoefficient(models.Model):
     def __str__(self) -> str:
         return self.get_normative_type_display()
 
+    @classmethod
+    def active_by_type(cls) -> dict:
+        """{normative_type: faol qator} — ko'p hujjat uchun bitta so'rov bilan."""
+        return {matrix.normative_type: matrix for matrix in cls.objects.filter(is_active=True)}
+
 
 class DocumentCalculationCategory(models.Model):
     name = models.CharField(max_length=255, unique=True, verbose_name="Kategoriya nomi")
@@ -72,6 +77,67 @@ class DocumentCalculationCategory(models.Model):
         return self.name
 
 
+class DatasetGeneration(models.Model):
+    """DocumentCalculation ma'lumotlar to'plamining avlodi (versiyasi).
+
+    To'liq qayta yuklash (sync_from_sheets --reload) yozuvlarni avval STAGING avlodga
+    (DatasetRecord) yozadi, keyin bitta qisqa tranzaksiyada jadvalga qo'llaydi — qatorlar
+    joyida yangilanadi, id'lar o'zgarmaydi. ACTIVE avlod ma'lumoti jadvalning o'zida;
+    almashtirilganda uning nusxasi PREVIOUS avlod bo'lib rollback uchun saqlanadi.
+    """
+
+    class Status(models.TextChoices):
+        STAGING = "staging", "Yuklanmoqda"
+        ACTIVE = "active", "Faol"
+        PREVIOUS = "previous", "Oldingi (rollback uchun)"
+
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.STAGING, db_index=True, verbose_name="Holati"
+    )
+    source = models.CharField(max_length=255, blank=True, default="", verbose_name="Manba")
+    record_count = models.PositiveIntegerField(default=0, verbose_name="Yozuvlar soni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    activated_at = models.DateTimeField(null=True, blank=True, verbose_name="Faollashtirilgan vaqti")
+    retired_at = models.DateTimeField(null=True, blank=True, verbose_name="Almashtirilgan vaqti")
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Ma'lumotlar avlodi"
+        verbose_name_plural = "Ma'lumotlar avlodlari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["status"],
+                condition=models.Q(status="active"),
+                name="dataset_generation_single_active",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Avlod #{self.id} ({self.get_status_display()})"
+
+
+class DatasetRecord(models.Model):
+    """Avlodning bitta yozuvi: DocumentCalculation maydonlari qiymatlari (attname → matn).
+
+    STAGING avlodda faqat manbadan keladigan maydonlar, PREVIOUS avlodda — almashtirilgan
+    qatorning barcha maydonlari. document_id — jadvaldagi qator (yangi yozuvda bo'sh).
+    """
+
+    generation = models.ForeignKey(
+        DatasetGeneration,
+        on_delete=models.CASCADE,
+        related_name="records",
+        verbose_name="Ma'lumotlar avlodi",
+    )
+    document_id = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="Hujjat ID")
+    data = models.JSONField(default=dict, verbose_name="Maydonlar")
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Avlod yozuvi"
+        verbose_name_plural = "Avlod yozuvlari"
+
+
 class DocumentCalculation(models.Model):
     class DocumentCategory(models.TextChoices):
         NEW = "new", "Yangi"
@@ -214,12 +280,24 @@ class DocumentCalculation(models.Model):
     def __str__(self) -> str:
         return self.name
 
-    def apply_normative_coefficients(self) -> None:
-        """NormativeCoefficient jadvalidan VHM qiymatini (toifa va murakkablikka qarab) oladi."""
-        matrix = NormativeCoefficient.objects.filter(
-            normative_type=self.normative_type,
-            is_active=True,
-        ).first()
+    @staticmethod
+    def default_contract_number(pk: int) -> str:
+        """Shartnoma raqami kiritilmagan hujjatlarda ko'rsatiladigan raqam."""
+        return f"{pk}/26"
+
+    def apply_normative_coefficients(self, matrices: dict | None = None) -> None:
+        """NormativeCoefficient jadvalidan VHM qiymatini (toifa va murakkablikka qarab) oladi.
+
+        matrices — oldindan yuklangan {normative_type: faol qator} lug'ati (ko'p
+        hujjat uchun bitta so'rov); berilmasa qator bazadan so'raladi.
+        """
+        if matrices is not None:
+            matrix = matrices.get(self.normative_type)
+        else:
+            matrix = NormativeCoefficient.objects.filter(
+                normative_type=self.normative_type,
+                is_active=True,
+            ).first()
         if not matrix:
             return
 
@@ -300,3 +378,201 @@ class OrganizationSettings(models.Model):
     def get_instance(cls) -> "OrganizationSettings":
         obj, _ = cls.objects.get_or_create(id=1)
         return obj
+
+
+class BulkExportJob(models.Model):
+    """Fonda bajariladigan ommaviy (bulk) ZIP eksport vazifasi.
+
+    So'rov faqat navbatga qo'yadi; render va arxivni yozishni
+    `manage.py run_export_worker` bajaradi. Tayyor arxiv MEDIA_ROOT ostida saqlanadi
+    va BULK_EXPORT_TTL_HOURS o'tgach o'chiriladi.
+    """
+
+    class DocumentType(models.TextChoices):
+        SHARTNOMA = "shartnoma", "Shartnoma"
+        KALENDAR_REJA = "kalendar_reja", "Kalendar reja"
+        TEXNIK_TOPSHIRIQ = "texnik_topshiriq", "Texnik topshiriq"
+        BAYONNOMA = "bayonnoma", "Bayonnoma"
+        KALKULATSIYA = "kalkulatsiya", "Kalkulatsiya"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Navbatda"
+        RUNNING = "running", "Bajarilmoqda"
+        DONE = "done", "Tayyor"
+        FAILED = "failed", "Xatolik"
+        EXPIRED = "expired", "Muddati o'tgan"
+
+    document_type = models.CharField(max_length=32, choices=DocumentType.choices, verbose_name="Hujjat turi")
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True, verbose_name="Holati"
+    )
+    # Bir vaqtda bajariladigan eksportlar chegarasi: RUNNING vazifa 0..N-1 slotlardan birini
+    # egallaydi, slot esa RUNNING vazifalar orasida unikal (bazada atomar tekshiriladi)
+    slot = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Worker sloti")
+    total = models.PositiveIntegerField(default=0, verbose_name="Jami hujjatlar")
+    done = models.PositiveIntegerField(default=0, verbose_name="Tayyor hujjatlar")
+    archive = models.FileField(upload_to="exports/", blank=True, default="", verbose_name="Arxiv")
+    # Render bo'lmagan hujjatlar (arxivda XATOLAR.txt ham shu ro'yxat bilan)
+    failed_documents = models.JSONField(default=list, blank=True, verbose_name="Render bo'lmagan hujjatlar")
+    error = models.TextField(blank=True, default="", verbose_name="Xatolik matni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan vaqti")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi faollik")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan vaqti")
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="Arxiv amal qilish muddati")
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Bulk eksport vazifasi"
+        verbose_name_plural = "Bulk eksport vazifalari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["slot"],
+                condition=models.Q(status="running"),
+                name="bulk_export_running_slot_unique",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_document_type_display()} #{self.id} ({self.get_status_display()})"
+
+
+class XlsxImportJob(models.Model):
+    """Fonda bo'laklab bajariladigan XLSX import vazifasi.
+
+    Yuklangan fayl MEDIA_ROOT/imports/ ostida saqlanadi; tekshiruv va yozishni
+    `manage.py run_export_worker` bajaradi. Progress va tekshiruv xatolari
+    import davomida shu yozuvga yozib boriladi.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Navbatda"
+        RUNNING = "running", "Bajarilmoqda"
+        DONE = "done", "Tayyor"
+        FAILED = "failed", "Xatolik"
+
+    class Phase(models.TextChoices):
+        VALIDATE = "validate", "Tekshiruv"
+        WRITE = "write", "Yozish"
+
+    class Mode(models.TextChoices):
+        APPEND = "append", "Qo'shish"
+        # designation (bo'sh bo'lsa nomi + kategoriya) bo'yicha: yangisi qo'shiladi,
+        # o'zgargani yangilanadi, o'zgarmagani yozilmaydi
+        UPSERT = "upsert", "Qo'shish yoki yangilash"
+
+    file = models.FileField(upload_to="imports/", blank=True, default="", verbose_name="XLSX fayl")
+    original_name = models.CharField(max_length=255, blank=True, default="", verbose_name="Fayl nomi")
+    dry_run = models.BooleanField(default=False, verbose_name="Faqat tekshirish (yozmasdan)")
+    mode = models.CharField(max_length=16, choices=Mode.choices, default=Mode.APPEND, verbose_name="Rejim")
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True, verbose_name="Holati"
+    )
+    phase = models.CharField(max_length=16, choices=Phase.choices, default=Phase.VALIDATE, verbose_name="Bosqich")
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Jami qatorlar")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Joriy bosqichda o'qilgan qatorlar")
+    # Oxirgi commit qilingan bo'lakning oxirgi qator raqami — davom ettirish shu yerdan
+    checkpoint_row = models.PositiveIntegerField(default=0, verbose_name="Nazorat nuqtasi (qator)")
+    valid_count = models.PositiveIntegerField(default=0, verbose_name="To'g'ri qatorlar")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Yaratilgan yozuvlar")
+    updated_count = models.PositiveIntegerField(default=0, verbose_name="Yangilangan yozuvlar")
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name="O'zgarmagan yozuvlar")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Xatolar soni")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Tekshiruv xatolari")
+    error = models.TextField(blank=True, default="", verbose_name="Xatolik matni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan vaqti")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi faollik")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan vaqti")
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "XLSX import vazifasi"
+        verbose_name_plural = "XLSX import vazifalari"
+
+    def __str__(self) -> str:
+        return f"{self.original_name or 'XLSX'} #{self.id} ({self.get_status_display()})"
+
+
+class SheetSyncSnapshot(models.Model):
+    """Manbaning oxirgi muvaffaqiyatli sinxronizatsiyadagi holati (manba bo'yicha bitta qator).
+
+    sync_from_sheets manba versiyasi (revision) yoki ma'lumotlar xeshi va bazaning
+    o'sha paytdagi holati o'zgarmagan bo'lsa o'qish va yozishni o'tkazib yuboradi.
+    """
+
+    source = models.CharField(max_length=255, unique=True, verbose_name="Manba")
+    # Manba beradigan versiya (Sheets — Drive modifiedTime, fayl — mtime:hajm); bo'lmasa bo'sh
+    revision = models.CharField(max_length=255, blank=True, default="", verbose_name="Manba versiyasi")
+    content_hash = models.CharField(max_length=64, blank=True, default="", verbose_name="Ma'lumotlar xeshi")
+    # Sinxronizatsiyadan keyingi jadval holati (yozuvlar soni va oxirgi o'zgarish) — jadval
+    # qo'lda o'zgartirilgan bo'lsa manba o'zgarmagan bo'lsa ham qayta solishtiriladi.
+    # updated_at'ni o'zgartirmaydigan QuerySet.update() sezilmaydi — bunday hollarda --force
+    database_state = models.CharField(max_length=64, blank=True, default="", verbose_name="Baza holati")
+    record_count = models.PositiveIntegerField(default=0, verbose_name="Yozuvlar soni")
+    synced_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi sinxronizatsiya")
+    checked_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi tekshiruv")
+
+    class Meta:
+        verbose_name = "Sheets sinxronizatsiya holati"
+        verbose_name_plural = "Sheets sinxronizatsiya holatlari"
+
+    def __str__(self) -> str:
+        return self.source
+
+
+class SheetSyncJob(models.Model):
+    """Fonda bajariladigan Sheets sinxronizatsiyasi (SyncFromSheetsAPIView navbatga qo'yadi).
+
+    `manage.py run_export_worker` sync_from_sheets'ni bajaradi va natijani shu
+    yozuvga yozadi. Bitta manba uchun faqat bitta navbatdagi yoki bajarilayotgan
+    vazifa bo'lishi mumkin (bazadagi shartli unique constraint) — ketma-ket bosilgan
+    tugma bir-birining qatorlarini o'chiradigan parallel sinxronizatsiyalarni boshlamaydi.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Navbatda"
+        RUNNING = "running", "Bajarilmoqda"
+        DONE = "done", "Tayyor"
+        FAILED = "failed", "Xatolik"
+
+    class Phase(models.TextChoices):
+        READ = "read", "O'qish"
+        WRITE = "write", "Yozish"
+
+    source = models.CharField(max_length=255, verbose_name="Manba")
+    force = models.BooleanField(default=False, verbose_name="Majburiy (o'zgarmagan bo'lsa ham)")
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED, db_index=True, verbose_name="Holati"
+    )
+    phase = models.CharField(max_length=16, choices=Phase.choices, blank=True, default="", verbose_name="Bosqich")
+    skipped = models.BooleanField(default=False, verbose_name="Manba o'zgarmagan (o'tkazib yuborildi)")
+    fetched_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="O'qilgan qatorlar")
+    record_count = models.PositiveIntegerField(null=True, blank=True, verbose_name="Hujjat yozuvlari")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Yaratilgan yozuvlar")
+    updated_count = models.PositiveIntegerField(default=0, verbose_name="Yangilangan yozuvlar")
+    unchanged_count = models.PositiveIntegerField(default=0, verbose_name="O'zgarmagan yozuvlar")
+    deleted_count = models.PositiveIntegerField(default=0, verbose_name="O'chirilgan yozuvlar")
+    # Bosqichlar davomiyligi, soniya: {"read": 1.2, "write": 0.4}
+    timings = models.JSONField(default=dict, blank=True, verbose_name="Bosqichlar vaqti")
+    log = models.TextField(blank=True, default="", verbose_name="Jurnal")
+    error = models.TextField(blank=True, default="", verbose_name="Xatolik matni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan vaqti")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi faollik")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan vaqti")
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Sheets sinxronizatsiya vazifasi"
+        verbose_name_plural = "Sheets sinxronizatsiya vazifalari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source"],
+                condition=models.Q(status__in=["queued", "running"]),
+                name="sheet_sync_active_source_unique",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Sheets sync #{self.id} ({self.get_status_display()})"
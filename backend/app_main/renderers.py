@@ -0,0 +1,36 @@
+from rest_framework.renderers import BaseRenderer
+
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+ZIP_CONTENT_TYPE = "application/zip"
+
+
+class BinaryFileRenderer(BaseRenderer):
+    """Binar fayl rejimlari uchun asos.
+
+    View'lar bu rejimda tayyor baytlarni to'g'ridan-to'g'ri (FileResponse /
+    HttpResponse) qaytaradi — renderer faqat content negotiation uchun kerak.
+    """
+
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class DocxRenderer(BinaryFileRenderer):
+    """Hujjat endpoint'lari uchun binar .docx rejimi.
+
+    `Accept: application/vnd.openxmlformats-officedocument.wordprocessingml.document`
+    yoki `?format=docx` bilan tanlanadi.
+    """
+
+    media_type = DOCX_CONTENT_TYPE
+    format = "docx"
+
+
+class ZipRenderer(BinaryFileRenderer):
+    """Bir nechta hujjatni bitta ZIP qilib qaytaruvchi rejim (`?format=zip`)."""
+
+    media_type = ZIP_CONTENT_TYPE
+    format = "zip"
@@ -1,10 +1,14 @@
+from django.urls import reverse
 from rest_framework import serializers
 
 from .models import (
+    BulkExportJob,
     DocumentCalculation,
     DocumentCalculationCategory,
     NormativeCoefficient,
     OrganizationSettings,
+    SheetSyncJob,
+    XlsxImportJob,
 )
 
 
@@ -171,3 +175,135 @@ class OrganizationSettingsSerializer(serializers.ModelSerializer):
         model = OrganizationSettings
         fields = ["institute_director", "deputy_minister", "economics_head", "updated_at"]
         read_only_fields = ["updated_at"]
+
+
+class BulkExportJobCreateSerializer(serializers.Serializer):
+    document_type = serializers.ChoiceField(choices=BulkExportJob.DocumentType.choices)
+
+
+class BulkExportJobSerializer(serializers.ModelSerializer):
+    document_type_label = serializers.CharField(source="get_document_type_display", read_only=True)
+    status_label = serializers.CharField(source="get_status_display", read_only=True)
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = BulkExportJob
+        fields = [
+            "id",
+            "document_type",
+            "document_type_label",
+            "status",
+            "status_label",
+            "total",
+            "done",
+            "progress",
+            "download_url",
+            "failed_documents",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "expires_at",
+        ]
+
+    def get_progress(self, obj) -> int:
+        if obj.status == BulkExportJob.Status.DONE:
+            return 100
+        if not obj.total:
+            return 0
+        return min(100, obj.done * 100 // obj.total)
+
+    def get_download_url(self, obj) -> str | None:
+        if obj.status != BulkExportJob.Status.DONE or not obj.archive:
+            return None
+        url = reverse("app_main:bulk-export-download", kwargs={"pk": obj.pk})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class XlsxImportJobCreateSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default=False)
+    mode = serializers.ChoiceField(choices=XlsxImportJob.Mode.choices, default=XlsxImportJob.Mode.APPEND)
+
+    def validate_file(self, value):
+        if not value.name.lower().endswith(".xlsx"):
+            raise serializers.ValidationError("Faqat .xlsx formatdagi fayl qo'llab-quvvatlanadi.")
+        return value
+
+
+class XlsxImportJobSerializer(serializers.ModelSerializer):
+    status_label = serializers.CharField(source="get_status_display", read_only=True)
+    phase_label = serializers.CharField(source="get_phase_display", read_only=True)
+    mode_label = serializers.CharField(source="get_mode_display", read_only=True)
+    progress = serializers.SerializerMethodField()
+    errors = serializers.SerializerMethodField()
+
+    class Meta:
+        model = XlsxImportJob
+        fields = [
+            "id",
+            "original_name",
+            "dry_run",
+            "mode",
+            "mode_label",
+            "status",
+            "status_label",
+            "phase",
+            "phase_label",
+            "total_rows",
+            "processed_rows",
+            "progress",
+            "valid_count",
+            "created_count",
+            "updated_count",
+            "unchanged_count",
+            "error_count",
+            "errors",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+
+    def get_progress(self, obj) -> int | None:
+        """Joriy bosqich foizi (qatorlar soni hali noma'lum bo'lsa None)."""
+        if obj.status == XlsxImportJob.Status.DONE:
+            return 100
+        if not obj.total_rows:
+            return None if obj.total_rows is None else 0
+        return min(100, obj.processed_rows * 100 // obj.total_rows)
+
+    def get_errors(self, obj) -> list:
+        # errors_from — mijoz oldin olgan xatolarni qayta yubormaslik uchun (oqim kabi o'qish)
+        return obj.errors[self.context.get("errors_from", 0):]
+
+
+class SheetSyncJobSerializer(serializers.ModelSerializer):
+    status_label = serializers.CharField(source="get_status_display", read_only=True)
+    phase_label = serializers.CharField(source="get_phase_display", read_only=True)
+
+    class Meta:
+        model = SheetSyncJob
+        fields = [
+            "id",
+            "force",
+            "status",
+            "status_label",
+            "phase",
+            "phase_label",
+            "skipped",
+            "fetched_rows",
+            "record_count",
+            "created_count",
+            "updated_count",
+            "unchanged_count",
+            "deleted_count",
+            "timings",
+            "log",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
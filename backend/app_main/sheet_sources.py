@@ -0,0 +1,228 @@
+"""sync_from_sheets manbalari: Google Sheets, .xlsx va .csv bir xil interfeys bilan.
+
+Har bir manba Sheets jadvali ko'rinishidagi qatorlarni (get_all_values() kabi:
+ro'yxat, bo'sh katak — "") oqim bilan beradi; qatorlarni tahlil qilish
+(Command._parse_rows) va bazaga yozish (sheets_sync.sync_records) manbaga bog'liq
+emas. Shu sabab sinxronizatsiyani Sheets'ga ulanmasdan, eksport qilingan fayldan
+ham bajarish va o'lchash mumkin.
+
+Manba qo'shimcha ravishda arzon versiya (revision) va butun tarkib xeshini
+(content_hash) berishi mumkin — ular SheetSyncSnapshot bilan solishtiriladi.
+"""
+
+import csv
+import hashlib
+import os
+
+import gspread
+from django.conf import settings
+from google.oauth2.service_account import Credentials
+
+from .xlsx_import import REQUIRED_HEADERS, normalize_header
+from .xlsx_reader import XlsxFormatError, XlsxReader
+
+SPREADSHEET_ID = "1-Ctzg2RPBiSUM-d7Ps74QSNW5mKcG79ZlOrOwdSv9Fg"
+SHEET_GID = 1494376803
+
+SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# Sheets jadvalidan o'qiladigan ustunlar: A..N
+SHEET_COLUMNS = 14
+
+CSV_DELIMITERS = ",;\t"
+
+
+class SheetSourceError(Exception):
+    """Manbani ochib yoki o'qib bo'lmadi (xabar foydalanuvchiga ko'rsatiladi)."""
+
+
+class SheetSource:
+    """Manba interfeysi. Kontekst menejeri sifatida ishlatiladi.
+
+    key — SheetSyncSnapshot kaliti; label — log uchun nomi; import_layout —
+    fayl XLSX import formatida (qatorlar o'rniga XlsxSheet/RowBuilder o'qiydi).
+    """
+
+    key = ""
+    label = ""
+    import_layout = False
+
+    def open(self) -> None:
+        """Ulanish / faylni ochish (rows()'dan oldin)."""
+
+    def revision(self) -> str:
+        """Arzon versiya belgisi; manba bermasa yoki olinmasa bo'sh satr."""
+        return ""
+
+    def content_hash(self) -> str:
+        """Qatorlarni tahlil qilmasdan hisoblanadigan tarkib xeshi; bo'lmasa bo'sh satr."""
+        return ""
+
+    def rows(self):
+        """Sheets jadvali ko'rinishidagi qatorlar (list) oqimi."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def find_credentials(path: str | None = None) -> str | None:
+    """Service account JSON: berilgan yo'l yoki odatiy joylardan birinchisi."""
+    if path:
+        return path if os.path.exists(path) else None
+    candidates = [
+        # Docker container: /app/credentials.json
+        "/app/credentials.json",
+        # Local dev: loyiha ildizi (backend/../)
+        os.path.join(settings.BASE_DIR.parent, "adreska-246ee-e5b2502b05d5.json"),
+        # manage.py yonida
+        os.path.join(settings.BASE_DIR, "adreska-246ee-e5b2502b05d5.json"),
+    ]
+    return next((candidate for candidate in candidates if os.path.exists(candidate)), None)
+
+
+def sheets_source_key(spreadsheet_id: str = SPREADSHEET_ID, gid: int = SHEET_GID) -> str:
+    """Google Sheets varag'ining SheetSyncSnapshot / SheetSyncJob kaliti."""
+    return f"sheets:{spreadsheet_id}:{gid}"
+
+
+class GoogleSheetSource(SheetSource):
+    """Google Sheets varag'i (gid bo'yicha, topilmasa birinchi varaq)."""
+
+    def __init__(self, credentials_path: str, spreadsheet_id: str = SPREADSHEET_ID, gid: int = SHEET_GID):
+        self.credentials_path = credentials_path
+        self.spreadsheet_id = spreadsheet_id
+        self.gid = gid
+        self.key = sheets_source_key(spreadsheet_id, gid)
+        self.label = f"Google Sheets {spreadsheet_id}"
+        self._spreadsheet = None
+
+    def open(self):
+        try:
+            creds = Credentials.from_service_account_file(self.credentials_path, scopes=SCOPES)
+            gc = gspread.authorize(creds)
+        except Exception as e:
+            raise SheetSourceError(f"Google autentifikatsiya xatosi: {e}") from e
+        try:
+            self._spreadsheet = gc.open_by_key(self.spreadsheet_id)
+        except Exception as e:
+            raise SheetSourceError(f"Spreadsheet ochishda xato: {e}") from e
+
+    def revision(self):
+        # Drive modifiedTime — bitta kichik so'rov, varaqni yuklamasdan
+        try:
+            return self._spreadsheet.get_lastUpdateTime() or ""
+        except Exception:
+            return ""
+
+    def rows(self):
+        try:
+            worksheets = self._spreadsheet.worksheets()
+            worksheet = next((ws for ws in worksheets if ws.id == self.gid), worksheets[0])
+            self.label = f"Google Sheets '{worksheet.title}'"
+        except Exception as e:
+            raise SheetSourceError(f"Spreadsheet ochishda xato: {e}") from e
+        # Sheets API varaqni bitta javobda beradi; qatorlar shundan keyin oqim bilan uzatiladi
+        try:
+            values = worksheet.get_all_values()
+        except Exception as e:
+            raise SheetSourceError(f"Ma'lumot o'qishda xato: {e}") from e
+        yield from values
+
+
+class FileSource(SheetSource):
+    """Lokal fayl: versiya — mtime va hajm, xesh — fayl baytlari (parsingdan ancha arzon)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.key = f"file:{os.path.abspath(path)}"
+        self.label = path
+
+    def open(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            raise SheetSourceError(f"Faylni o'qishda xato: {e}") from e
+        self._revision = f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def revision(self):
+        return self._revision
+
+    def content_hash(self):
+        digest = hashlib.sha256()
+        try:
+            with open(self.path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError as e:
+            raise SheetSourceError(f"Faylni o'qishda xato: {e}") from e
+        return digest.hexdigest()
+
+
+class XlsxSource(FileSource):
+    """.xlsx: Sheets'dan yuklab olingan jadval yoki XLSX import formatidagi fayl (baza.xlsx).
+
+    Import formati birinchi qatordagi sarlavhalar bo'yicha aniqlanadi.
+    """
+
+    def open(self):
+        super().open()
+        try:
+            with XlsxReader(self.path) as reader:
+                header_rows = reader.rows()
+                first = next(header_rows, None)
+                header_rows.close()
+                self.sheet_name = reader.sheet_name
+        except (OSError, XlsxFormatError) as e:
+            raise SheetSourceError(f"Faylni o'qishda xato: {e}") from e
+        headers = {normalize_header(value) for value in first[1]} if first else set()
+        self.import_layout = headers.issuperset(REQUIRED_HEADERS)
+        self.label = f"{self.path} (varaq '{self.sheet_name}')"
+
+    def rows(self):
+        try:
+            with XlsxReader(self.path) as reader:
+                for _, values in reader.rows(columns=range(SHEET_COLUMNS)):
+                    # Sheets get_all_values() kabi: bo'sh katak — bo'sh satr
+                    yield ["" if value is None else value for value in values]
+        except (OSError, XlsxFormatError) as e:
+            raise SheetSourceError(f"Faylni o'qishda xato: {e}") from e
+
+
+class CsvSource(FileSource):
+    """Sheets'dan "CSV sifatida yuklab olish" yoki Excel eksporti (; yoki , ajratgich)."""
+
+    def __init__(self, path: str, encoding: str = "utf-8-sig"):
+        super().__init__(path)
+        self.encoding = encoding
+
+    def rows(self):
+        try:
+            with open(self.path, newline="", encoding=self.encoding) as fh:
+                # csv.Sniffer qator kengligi har xil bo'lsa adashadi — birinchi qatorda
+                # eng ko'p uchragan ajratgich olinadi (Sheets ",", rus Excel ";")
+                first_line = fh.readline()
+                delimiter = max(CSV_DELIMITERS, key=first_line.count) if first_line else ","
+                fh.seek(0)
+                for row in csv.reader(fh, delimiter=delimiter):
+                    if any(row):
+                        yield row
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            raise SheetSourceError(f"Faylni o'qishda xato: {e}") from e
+
+
+def source_for_path(path: str) -> SheetSource:
+    """Fayl kengaytmasi bo'yicha manba: .csv → CsvSource, qolganlari → XlsxSource."""
+    if os.path.splitext(path)[1].lower() in (".csv", ".tsv", ".txt"):
+        return CsvSource(path)
+    return XlsxSource(path)
@@ -0,0 +1,594 @@
+"""Sheets (yoki fayl) yozuvlarini DocumentCalculation jadvaliga farq (diff) bo'yicha qo'llash.
+
+Jadval o'chirib qayta yaratilmaydi: har bir yozuv tabiiy kalit (designation, bo'sh
+bo'lsa nomi + kategoriya — XLSX upsert bilan bir xil) bo'yicha mavjud qatorga
+bog'lanadi va faqat sinxronlanadigan maydonlari xeshi o'zgargan bo'lsa yangilanadi.
+Manbada yo'q qatorlar o'chiriladi. Hammasi bitta tranzaksiyada — foydalanuvchi hech
+qachon bo'sh yoki yarim yangilangan jadvalni ko'rmaydi; o'zgarmagan yozuvlarning id'si
+(shartnoma raqami id/26) va hujjatlar keshi saqlanadi.
+
+Manba o'zgarmagan bo'lsa sinxronizatsiya umuman bajarilmaydi: SheetSyncSnapshot
+manba versiyasi, o'qilgan qiymatlar xeshi va bazaning sinxronizatsiyadan keyingi
+holatini saqlaydi (Snapshot.unchanged()).
+
+To'liq qayta yuklash (reload_records, `sync_from_sheets --reload`) yozuvlarni avval
+yangi DatasetGeneration avlodiga (DatasetRecord) bo'laklab yozadi — jadval tegilmaydi.
+Keyin bitta qisqa tranzaksiyada faqat o'zgargan qatorlar joyida yoziladi: o'quvchilar
+bloklanmaydi, yarim yuklangan ma'lumotni ko'rmaydi, id'lar saqlanadi. Almashtirilgan
+jadval holati rollback_generation() uchun avlod bo'lib qoladi.
+
+API orqali sinxronizatsiya fonda bajariladi: SheetSyncJob navbatga qo'yiladi
+(enqueue_sync), `manage.py run_export_worker` uni sync_from_sheets buyrug'i bilan
+bajaradi (run_sync_job) va natijani vazifa yozuviga yozadi.
+"""
+
+import hashlib
+import io
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import (
+    DatasetGeneration,
+    DatasetRecord,
+    DocumentCalculation,
+    DocumentCalculationCategory,
+    SheetSyncJob,
+    SheetSyncSnapshot,
+)
+from .xlsx_import import natural_key, row_hash
+
+# Manbadan olinadigan maydonlar: solishtiriladi va yangilanadi. Qolganlari
+# (contract_number, bosqichlar, is_research_required ...) qo'lda kiritiladi va saqlanadi.
+SYNC_FIELDS = (
+    "designation",
+    "name",
+    "normative_type",
+    "document_category",
+    "complexity_level",
+    "total_pages",
+    "final_total_amount",
+    "sheet_total_amount",
+    "completed_amount",
+    "planned_amount",
+    "development_deadline",
+    "executor_organization",
+    "notes",
+    "selected_base_coefficient",
+    "selected_complexity_coefficient",
+)
+
+BATCH_SIZE = 500
+
+# Avlod yozuvi maydonlari: id va vaqt belgilaridan boshqa barchasi (rollback nusxasi).
+# Qayta yuklash faqat manbadan keladiganlarini yozadi — qo'lda kiritilgan maydonlar
+# (shartnoma raqami, bosqichlar, is_research_required ...) qatorda o'zgarmaydi
+_RECORD_FIELDS = {
+    field.attname: field
+    for field in DocumentCalculation._meta.concrete_fields
+    if field.attname not in ("id", "created_at", "updated_at")
+}
+_RELOAD_FIELDS = [
+    field for field in _RECORD_FIELDS.values() if field.name in (*SYNC_FIELDS, "calculation_category")
+]
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE_JOB_STATUSES = (SheetSyncJob.Status.QUEUED, SheetSyncJob.Status.RUNNING)
+
+# pg_advisory_xact_lock kaliti (ixtiyoriy doimiy son, loyihada boshqa advisory lock yo'q)
+SYNC_LOCK_KEY = 720_240_001
+
+# Parser yoki SYNC_FIELDS o'zgarsa oshiriladi — eski snapshot'lar "o'zgargan" hisoblanadi
+SYNC_VERSION = 1
+
+
+def database_state() -> str:
+    """Jadval holati: yozuvlar soni va oxirgi updated_at (bitta aggregate so'rov)."""
+    state = DocumentCalculation.objects.aggregate(count=Count("id"), last=Max("updated_at"))
+    return f"{state['count']}:{state['last'].isoformat() if state['last'] else ''}"
+
+
+class ContentHasher:
+    """Qatorlar oqimini o'zgartirmasdan o'tkazadi va ularning xeshini hisoblaydi."""
+
+    def __init__(self, rows=None):
+        self._rows = rows
+        self.row_count = 0
+        self._hash = hashlib.sha256(f"v{SYNC_VERSION}\x1e".encode())
+
+    def update(self, data: bytes) -> None:
+        self._hash.update(data)
+
+    def __iter__(self):
+        for row in self._rows:
+            # Qiymatlar parser o'zgartirishidan oldin xeshlanadi
+            self._hash.update(("\x1f".join("" if value is None else str(value) for value in row) + "\x1e").encode())
+            self.row_count += 1
+            yield row
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+class Snapshot:
+    """Bitta manbaning saqlangan holati bilan solishtirish (force=True — hech qachon o'zgarmagan emas)."""
+
+    def __init__(self, source: str, force: bool = False):
+        self.source = source
+        self.saved = None if force else SheetSyncSnapshot.objects.filter(source=source).first()
+        self.database_state = database_state()
+
+    def unchanged(self, revision: str = "", content_hash: str = "") -> bool:
+        """Versiya (bo'lsa) yoki xesh oxirgi sinxronizatsiyadagidek va jadval o'shandan beri o'zgarmagan."""
+        saved = self.saved
+        if saved is None or saved.database_state != self.database_state:
+            return False
+        if revision:
+            return saved.revision == revision
+        return bool(content_hash) and saved.content_hash == content_hash
+
+    def skipped_result(self) -> dict:
+        count = self.saved.record_count if self.saved else 0
+        return {"created": 0, "updated": 0, "unchanged": count, "deleted": 0, "skipped": True}
+
+    def touch(self, revision: str = "") -> None:
+        """O'tkazib yuborilgan tekshiruvni qayd etadi (xesh bo'yicha topilgan bo'lsa yangi versiyani ham)."""
+        fields = {"checked_at": timezone.now()}
+        if revision:
+            fields["revision"] = revision
+        SheetSyncSnapshot.objects.filter(source=self.source).update(**fields)
+
+    def save(self, revision: str, content_hash: str, record_count: int) -> None:
+        now = timezone.now()
+        SheetSyncSnapshot.objects.update_or_create(
+            source=self.source,
+            defaults={
+                "revision": revision,
+                "content_hash": content_hash,
+                "database_state": database_state(),
+                "record_count": record_count,
+                "synced_at": now,
+                "checked_at": now,
+            },
+        )
+
+
+def _instance(record: dict, category) -> DocumentCalculation:
+    return DocumentCalculation(
+        designation=record.get("designation", ""),
+        name=record["name"],
+        calculation_category=category,
+        normative_type=record["normative_type"],
+        document_category=record["document_category"],
+        complexity_level=record["complexity_level"],
+        total_pages=record["total_pages"],
+        final_total_amount=record["final_total_amount"],
+        sheet_total_amount=record["sheet_total_amount"],
+        completed_amount=record["completed_amount"],
+        planned_amount=record["planned_amount"],
+        development_deadline=record["development_deadline"],
+        executor_organization=record["executor_organization"],
+        notes=record["notes"],
+        selected_base_coefficient=record.get("selected_base_coefficient", Decimal("0.00")),
+        selected_complexity_coefficient=record.get("selected_complexity_coefficient", Decimal("1.00")),
+    )
+
+
+def _existing_index() -> dict:
+    """Kalit → [(id, xesh), ...] (id tartibida) — bitta so'rov, model obyektlarisiz."""
+    index = {}
+    rows = DocumentCalculation.objects.order_by("id").values_list("id", "calculation_category__name", *SYNC_FIELDS)
+    designation_pos = SYNC_FIELDS.index("designation")
+    name_pos = SYNC_FIELDS.index("name")
+    for pk, category_name, *values in rows.iterator(chunk_size=2000):
+        key = natural_key(values[designation_pos], values[name_pos], category_name or "")
+        index.setdefault(key, []).append((pk, row_hash(category_name, values, SYNC_FIELDS)))
+    return index
+
+
+def _lock_sync() -> None:
+    """Parallel sinxronizatsiyalar (API vazifasi, cron, qo'lda buyruq) navbat bilan bajarilsin.
+
+    PostgreSQL advisory lock tranzaksiya oxirigacha ushlanadi: ikkinchi sinxronizatsiya
+    farqni birinchisi commit qilgandan keyin hisoblaydi. SQLite yozuvchilarni baribir
+    ketma-ket bajaradi.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SYNC_LOCK_KEY])
+
+
+@contextmanager
+def _reload_lock():
+    """_lock_sync() bilan bir xil kalit, lekin sessiya darajasida — qayta yuklash bir nechta
+    tranzaksiyadan iborat (bo'laklar, almashtirish), butun davomida ushlanadi."""
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [SYNC_LOCK_KEY])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [SYNC_LOCK_KEY])
+
+
+def _diff(records: list[dict]):
+    """Yozuvlar va jadval farqi: (sonlar, yangi kategoriyalar, yaratish, yangilash, o'chirish)."""
+    categories = {category.name: category for category in DocumentCalculationCategory.objects.all()}
+    new_categories = []
+    index = _existing_index()
+    to_create, to_update = [], []
+    unchanged = 0
+
+    for record in records:
+        category_name = record.get("category_name") or ""
+        category = None
+        if category_name:
+            category = categories.get(category_name)
+            if category is None:
+                category = categories[category_name] = DocumentCalculationCategory(name=category_name)
+                new_categories.append(category)
+        instance = _instance(record, category)
+        matches = index.get(natural_key(instance.designation, instance.name, category_name))
+        if not matches:
+            to_create.append(instance)
+            continue
+        instance.pk, digest = matches.pop(0)
+        if row_hash(category_name, [getattr(instance, name) for name in SYNC_FIELDS], SYNC_FIELDS) == digest:
+            unchanged += 1
+        else:
+            to_update.append(instance)
+
+    # Manbada juftini topmagan qatorlar
+    to_delete = [pk for matches in index.values() for pk, _ in matches]
+    result = {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "unchanged": unchanged,
+        "deleted": len(to_delete),
+        "skipped": False,
+    }
+    return result, new_categories, to_create, to_update, to_delete
+
+
+def sync_records(records: list[dict], dry_run: bool = False) -> dict:
+    """Yozuvlarni bazaga qo'llaydi: {"created", "updated", "unchanged", "deleted"} sonlari.
+
+    Bir xil kalitli bir nechta yozuv (masalan bir bobda ikki marta uchragan nom)
+    mavjud qatorlarga id tartibida navbat bilan bog'lanadi. dry_run — faqat
+    sonlarni hisoblaydi, hech narsa yozmaydi.
+    """
+    if dry_run:
+        return _diff(records)[0]
+
+    with transaction.atomic():
+        _lock_sync()
+        # Farq qulf olingandan keyin hisoblanadi — parallel sinxronizatsiya o'zgarishlari ko'rinadi
+        result, new_categories, to_create, to_update, to_delete = _diff(records)
+        if new_categories:
+            DocumentCalculationCategory.objects.bulk_create(new_categories)
+        for start in range(0, len(to_delete), BATCH_SIZE):
+            DocumentCalculation.objects.filter(pk__in=to_delete[start:start + BATCH_SIZE]).delete()
+        if to_update:
+            now = timezone.now()
+            for instance in to_update:
+                instance.updated_at = now
+            DocumentCalculation.objects.bulk_update(
+                to_update, [*SYNC_FIELDS, "calculation_category", "updated_at"], batch_size=BATCH_SIZE
+            )
+        DocumentCalculation.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    return result
+
+
+def enqueue_sync(source: str, force: bool = False) -> tuple[SheetSyncJob, bool]:
+    """Sinxronizatsiyani navbatga qo'yadi: (vazifa, yangi_yaratildimi).
+
+    Shu manba uchun navbatdagi yoki bajarilayotgan vazifa bo'lsa yangisi yaratilmaydi —
+    o'sha qaytadi (ikki marta bosilgan tugma bitta sinxronizatsiya).
+    """
+    while True:
+        job = SheetSyncJob.objects.filter(source=source, status__in=_ACTIVE_JOB_STATUSES).first()
+        if job is not None:
+            return job, False
+        try:
+            with transaction.atomic():
+                return SheetSyncJob.objects.create(source=source, force=force), True
+        except IntegrityError:
+            # parallel so'rov vazifani shu orada yaratdi (shartli unique constraint) — o'shani olamiz
+            continue
+
+
+def claim_next_sync_job() -> SheetSyncJob | None:
+    """Navbatdagi eng eski sinxronizatsiya vazifasini egallaydi (bo'lmasa None)."""
+    while True:
+        job_id = (
+            SheetSyncJob.objects.filter(status=SheetSyncJob.Status.QUEUED)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = SheetSyncJob.objects.filter(pk=job_id, status=SheetSyncJob.Status.QUEUED).update(
+            status=SheetSyncJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return SheetSyncJob.objects.get(pk=job_id)
+        # vazifani boshqa worker oldi — keyingisini olamiz
+
+
+def fail_stale_sync_jobs() -> int:
+    """Heartbeat'i SHEETS_SYNC_STALE_SECONDS'dan beri yangilanmagan RUNNING vazifalarni
+    FAILED qiladi — yozish bitta tranzaksiyada, worker to'xtagan bo'lsa baza o'zgarmagan.
+    Aks holda to'xtab qolgan vazifa manbani keyingi sinxronizatsiyalar uchun band qilib turadi."""
+    cutoff = timezone.now() - timedelta(seconds=settings.SHEETS_SYNC_STALE_SECONDS)
+    return SheetSyncJob.objects.filter(status=SheetSyncJob.Status.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=SheetSyncJob.Status.FAILED,
+        error="Worker to'xtab qoldi, sinxronizatsiya bekor qilindi.",
+        finished_at=timezone.now(),
+    )
+
+
+def _finish_sync_job(job: SheetSyncJob, status: str, **fields) -> None:
+    SheetSyncJob.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), **fields)
+
+
+def run_sync_job(job: SheetSyncJob) -> None:
+    """Egallangan vazifani bajaradi: sync_from_sheets (Google Sheets) va natijani yozadi."""
+    # Buyruq shu modulni import qiladi — aylanma importdan qochish uchun shu yerda
+    from .management.commands.sync_from_sheets import Command as SyncFromSheetsCommand
+
+    output = io.StringIO()
+    command = SyncFromSheetsCommand(stdout=output, stderr=output)
+    command.on_phase = lambda phase: SheetSyncJob.objects.filter(pk=job.pk).update(
+        phase=phase, heartbeat_at=timezone.now()
+    )
+    try:
+        call_command(command, force=job.force)
+    except Exception as exc:
+        logger.exception("Sheets sinxronizatsiyasi #%s bajarilmadi", job.pk)
+        _finish_sync_job(job, SheetSyncJob.Status.FAILED, error=str(exc), log=output.getvalue())
+        return
+
+    result = command.result
+    if result is None:
+        _finish_sync_job(
+            job,
+            SheetSyncJob.Status.FAILED,
+            error=command.error or "Sinxronizatsiya bajarilmadi.",
+            timings=command.timings,
+            log=output.getvalue(),
+        )
+        return
+    _finish_sync_job(
+        job,
+        SheetSyncJob.Status.DONE,
+        skipped=result["skipped"],
+        fetched_rows=result["fetched_rows"],
+        record_count=result["records"],
+        created_count=result["created"],
+        updated_count=result["updated"],
+        unchanged_count=result["unchanged"],
+        deleted_count=result["deleted"],
+        timings=result["timings"],
+        log=output.getvalue(),
+    )
+
+
+def _resolve_categories(records: list[dict]) -> dict:
+    """Kategoriya nomi → obyekt; yangilari yaratiladi (kategoriyalar avlodlarga umumiy)."""
+    categories = {category.name: category for category in DocumentCalculationCategory.objects.all()}
+    new_categories = []
+    for record in records:
+        name = record.get("category_name") or ""
+        if name and name not in categories:
+            categories[name] = DocumentCalculationCategory(name=name)
+            new_categories.append(categories[name])
+    DocumentCalculationCategory.objects.bulk_create(new_categories)
+    return categories
+
+
+def _record_data(document: DocumentCalculation, fields) -> dict:
+    """Maydonlar qiymatlari matn ko'rinishida (JSON uchun); Decimal ustunning kasr xonalariga keltiriladi."""
+    data = {}
+    for field in fields:
+        value = field.value_from_object(document)
+        if value is not None and isinstance(field, models.DecimalField):
+            value = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places), rounding=ROUND_HALF_UP)
+        data[field.attname] = None if value is None else str(value)
+    return data
+
+
+def _set_record_data(document: DocumentCalculation, data: dict) -> None:
+    for attname, value in data.items():
+        setattr(document, attname, None if value is None else _RECORD_FIELDS[attname].to_python(value))
+
+
+def _bulk_create_records(records) -> int:
+    """DatasetRecord'larni bo'laklab yozadi (har bo'lak alohida commit); yozilganlar soni."""
+    batch, count = [], 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= BATCH_SIZE:
+            DatasetRecord.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    DatasetRecord.objects.bulk_create(batch)
+    return count + len(batch)
+
+
+def _stage_generation(generation: DatasetGeneration, records: list[dict]) -> None:
+    """Manba yozuvlarini yuklanayotgan avlodga yozadi (jadval o'zgarmaydi).
+
+    Har bir yozuv tabiiy kalit bo'yicha jadvaldagi qatorga bog'lanadi (document_id) —
+    faollashtirilganda o'sha qator joyida yangilanadi va id'si saqlanadi.
+    """
+    categories = _resolve_categories(records)
+    index = _existing_index()
+
+    def staged():
+        for record in records:
+            category_name = record.get("category_name") or ""
+            instance = _instance(record, categories.get(category_name))
+            matches = index.get(natural_key(instance.designation, instance.name, category_name))
+            yield DatasetRecord(
+                generation=generation,
+                document_id=matches.pop(0)[0] if matches else None,
+                data=_record_data(instance, _RELOAD_FIELDS),
+            )
+
+    _bulk_create_records(staged())
+
+
+def _copy_table(generation: DatasetGeneration) -> int:
+    """Jadvalning joriy holatini (barcha maydonlar, id bilan) avlodga nusxalaydi."""
+    documents = DocumentCalculation.objects.order_by("id").iterator(chunk_size=2000)
+    return _bulk_create_records(
+        DatasetRecord(
+            generation=generation,
+            document_id=document.pk,
+            data=_record_data(document, _RECORD_FIELDS.values()),
+        )
+        for document in documents
+    )
+
+
+def _apply_generation(generation: DatasetGeneration) -> dict:
+    """Avlod yozuvlarini jadvalga qo'llaydi (activate_generation tranzaksiyasi ichida).
+
+    document_id'li yozuv o'sha qatorni yangilaydi (qator o'chirilgan bo'lsa o'sha id bilan
+    qayta yaratiladi), qolganlari yangi qator bo'ladi; avlodda yo'q qatorlar o'chiriladi.
+    Faqat qiymati o'zgargan qatorlar yoziladi.
+    """
+    documents = {document.pk: document for document in DocumentCalculation.objects.iterator(chunk_size=2000)}
+    to_create, to_update = [], []
+    update_fields = set()
+    unchanged = 0
+    now = timezone.now()
+    for record in generation.records.order_by("id").iterator(chunk_size=2000):
+        document = documents.pop(record.document_id, None)
+        if document is None:
+            document = DocumentCalculation(pk=record.document_id)
+            _set_record_data(document, record.data)
+            to_create.append(document)
+        elif _record_data(document, [_RECORD_FIELDS[attname] for attname in record.data]) == record.data:
+            unchanged += 1
+        else:
+            _set_record_data(document, record.data)
+            document.updated_at = now
+            to_update.append(document)
+            update_fields.update(_RECORD_FIELDS[attname].name for attname in record.data)
+
+    # Avlodda juftini topmagan qatorlar
+    to_delete = list(documents)
+    for start in range(0, len(to_delete), BATCH_SIZE):
+        DocumentCalculation.objects.filter(pk__in=to_delete[start:start + BATCH_SIZE]).delete()
+    if to_update:
+        DocumentCalculation.objects.bulk_update(to_update, [*update_fields, "updated_at"], batch_size=BATCH_SIZE)
+    DocumentCalculation.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    return {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "unchanged": unchanged,
+        "deleted": len(to_delete),
+        "skipped": False,
+    }
+
+
+def activate_generation(generation: DatasetGeneration) -> dict:
+    """Avlodni jadvalga qo'llaydi va faol qiladi; natija sync_records ko'rinishida.
+
+    Avval jadvalning joriy holati faol avlodga nusxalanadi (tranzaksiyadan tashqarida) —
+    u PREVIOUS bo'lib rollback uchun qoladi. Keyin bitta tranzaksiyada faqat o'zgargan
+    qatorlar yoziladi: o'quvchilar commit'gacha eski, keyin yangi ma'lumotni to'liq ko'radi.
+    """
+    with _reload_lock():
+        current = DatasetGeneration.objects.filter(status=DatasetGeneration.Status.ACTIVE).first()
+        if current is None:
+            current = DatasetGeneration.objects.create(status=DatasetGeneration.Status.ACTIVE)
+        # Oldingi muvaffaqiyatsiz urinishdan qolgan nusxa
+        current.records.all().delete()
+        try:
+            copied = _copy_table(current)
+        except Exception:
+            current.records.all().delete()
+            raise
+        with transaction.atomic():
+            _lock_sync()
+            result = _apply_generation(generation)
+            now = timezone.now()
+            DatasetGeneration.objects.filter(pk=current.pk).update(
+                status=DatasetGeneration.Status.PREVIOUS, record_count=copied, retired_at=now
+            )
+            DatasetGeneration.objects.filter(pk=generation.pk).update(
+                status=DatasetGeneration.Status.ACTIVE, activated_at=now, retired_at=None
+            )
+        # Faol avlod ma'lumoti jadvalning o'zida — yozuvlari endi kerak emas
+        generation.records.all().delete()
+        _purge_generations()
+    return result
+
+
+def _delete_generation(generation_id: int) -> None:
+    # Avval yozuvlar (bitta DELETE), keyin avlod — CASCADE yozuvlarni birma-bir yig'masin
+    DatasetRecord.objects.filter(generation_id=generation_id).delete()
+    DatasetGeneration.objects.filter(pk=generation_id).delete()
+
+
+def _purge_generations() -> None:
+    """Eng oxirgi PREVIOUS avloddan boshqa eski va yarim qolgan (STAGING) avlodlarni o'chiradi."""
+    keep = (
+        DatasetGeneration.objects.filter(status=DatasetGeneration.Status.PREVIOUS)
+        .order_by("-retired_at", "-id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    stale = DatasetGeneration.objects.exclude(status=DatasetGeneration.Status.ACTIVE).exclude(pk=keep)
+    for generation_id in stale.values_list("id", flat=True):
+        _delete_generation(generation_id)
+
+
+def reload_records(records: list[dict], source: str = "") -> dict:
+    """To'liq qayta yuklash: yozuvlar yangi avlodga yoziladi va atomar qo'llanadi.
+
+    Kalit bo'yicha topilgan qatorlar joyida yangilanadi — id va qo'lda kiritilgan
+    maydonlar saqlanadi; manbada yo'q qatorlar o'chiriladi. Natija sync_records bilan
+    bir xil ko'rinishda (+ faollashtirilgan avlod id'si).
+    """
+    with _reload_lock():
+        # Oldingi muvaffaqiyatsiz yuklashlardan qolgan avlodlar
+        _purge_generations()
+        generation = DatasetGeneration.objects.create(source=source[:255], record_count=len(records))
+        try:
+            _stage_generation(generation, records)
+        except Exception:
+            _delete_generation(generation.pk)
+            raise
+        result = activate_generation(generation)
+    return {**result, "generation": generation.pk}
+
+
+def rollback_generation() -> DatasetGeneration | None:
+    """Oxirgi almashtirilgan avlodni qayta qo'llaydi (joriy holat PREVIOUS bo'ladi — qaytarsa bo'ladi)."""
+    with _reload_lock():
+        previous = (
+            DatasetGeneration.objects.filter(status=DatasetGeneration.Status.PREVIOUS)
+            .order_by("-retired_at", "-id")
+            .first()
+        )
+        if previous is not None:
+            activate_generation(previous)
+    return previous
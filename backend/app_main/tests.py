@@ -1,2 +1,855 @@
-from django.test import TestCase
+import base64
+import copy
+import io
+import os
+import tempfile
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from docx import Document as DocxDocument
+from openpyxl import Workbook, load_workbook
+
+from .documents import (
+    _APPENDIX_FRAGMENTS,
+    DOCUMENT_TYPES,
+    FAILED_LIST_NAME,
+    RenderContext,
+    render_document,
+    render_documents,
+)
+from .docx_templates import fill_paragraph, fill_placeholder_run, get_template
+from .management.commands.render_documents import _percentile
+from .exports import claim_next_job, enqueue_export, expire_old_exports, requeue_stale_jobs, run_export_job
+from .models import (
+    BulkExportJob,
+    DatasetGeneration,
+    DatasetRecord,
+    DocumentCalculation,
+    DocumentCalculationCategory,
+    OrganizationSettings,
+    SheetSyncJob,
+    XlsxImportJob,
+)
+from .renderers import DOCX_CONTENT_TYPE, ZIP_CONTENT_TYPE
+from .sheet_sources import CsvSource, XlsxSource
+from .sheets_sync import Snapshot, enqueue_sync, reload_records, rollback_generation, sync_records
+from .xlsx_import import REQUIRED_HEADERS, XlsxSheet, import_sheet, run_import_job, to_decimal
+from .xlsx_reader import XlsxReader
+
+# Tayyor hujjatlar keshi testlarda diskka (cache/documents) yozilmasin
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "documents": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-documents"},
+}
+
+
+class RenderEngineParityTests(TestCase):
+    """"xml" render engine natijasi "docx" engine bilan bir xil bo'lishi kerak.
+
+    word/document.xml bayt-bayt taqqoslanadi; "xml" engine qolgan zip a'zolarini
+    shablondan o'zgarishsiz ko'chiradi.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # NormativeCoefficient qatorlari migratsiyalar orqali yaratiladi
+        variants = [
+            # bir yil (2026), 2027 uchun summa yo'q
+            dict(normative_type="shnq", document_category="new", complexity_level="3",
+                 planned_amount=Decimal("775219.200"), development_deadline="2026-yil IV-chorak"),
+            # ikki yil (2027'ga o'tadi), bajarilgan summa bor
+            dict(normative_type="shnq", document_category="rework_harmonization", complexity_level="2",
+                 planned_amount=Decimal("100000.000"), completed_amount=Decimal("12500.500"),
+                 development_deadline="2027-yil   II-chorak", is_research_required=True),
+            # Excel narxi bilan (MQN)
+            dict(normative_type="mqn", document_category="additional_change", complexity_level="1",
+                 sheet_total_amount=Decimal("250000.000"), development_deadline="2027-yil IV-chorak",
+                 contract_number="", executor_organization=""),
+        ]
+        for i, fields in enumerate(variants, start=1):
+            DocumentCalculation.objects.create(
+                designation=f"SHNQ 0.0{i}",
+                name=f"Sinov hujjati {i} — \"qo'shtirnoq\" & <belgilar>",
+                total_pages=20 * i,
+                executor_organization=fields.pop("executor_organization", "Sinov tashkiloti"),
+                contract_number=fields.pop("contract_number", f"{i}-son"),
+                **fields,
+            )
+
+    @staticmethod
+    def _document_xml(data: bytes) -> bytes:
+        return zipfile.ZipFile(io.BytesIO(data)).read("word/document.xml")
+
+    def test_engines_produce_identical_document_xml(self):
+        context = RenderContext.load()
+        docs = list(DocumentCalculation.objects.order_by("id"))
+        for doc_type in DOCUMENT_TYPES.values():
+            for doc in docs:
+                with self.subTest(template=doc_type.template_name, doc=doc.id):
+                    with override_settings(DOCUMENT_RENDER_ENGINE="docx"):
+                        expected = render_document(doc_type, copy.copy(doc), context)
+                    with override_settings(DOCUMENT_RENDER_ENGINE="xml"):
+                        actual = render_document(doc_type, copy.copy(doc), context)
+                    self.assertEqual(self._document_xml(actual), self._document_xml(expected))
+
+    @override_settings(DOCUMENT_RENDER_ENGINE="xml")
+    def test_unchanged_parts_are_copied_from_template(self):
+        context = RenderContext.load()
+        doc = DocumentCalculation.objects.order_by("id").first()
+        for doc_type in DOCUMENT_TYPES.values():
+            with self.subTest(template=doc_type.template_name):
+                rendered = zipfile.ZipFile(io.BytesIO(render_document(doc_type, copy.copy(doc), context)))
+                self.assertIsNone(rendered.testzip())
+                with zipfile.ZipFile(doc_type.template_path) as template:
+                    self.assertEqual(rendered.namelist(), template.namelist())
+                    for name in template.namelist():
+                        if name != "word/document.xml":
+                            self.assertEqual(rendered.read(name), template.read(name), name)
+                    self.assertEqual(
+                        rendered.getinfo("word/document.xml").compress_type, zipfile.ZIP_DEFLATED
+                    )
+
+    def test_placeholders_are_filled(self):
+        context = RenderContext.load()
+        doc = DocumentCalculation.objects.order_by("id").first()
+        for doc_type in DOCUMENT_TYPES.values():
+            with self.subTest(template=doc_type.template_name):
+                data = render_document(doc_type, copy.copy(doc), context)
+                document_xml = self._document_xml(data).decode("utf-8")
+                self.assertNotIn("{{shnq_name}}", document_xml)
+                self.assertNotIn("{{final_total_amount}}", document_xml)
+
+    def test_cached_appendix_matches_fresh_build(self):
+        doc_type = DOCUMENT_TYPES["kalkulatsiya"]
+        context = RenderContext.load()
+        docs = list(DocumentCalculation.objects.order_by("id"))
+        self.addCleanup(_APPENDIX_FRAGMENTS.clear)
+        fresh = []
+        for doc in docs:
+            _APPENDIX_FRAGMENTS.clear()
+            fresh.append(render_document(doc_type, copy.copy(doc), context))
+        self.assertEqual(len(set(fresh)), len(docs))
+        # Ikkinchi aylanishda har bir tanlovning ilovasi keshdagi namunadan nusxalanadi
+        for _ in range(2):
+            for doc, expected in zip(docs, fresh):
+                with self.subTest(doc=doc.id):
+                    self.assertEqual(render_document(doc_type, copy.copy(doc), context), expected)
+        self.assertEqual(len(_APPENDIX_FRAGMENTS), len(docs))
+
+    def test_templates_match_manifest(self):
+        # Shablon o'zgarib, `manage.py compile_templates` ishga tushirilmagan bo'lsa
+        # render eski (paragrafni qayta yozuvchi) usulga qaytadi
+        for doc_type in DOCUMENT_TYPES.values():
+            with self.subTest(template=doc_type.template_name):
+                self.assertIsNotNone(get_template(doc_type.template_path).placeholder_runs)
+
+    def test_bold_placeholder_run_outside_bold_keys(self):
+        def paragraph():
+            para = DocxDocument().add_paragraph()
+            para.add_run("Summa: ")
+            para.add_run("{{amount}}").bold = True
+            para.add_run(" — ")
+            para.add_run("{{name}}")
+            return para
+
+        def bold_texts(para):
+            return [run.text for run in para.runs if run.bold]
+
+        placeholders = {"amount": "100", "name": "SHNQ"}
+        # Manifest yo'li: shablondagi qalin run qalinligicha qoladi
+        para = paragraph()
+        for run, key in ((para.runs[1], "amount"), (para.runs[3], "name")):
+            fill_placeholder_run(run._r, key, placeholders, bold_keys={"name"})
+        self.assertEqual(para.text, "Summa: 100 — SHNQ")
+        self.assertEqual(bold_texts(para), ["100", "SHNQ"])
+        # Manifestsiz yo'l: bold_keys'dan tashqaridagi matn oddiy run'ga yoziladi
+        para = paragraph()
+        fill_paragraph(para, placeholders, bold_keys={"name"})
+        self.assertEqual(para.text, "Summa: 100 — SHNQ")
+        self.assertEqual(bold_texts(para), ["SHNQ"])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class DocumentDownloadTests(TestCase):
+    """Hujjat endpoint'lari: base64 JSON (standart) va binar rejim (?format=docx|zip, Accept)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doc = DocumentCalculation.objects.create(
+            designation="SHNQ 0.01",
+            name="Sinov hujjati",
+            total_pages=20,
+            planned_amount=Decimal("100000.000"),
+            development_deadline="2026-yil IV-chorak",
+        )
+
+    def test_single_document_json_and_docx(self):
+        url = reverse("app_main:document-calculation-contract", args=[self.doc.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        payload = response.json()
+        self.assertEqual(payload["filename"], f"shartnoma_{self.doc.pk}.docx")
+
+        for kwargs in ({"data": {"format": "docx"}}, {"HTTP_ACCEPT": DOCX_CONTENT_TYPE}):
+            with self.subTest(**kwargs):
+                response = self.client.get(url, **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], DOCX_CONTENT_TYPE)
+                self.assertEqual(
+                    response["Content-Disposition"], f'attachment; filename="shartnoma_{self.doc.pk}.docx"'
+                )
+                self.assertEqual(b"".join(response.streaming_content), base64.b64decode(payload["data"]))
+
+    def test_binary_mode_errors_fall_back_to_json(self):
+        url = reverse("app_main:document-calculation-contract", args=[self.doc.pk + 1000])
+        response = self.client.get(url, {"format": "docx"})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("detail", response.json())
+
+    def test_bundle_zip(self):
+        url = reverse("app_main:document-calculation-bundle", args=[self.doc.pk])
+        payload = self.client.get(url).json()
+        response = self.client.get(url, {"format": "zip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], ZIP_CONTENT_TYPE)
+        self.assertEqual(response["Content-Disposition"], f'attachment; filename="hujjatlar_{self.doc.pk}.zip"')
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        self.assertEqual(archive.namelist(), [item["filename"] for item in payload["documents"]])
+        for item in payload["documents"]:
+            self.assertEqual(archive.read(item["filename"]), base64.b64decode(item["data"]))
+
+    def test_bundle_members_and_missing_record(self):
+        url = reverse("app_main:document-calculation-bundle", args=[self.doc.pk])
+        payload = self.client.get(url).json()
+        self.assertEqual(payload["doc_name"], self.doc.name)
+        self.assertEqual(
+            [(item["type"], item["filename"]) for item in payload["documents"]],
+            [
+                ("shartnoma", f"shartnoma_{self.doc.pk}.docx"),
+                ("kalendar_reja", f"kalendar_reja_{self.doc.pk}.docx"),
+                ("texnik_topshiriq", f"TZ_{self.doc.pk}.docx"),
+                ("bayonnoma", f"bayonnoma_{self.doc.pk}.docx"),
+                ("kalkulatsiya", f"kalkulatsiya_{self.doc.pk}.docx"),
+            ],
+        )
+        for item in payload["documents"]:
+            with self.subTest(type=item["type"]):
+                self.assertIsNone(zipfile.ZipFile(io.BytesIO(base64.b64decode(item["data"]))).testzip())
+
+        missing = reverse("app_main:document-calculation-bundle", args=[self.doc.pk + 1000])
+        for params in ({}, {"format": "zip"}):
+            with self.subTest(**params):
+                response = self.client.get(missing, params)
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response["Content-Type"], "application/json")
+
+    def test_if_none_match_returns_304(self):
+        for name in ("app_main:document-calculation-contract", "app_main:document-calculation-bundle"):
+            url = reverse(name, args=[self.doc.pk])
+            binary = "docx" if name.endswith("contract") else "zip"
+            with self.subTest(url=url):
+                json_etag = self.client.get(url)["ETag"]
+                binary_etag = self.client.get(url, {"format": binary})["ETag"]
+                self.assertEqual(json_etag, binary_etag[:-1] + '-json"')
+
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=json_etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertEqual(response["ETag"], json_etag)
+                response = self.client.get(url, {"format": binary}, HTTP_IF_NONE_MATCH=binary_etag)
+                self.assertEqual(response.status_code, 304)
+                # JSON ko'rinishining ETag'i binar faylga mos kelmaydi
+                response = self.client.get(url, {"format": binary}, HTTP_IF_NONE_MATCH=json_etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_render_inputs(self):
+        url = reverse("app_main:document-calculation-contract", args=[self.doc.pk])
+        etags = [self.client.get(url)["ETag"]]
+
+        self.doc.notes = "o'zgartirildi"
+        self.doc.save()
+        etags.append(self.client.get(url)["ETag"])
+
+        organization = OrganizationSettings.get_instance()
+        organization.institute_director = "Yangi direktor"
+        organization.save()
+        etags.append(self.client.get(url)["ETag"])
+
+        engine = "docx" if settings.DOCUMENT_RENDER_ENGINE == "xml" else "xml"
+        with override_settings(DOCUMENT_RENDER_ENGINE=engine):
+            etags.append(self.client.get(url)["ETag"])
+        self.assertEqual(len(set(etags)), len(etags), etags)
+        # Hech narsa o'zgarmasa ETag o'zgarmaydi
+        self.assertEqual(self.client.get(url)["ETag"], etags[2])
+
+
+@override_settings(CACHES=TEST_CACHES, DOCUMENT_RENDER_WORKERS=1, BULK_EXPORT_MAX_CONCURRENT=2)
+class BulkExportQueueTests(TestCase):
+    """Fon eksport navbati: slotlar chegarasi, to'xtagan vazifalar, arxiv va muddati."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media_root.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_enqueue_reuses_queued_job(self):
+        job, created = enqueue_export("shartnoma")
+        self.assertTrue(created)
+        self.assertEqual(enqueue_export("shartnoma"), (job, False))
+        self.assertTrue(enqueue_export("bayonnoma")[1])
+
+    def test_claim_respects_concurrency_cap(self):
+        jobs = [enqueue_export(doc_type)[0] for doc_type in ("shartnoma", "bayonnoma", "kalkulatsiya")]
+        first, second = claim_next_job(), claim_next_job()
+        self.assertEqual([(first.pk, first.slot), (second.pk, second.slot)], [(jobs[0].pk, 0), (jobs[1].pk, 1)])
+        self.assertEqual(first.status, BulkExportJob.Status.RUNNING)
+        # Ikkala slot band — uchinchi vazifa navbatda qoladi
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(BulkExportJob.objects.get(pk=jobs[2].pk).status, BulkExportJob.Status.QUEUED)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            BulkExportJob.objects.create(document_type="shartnoma", status=BulkExportJob.Status.RUNNING, slot=0)
+
+        BulkExportJob.objects.filter(pk=first.pk).update(status=BulkExportJob.Status.DONE, slot=None)
+        third = claim_next_job()
+        self.assertEqual((third.pk, third.slot), (jobs[2].pk, 0))
+
+    def test_stale_running_job_is_requeued(self):
+        stale, fresh = enqueue_export("shartnoma")[0], enqueue_export("bayonnoma")[0]
+        claim_next_job(), claim_next_job()
+        BulkExportJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=settings.BULK_EXPORT_STALE_SECONDS + 1)
+        )
+        self.assertEqual(requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, stale.slot, stale.heartbeat_at), (BulkExportJob.Status.QUEUED, None, None))
+        self.assertEqual(fresh.status, BulkExportJob.Status.RUNNING)
+        self.assertEqual(claim_next_job().pk, stale.pk)
+
+    def test_worker_runs_only_its_queues(self):
+        export_job = enqueue_export("shartnoma")[0]
+        sync_job = enqueue_sync("sheets:test")[0]
+        # Sinxronizatsiya worker'i navbatdagi eksportni kutmaydi va unga tegmaydi
+        with mock.patch("app_main.management.commands.run_export_worker.run_sync_job") as run_sync:
+            call_command(
+                "run_export_worker", "--once", "--queue", "syncs", stdout=io.StringIO(), stderr=io.StringIO()
+            )
+        self.assertEqual([call.args[0].pk for call in run_sync.call_args_list], [sync_job.pk])
+        export_job.refresh_from_db()
+        self.assertEqual(export_job.status, BulkExportJob.Status.QUEUED)
+
+    def test_run_writes_archive_and_expiry_deletes_it(self):
+        for i in range(2):
+            DocumentCalculation.objects.create(designation=f"SHNQ 0.0{i}", name=f"Sinov {i}", total_pages=10)
+        enqueue_export("shartnoma")
+        job = claim_next_job()
+        run_export_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.slot, job.done, job.total), (BulkExportJob.Status.DONE, None, 2, 2))
+        path = job.archive.path
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+            self.assertIsNone(archive.testzip())
+
+        self.assertEqual(expire_old_exports(), 0)
+        BulkExportJob.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(expire_old_exports(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.archive.name), (BulkExportJob.Status.EXPIRED, ""))
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_document_is_logged_and_listed(self):
+        docs = [
+            DocumentCalculation.objects.create(designation=f"SHNQ 0.0{i}", name=f"Sinov {i}", total_pages=10)
+            for i in range(3)
+        ]
+
+        def render(doc_type, doc, context, placeholders=None):
+            if doc.pk == docs[1].pk:
+                raise ValueError("buzilgan shablon")
+            return original(doc_type, doc, context, placeholders)
+
+        original = render_document
+        enqueue_export("shartnoma")
+        job = claim_next_job()
+        with (
+            mock.patch("app_main.documents.render_document", side_effect=render),
+            self.assertLogs("app_main.documents", level="ERROR") as logs,
+        ):
+            run_export_job(job)
+        self.assertIn(f"shartnoma #{docs[1].pk}", logs.output[0])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkExportJob.Status.DONE)
+        self.assertEqual(job.failed_documents, [f"shartnoma_{docs[1].pk}.docx — Sinov 1"])
+        with zipfile.ZipFile(job.archive.path) as archive:
+            names = archive.namelist()
+            self.assertEqual(names[-1], FAILED_LIST_NAME)
+            self.assertIn(job.failed_documents[0], archive.read(FAILED_LIST_NAME).decode("utf-8"))
+        self.assertEqual(len(names), 3)
+
+    @override_settings(DOCUMENT_RENDER_WORKERS=3)
+    def test_parallel_render_keeps_input_order(self):
+        docs = [
+            DocumentCalculation.objects.create(
+                designation=f"SHNQ 0.{i:02d}", name=f"Sinov {i}", total_pages=10 + i * 7,
+                planned_amount=Decimal(1000 * (i + 1)),
+            )
+            for i in range(8)
+        ]
+        doc_type = DOCUMENT_TYPES["kalendar_reja"]
+        context = RenderContext.load()
+        expected = [render_document(doc_type, copy.copy(doc), context) for doc in docs]
+        self.assertEqual(len(set(expected)), len(docs))
+        # Yarmi keshda: keshdagi va pool'dagi natijalar aralashib kelganda ham tartib saqlanadi
+        list(render_documents(doc_type, [copy.copy(doc) for doc in docs[::2]], context))
+        rendered = list(render_documents(doc_type, [copy.copy(doc) for doc in docs], context))
+        self.assertEqual(rendered, expected)
+
+    def test_only_changed_document_is_rendered_again(self):
+        caches["documents"].clear()
+        for i in range(4):
+            DocumentCalculation.objects.create(designation=f"SHNQ 0.0{i}", name=f"Sinov {i}", total_pages=10)
+        doc_type = DOCUMENT_TYPES["shartnoma"]
+        context = RenderContext.load()
+
+        def render_all():
+            docs = list(DocumentCalculation.objects.order_by("id"))
+            with mock.patch("app_main.documents.render_document", side_effect=render_document) as render:
+                rendered = list(render_documents(doc_type, docs, context))
+            return rendered, [call.args[1].pk for call in render.call_args_list]
+
+        first, misses = render_all()
+        self.assertEqual(len(misses), 4)
+        changed = DocumentCalculation.objects.order_by("id")[2]
+        changed.name = "Sinov 2 (yangi nom)"
+        changed.save()
+        second, misses = render_all()
+        self.assertEqual(misses, [changed.pk])
+        self.assertEqual([a == b for a, b in zip(first, second)], [True, True, False, True])
+
+    def test_failed_run_leaves_no_partial_archive(self):
+        DocumentCalculation.objects.create(designation="SHNQ 0.01", name="Sinov", total_pages=10)
+        enqueue_export("shartnoma")
+        job = claim_next_job()
+        with (
+            mock.patch("app_main.exports.iter_zip_entries", side_effect=RuntimeError("disk to'ldi")),
+            self.assertLogs("app_main.exports", level="ERROR"),
+        ):
+            run_export_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.slot, job.error), (BulkExportJob.Status.FAILED, None, "disk to'ldi"))
+        export_dir = os.path.join(settings.MEDIA_ROOT, "exports", str(job.pk))
+        self.assertEqual(os.listdir(export_dir), [])
+
+
+class RenderDocumentsCommandTests(TestCase):
+    """`manage.py render_documents`: filtrlar va vaqt persentillari."""
+
+    def test_percentile_is_nearest_rank(self):
+        for size, p50, p95 in ((1, 1, 1), (2, 1, 2), (10, 5, 10), (20, 10, 19), (100, 50, 95)):
+            values = list(range(1, size + 1))
+            with self.subTest(size=size):
+                self.assertEqual((_percentile(values, 50), _percentile(values, 95)), (p50, p95))
+        self.assertEqual(_percentile(list(range(1, 101)), 7), 7)
+
+    @override_settings(CACHES=TEST_CACHES)
+    def test_category_filters_calculation_category(self):
+        docs = [
+            DocumentCalculation.objects.create(
+                designation=f"SHNQ 0.0{i}",
+                name=f"Sinov {i}",
+                calculation_category=DocumentCalculationCategory.objects.get_or_create(name=category)[0],
+                document_category=document_category,
+            )
+            for i, (category, document_category) in enumerate([
+                ("1. Bob", "new"),
+                ("2. Bob, qo'shimcha", "new"),
+                ("2. Bob, qo'shimcha", "rework_modification"),
+            ])
+        ]
+        with tempfile.TemporaryDirectory() as out:
+            call_command(
+                "render_documents", out=out, template="TZ", category=["2. Bob, qo'shimcha"],
+                document_category="new", jobs=1, stdout=io.StringIO(),
+            )
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(out, "texnik_topshiriq"))), [".manifest.json", f"TZ_{docs[1].pk}.docx"]
+            )
+            with self.assertRaises(CommandError):
+                call_command("render_documents", out=out, category=["new"], stdout=io.StringIO())
+
+
+class XlsxReaderParityTests(SimpleTestCase):
+    """XlsxReader qiymatlari openpyxl(read_only, data_only) bilan bir xil bo'lishi kerak."""
+
+    @staticmethod
+    def _workbook_bytes() -> bytes:
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(["category", "name", "total_pages", "completed_amount", "flag"])
+        worksheet.append(["I. Bob", "SHNQ 2.01.05-24 — \"sinov\" & <belgi>", 120, 1250.5, True])
+        worksheet.append([None, "  bo'shliqli nom ", 0, None, False])
+        worksheet.append([])
+        worksheet.append(["I. Bob", None, 7, -3.25e-7, None])
+        worksheet["H6"] = "uzoq ustun"
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+
+    def test_rows_match_openpyxl(self):
+        data = self._workbook_bytes()
+        worksheet = load_workbook(io.BytesIO(data), read_only=True, data_only=True).active
+        expected = {}
+        for number, values in enumerate(worksheet.iter_rows(values_only=True), start=1):
+            values = list(values)
+            while values and values[-1] is None:
+                values.pop()
+            if values:
+                expected[number] = tuple(values)
+        with XlsxReader(io.BytesIO(data)) as reader:
+            self.assertEqual(dict(reader.rows()), expected)
+            self.assertEqual(reader.max_row, 6)
+
+    def test_selected_columns(self):
+        with XlsxReader(io.BytesIO(self._workbook_bytes())) as reader:
+            rows = list(reader.rows(columns=[7, 1, 2], min_row=2))
+        self.assertEqual(
+            rows,
+            [
+                (2, (None, "SHNQ 2.01.05-24 — \"sinov\" & <belgi>", 120)),
+                (3, (None, "  bo'shliqli nom ", 0)),
+                (5, (None, None, 7)),
+                (6, ("uzoq ustun", None, None)),
+            ],
+        )
+
+
+class XlsxImportTests(TestCase):
+    """XLSX import: oldindan yuklash va bulk_create so'rovlar sonini qatorlarga bog'lamaydi."""
+
+    # REQUIRED_HEADERS tartibida; ikkinchi qatorda turi va toifasi joyi almashgan
+    ROWS = [
+        [f"{i % 3 + 1}. Bob", f"Sinov hujjati {i}", "2026-yil IV-chorak", "Sinov tashkiloti", "" if i % 2 else "izoh",
+         10 + i, *(("new", "shnq") if i == 1 else (["shnq", "mqn", "standard", "srn"][i % 4], "new")),
+         f"{i % 3 + 1}.0" if i % 2 else i % 3 + 1, 1250.5 if i % 5 == 0 else None]
+        for i in range(12)
+    ]
+    FIELDS = (
+        "calculation_category__name",
+        "name",
+        "total_pages",
+        "normative_type",
+        "document_category",
+        "complexity_level",
+        "is_research_required",
+        "development_deadline",
+        "executor_organization",
+        "notes",
+        "completed_amount",
+        "selected_base_coefficient",
+        "selected_complexity_coefficient",
+        "final_total_amount",
+        "planned_amount",
+    )
+
+    @classmethod
+    def _workbook(cls, rows) -> io.BytesIO:
+        workbook = Workbook()
+        workbook.active.append(REQUIRED_HEADERS)
+        for row in rows:
+            workbook.active.append(row)
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+    def _import(self, rows, mode="append"):
+        with XlsxSheet(self._workbook(rows)) as sheet:
+            return import_sheet(sheet, mode)
+
+    def _values(self):
+        return list(DocumentCalculation.objects.order_by("id").values_list(*self.FIELDS))
+
+    def _import_row_by_row(self, rows):
+        """Oldingi import: har qator uchun get_or_create, koeffitsient so'rovi va save()."""
+        for row in rows:
+            values = dict(zip(REQUIRED_HEADERS, row))
+            normative_type, document_category = values["normative_type"], values["document_category"]
+            if normative_type in DocumentCalculation.DocumentCategory.values:
+                normative_type, document_category = document_category, normative_type
+            instance = DocumentCalculation(
+                calculation_category=DocumentCalculationCategory.objects.get_or_create(name=values["category"])[0],
+                name=values["name"],
+                total_pages=values["total_pages"],
+                normative_type=normative_type,
+                document_category=document_category,
+                complexity_level=str(values["complexity_level"]).removesuffix(".0"),
+                is_research_required=False,
+                development_deadline=values["development_deadline"],
+                executor_organization=values["executor_organization"],
+                notes=values["notes"] or "",
+                completed_amount=to_decimal(values["completed_amount"]),
+            )
+            instance.apply_normative_coefficients()
+            instance.recalculate_final_total_amount()
+            instance.planned_amount = instance.final_total_amount - instance.completed_amount
+            instance.save()
+
+    def test_import_matches_row_by_row(self):
+        with transaction.atomic():
+            self._import_row_by_row(self.ROWS)
+            expected = self._values()
+            transaction.set_rollback(True)
+        self.assertEqual(self._import(self.ROWS), ({"created_count": 12, "updated_count": 0, "unchanged_count": 0}, []))
+        self.assertEqual(self._values(), expected)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        DocumentCalculationCategory.objects.create(name="1. Bob")
+        # kategoriyalar, koeffitsientlar, savepoint, yangi kategoriyalar,
+        # hujjatlar (bitta INSERT), release
+        with self.assertNumQueries(6):
+            self._import(self.ROWS)
+        with self.assertNumQueries(6):
+            self._import([[f"{row[0]} (yangi)", *row[1:]] for row in self.ROWS[:3]])
+
+        # upsert: kategoriyalar, koeffitsientlar, savepoint, mavjud yozuvlar indeksi,
+        # o'zgarganlar (bitta bulk_update), release
+        changed = [row[:5] + [row[5] + 1] + row[6:] for row in self.ROWS[:4]] + self.ROWS[4:]
+        DocumentCalculation.objects.all().delete()
+        self._import(self.ROWS)
+        with self.assertNumQueries(6):
+            counts, _ = self._import(changed, mode="upsert")
+        self.assertEqual(counts, {"created_count": 0, "updated_count": 4, "unchanged_count": 8})
+
+    def test_upsert_keeps_manual_research_flag(self):
+        self._import(self.ROWS)
+        flagged = DocumentCalculation.objects.get(name="Sinov hujjati 2")
+        flagged.is_research_required = True
+        flagged.recalculate_final_total_amount()
+        flagged.planned_amount = flagged.final_total_amount - flagged.completed_amount
+        flagged.save()
+        expected = self._values()
+
+        counts, errors = self._import(self.ROWS, mode="upsert")
+        self.assertEqual((counts, errors), ({"created_count": 0, "updated_count": 0, "unchanged_count": 12}, []))
+        self.assertEqual(self._values(), expected)
+
+        # Boshqa maydoni o'zgargan qator yangilanadi, belgi va 1.4 koeffitsient saqlanadi
+        changed = [row[:5] + [row[5] + 1] + row[6:] if row[1] == flagged.name else row for row in self.ROWS]
+        counts, _ = self._import(changed, mode="upsert")
+        self.assertEqual(counts["updated_count"], 1)
+        flagged.refresh_from_db()
+        self.assertTrue(flagged.is_research_required)
+        self.assertEqual(flagged.total_pages, 13)
+        self.assertEqual(
+            flagged.final_total_amount,
+            DocumentCalculation(
+                normative_type=flagged.normative_type,
+                selected_base_coefficient=flagged.selected_base_coefficient,
+                total_pages=13,
+                is_research_required=True,
+            ).recalculate_final_total_amount(),
+        )
+
+    @override_settings(XLSX_IMPORT_BATCH_SIZE=2)
+    def test_import_error_while_writing_keeps_file_for_resume(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        bad_row = [*self.ROWS[4][:6], "noma'lum", *self.ROWS[4][7:]]
+        with override_settings(MEDIA_ROOT=media_root.name):
+            # Tekshiruvdan o'tgan fayl yozish paytida boshqacha o'qildi (5-qator buzilgan)
+            job = XlsxImportJob.objects.create(
+                file=SimpleUploadedFile("baza.xlsx", self._workbook([*self.ROWS[:4], bad_row]).getvalue()),
+                phase=XlsxImportJob.Phase.WRITE,
+                status=XlsxImportJob.Status.RUNNING,
+            )
+            run_import_job(job)
+            job.refresh_from_db()
+            self.assertEqual(job.status, XlsxImportJob.Status.FAILED)
+            self.assertIn("6-qator", job.error)
+            self.assertEqual((job.checkpoint_row, job.created_count), (5, 4))
+            self.assertTrue(job.file and os.path.exists(job.file.path))
+
+            # Tekshiruv bosqichidagi xatoda davom ettiriladigan narsa yo'q — fayl o'chiriladi
+            job = XlsxImportJob.objects.create(
+                file=SimpleUploadedFile("baza.xlsx", self._workbook([]).getvalue()[:100]),
+                status=XlsxImportJob.Status.RUNNING,
+            )
+            path = job.file.path
+            run_import_job(job)
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.file.name), (XlsxImportJob.Status.FAILED, ""))
+            self.assertFalse(os.path.exists(path))
+
+
+class SheetsSyncTests(TestCase):
+    """Farq bo'yicha sinxronizatsiya va o'zgarmagan manbani o'tkazib yuborish."""
+
+    @staticmethod
+    def _record(name: str, pages: int) -> dict:
+        return {
+            "name": name,
+            "category_name": "1. Bob",
+            "normative_type": "shnq",
+            "document_category": DocumentCalculation.DocumentCategory.NEW,
+            "complexity_level": DocumentCalculation.ComplexityLevel.LEVEL_1,
+            "total_pages": pages,
+            "final_total_amount": Decimal("100.00"),
+            "sheet_total_amount": Decimal("100.000"),
+            "completed_amount": Decimal("0.000"),
+            "planned_amount": Decimal("0.000"),
+            "development_deadline": "",
+            "executor_organization": "",
+            "notes": "",
+        }
+
+    def test_sync_applies_only_differences(self):
+        sync_records([self._record("SHNQ A", 10), self._record("SHNQ B", 20)])
+        kept_id = DocumentCalculation.objects.get(name="SHNQ A").id
+        result = sync_records([self._record("SHNQ A", 10), self._record("SHNQ C", 30)])
+        self.assertEqual(result, {"created": 1, "updated": 0, "unchanged": 1, "deleted": 1, "skipped": False})
+        self.assertEqual(DocumentCalculation.objects.get(name="SHNQ A").id, kept_id)
+        result = sync_records([self._record("SHNQ A", 11), self._record("SHNQ C", 30)])
+        self.assertEqual((result["updated"], result["unchanged"]), (1, 1))
+
+    def test_sync_keeps_manual_fields_of_updated_rows(self):
+        sync_records([self._record("SHNQ A", 10), self._record("SHNQ B", 20)])
+        DocumentCalculation.objects.filter(name="SHNQ A").update(
+            contract_number="17-son",
+            is_research_required=True,
+            current_year_percent=Decimal("60"),
+            stage1_start="2026-yil I-chorak",
+            stage1_amount=Decimal("5000.00"),
+        )
+        kept = DocumentCalculation.objects.get(name="SHNQ A")
+
+        result = sync_records([self._record("SHNQ A", 15)])
+        self.assertEqual(result, {"created": 0, "updated": 1, "unchanged": 0, "deleted": 1, "skipped": False})
+        document = DocumentCalculation.objects.get()
+        self.assertEqual((document.pk, document.total_pages), (kept.pk, 15))
+        self.assertEqual(
+            (document.contract_number, document.is_research_required, document.current_year_percent,
+             document.stage1_start, document.stage1_amount),
+            ("17-son", True, Decimal("60.00"), "2026-yil I-chorak", Decimal("5000.00")),
+        )
+
+    def test_sync_matches_by_designation_and_duplicates_in_id_order(self):
+        designated = {**self._record("Eski nom", 10), "designation": "SHNQ 1.01-26"}
+        sync_records([designated, self._record("SHNQ D", 1), self._record("SHNQ D", 2)])
+        ids = list(DocumentCalculation.objects.order_by("id").values_list("id", flat=True))
+
+        # designation bo'yicha kalit: nomi va bobi o'zgarsa ham qator o'sha — yangilanadi
+        renamed = {**designated, "name": "Yangi nom", "category_name": "2. Bob"}
+        self.assertEqual(sync_records([renamed, self._record("SHNQ D", 1)], dry_run=True)["deleted"], 1)
+        self.assertEqual(DocumentCalculation.objects.count(), 3)
+        result = sync_records([renamed, self._record("SHNQ D", 1)])
+        self.assertEqual((result["updated"], result["unchanged"], result["deleted"]), (1, 1, 1))
+        document = DocumentCalculation.objects.get(designation="SHNQ 1.01-26")
+        self.assertEqual(
+            (document.pk, document.name, document.calculation_category.name), (ids[0], "Yangi nom", "2. Bob")
+        )
+        # Takrorlangan kalit: manbadagi birinchi qator eng kichik id'li qatorga bog'lanadi
+        self.assertEqual(
+            list(DocumentCalculation.objects.filter(name="SHNQ D").values_list("id", "total_pages")), [(ids[1], 1)]
+        )
+
+    def test_snapshot_detects_unchanged_source(self):
+        records = [self._record("SHNQ A", 10)]
+        sync_records(records)
+        Snapshot("file:test").save("rev-1", "hash-1", len(records))
+
+        snapshot = Snapshot("file:test")
+        self.assertTrue(snapshot.unchanged(revision="rev-1"))
+        self.assertFalse(snapshot.unchanged(revision="rev-2"))
+        self.assertTrue(snapshot.unchanged(content_hash="hash-1"))
+        self.assertFalse(Snapshot("file:test", force=True).unchanged(revision="rev-1"))
+
+        # Jadval qo'lda o'zgartirilgan — manba o'zgarmagan bo'lsa ham qayta solishtiriladi
+        document = DocumentCalculation.objects.get()
+        document.notes = "qo'lda"
+        document.save()
+        self.assertFalse(Snapshot("file:test").unchanged(revision="rev-1"))
+
+    def test_file_sources_yield_same_rows(self):
+        rows = [["1. Bob", "", "", ""], ["1", "", "SHNQ A", "1250,5", "", "", "", "", "", "12", "я", "1", "", "ш"]]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xlsx_path = os.path.join(tmp_dir, "baza.xlsx")
+            workbook = Workbook()
+            for row in rows:
+                workbook.active.append([value or None for value in row])
+            workbook.save(xlsx_path)
+            csv_path = os.path.join(tmp_dir, "baza.csv")
+            with open(csv_path, "w", encoding="utf-8-sig") as fh:
+                fh.write("\n".join(";".join(row) for row in rows))
+
+            with XlsxSource(xlsx_path) as source:
+                self.assertFalse(source.import_layout)
+                xlsx_rows = list(source.rows())
+            with CsvSource(csv_path) as source:
+                csv_rows = list(source.rows())
+        padded = [row + [""] * (14 - len(row)) for row in rows]
+        self.assertEqual(xlsx_rows, padded)
+        self.assertEqual([row + [""] * (14 - len(row)) for row in csv_rows], padded)
+
+    def test_only_one_active_sync_job_per_source(self):
+        job, created = enqueue_sync("sheets:test")
+        self.assertTrue(created)
+        self.assertEqual(enqueue_sync("sheets:test", force=True), (job, False))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SheetSyncJob.objects.create(source="sheets:test", status=SheetSyncJob.Status.RUNNING)
+
+        SheetSyncJob.objects.filter(pk=job.pk).update(status=SheetSyncJob.Status.DONE)
+        next_job, created = enqueue_sync("sheets:test")
+        self.assertTrue(created)
+        self.assertNotEqual(next_job.pk, job.pk)
+
+    def test_reload_keeps_ids_and_rollback_restores_previous(self):
+        sync_records([self._record("SHNQ A", 10), self._record("SHNQ B", 20)])
+        ids = dict(DocumentCalculation.objects.values_list("name", "id"))
+        DocumentCalculation.objects.filter(name__in=["SHNQ A", "SHNQ B"]).update(is_research_required=True)
+
+        result = reload_records([self._record("SHNQ A", 11), self._record("SHNQ C", 30)])
+        self.assertEqual(
+            [result[key] for key in ("created", "updated", "unchanged", "deleted")], [1, 1, 0, 1]
+        )
+        # Kalit bo'yicha topilgan qator joyida yangilanadi: id va qo'lda kiritilgan maydonlar saqlanadi
+        document = DocumentCalculation.objects.get(name="SHNQ A")
+        self.assertEqual((document.id, document.total_pages, document.is_research_required), (ids["SHNQ A"], 11, True))
+        self.assertEqual(sorted(DocumentCalculation.objects.values_list("name", flat=True)), ["SHNQ A", "SHNQ C"])
+        self.assertFalse(DatasetRecord.objects.filter(generation__status=DatasetGeneration.Status.ACTIVE).exists())
+
+        # O'chirilgan qator o'sha id bilan, yangi qator esa o'chib qaytadi
+        self.assertIsNotNone(rollback_generation())
+        restored = dict(DocumentCalculation.objects.values_list("name", "id"))
+        self.assertEqual(restored, ids)
+        document = DocumentCalculation.objects.get(name="SHNQ A")
+        self.assertEqual((document.total_pages, document.is_research_required), (10, True))
+        self.assertTrue(DocumentCalculation.objects.get(name="SHNQ B").is_research_required)
+
+        # Rollback ham qaytariladi
+        self.assertIsNotNone(rollback_generation())
+        self.assertEqual(sorted(DocumentCalculation.objects.values_list("name", flat=True)), ["SHNQ A", "SHNQ C"])
+        self.assertEqual(DatasetGeneration.objects.count(), 2)
+
+    def test_reads_and_writes_have_no_generation_overhead(self):
+        with self.assertNumQueries(1):
+            DocumentCalculation.objects.create(name="SHNQ A", total_pages=10)
+        self.assertNotIn("JOIN", str(DocumentCalculation.objects.all().query))
@@ -1,6 +1,9 @@
 from django.urls import path
 
 from .views import (
+    BulkExportJobCreateAPIView,
+    BulkExportJobDetailAPIView,
+    BulkExportJobDownloadAPIView,
     DashboardStatsAPIView,
     DocumentCalculationCategoryListAPIView,
     DocumentCalculationListCreateAPIView,
@@ -9,6 +12,7 @@ from .views import (
     DocumentCalculationXlsxImportAPIView,
     DocumentBayonnomaAPIView,
     DocumentBayonnomaBulkAPIView,
+    DocumentBundleAPIView,
     DocumentContractAPIView,
     DocumentContractBulkAPIView,
     DocumentKalkulatsiyaAPIView,
@@ -20,7 +24,10 @@ from .views import (
     HealthCheckAPIView,
     NormativeCoefficientListAPIView,
     OrganizationSettingsAPIView,
+    SheetSyncJobDetailAPIView,
     SyncFromSheetsAPIView,
+    XlsxImportJobCreateAPIView,
+    XlsxImportJobDetailAPIView,
 )
 
 
@@ -41,6 +48,16 @@ urlpatterns = [
         DocumentCalculationXlsxImportAPIView.as_view(),
         name="document-calculations-import-xlsx",
     ),
+    path(
+        "document-calculations/import-jobs/",
+        XlsxImportJobCreateAPIView.as_view(),
+        name="document-calculations-import-jobs",
+    ),
+    path(
+        "document-calculations/import-jobs/<int:pk>/",
+        XlsxImportJobDetailAPIView.as_view(),
+        name="document-calculations-import-job-detail",
+    ),
     path(
         "document-calculations/report-table/",
         DocumentCalculationReportTableAPIView.as_view(),
@@ -76,6 +93,11 @@ urlpatterns = [
         DocumentKalkulatsiyaAPIView.as_view(),
         name="document-calculation-kalkulatsiya",
     ),
+    path(
+        "document-calculations/<int:pk>/bundle/",
+        DocumentBundleAPIView.as_view(),
+        name="document-calculation-bundle",
+    ),
     path(
         "document-calculations/kalkulatsiya-bulk/",
         DocumentKalkulatsiyaBulkAPIView.as_view(),
@@ -101,6 +123,13 @@ urlpatterns = [
         DocumentBayonnomaBulkAPIView.as_view(),
         name="document-calculation-bayonnoma-bulk",
     ),
+    path("bulk-exports/", BulkExportJobCreateAPIView.as_view(), name="bulk-exports"),
+    path("bulk-exports/<int:pk>/", BulkExportJobDetailAPIView.as_view(), name="bulk-export-detail"),
+    path(
+        "bulk-exports/<int:pk>/download/",
+        BulkExportJobDownloadAPIView.as_view(),
+        name="bulk-export-download",
+    ),
     path(
         "organization-settings/",
         OrganizationSettingsAPIView.as_view(),
@@ -111,4 +140,9 @@ urlpatterns = [
         SyncFromSheetsAPIView.as_view(),
         name="sync-sheets",
     ),
+    path(
+        "sync-sheets/<int:pk>/",
+        SheetSyncJobDetailAPIView.as_view(),
+        name="sync-sheets-job-detail",
+    ),
 ]
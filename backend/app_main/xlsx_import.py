@@ -0,0 +1,693 @@
+"""XLSX fayldan DocumentCalculation yozuvlarini import qilish.
+
+Qatorlarni o'qish va tekshirish HTTP view'ga bog'liq emas: sinxron import
+(DocumentCalculationXlsxImportAPIView) va fonda bo'laklab bajariladigan import
+vazifasi (XlsxImportJob, `manage.py run_export_worker`) bir xil kodni ishlatadi.
+
+Fon vazifasi ikki bosqichda ishlaydi: avval butun fayl tekshiriladi (hech narsa
+yozilmaydi; dry-run shu yerda tugaydi), xato bo'lmasa qatorlar bo'laklab yoziladi.
+Har bir bo'lak o'z tranzaksiyasida va nazorat nuqtasi (checkpoint_row) bilan birga
+commit qilinadi — worker to'xtab qolsa, vazifa oxirgi yozilgan qatordan davom etadi.
+
+Ikki rejim (XlsxImportJob.Mode): append — har bir qator yangi yozuv; upsert —
+qator tabiiy kalit (designation, bo'sh bo'lsa nomi + kategoriya) bo'yicha mavjud
+yozuvga bog'lanadi va faqat maydonlari o'zgargan bo'lsa yangilanadi. Faylni qayta
+import qilish o'zgarmagan qatorlarni bazaga umuman yozmaydi.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .models import DocumentCalculation, DocumentCalculationCategory, NormativeCoefficient, XlsxImportJob
+from .xlsx_reader import XlsxFormatError, XlsxReader
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_HEADERS = [
+    "category",
+    "name",
+    "development_deadline",
+    "executor_organization",
+    "notes",
+    "total_pages",
+    "normative_type",
+    "document_category",
+    "complexity_level",
+    "completed_amount",
+]
+
+# Yakuniy summa ustunining muqobil nomlari (birinchi topilgani olinadi)
+FINAL_TOTAL_HEADERS = ("final_total_amount", "final_total", "total_amount", "umumiy_narxi")
+
+# Ixtiyoriy ustun: bo'lsa upsert kaliti sifatida ishlatiladi
+DESIGNATION_HEADER = "designation"
+
+# RowBuilder to'ldiradigan maydonlar: upsert rejimida qator xeshi shulardan olinadi
+# va mavjud yozuvda aynan shular yangilanadi (kategoriya alohida — nomi bo'yicha).
+# is_research_required faylda yo'q, qo'lda belgilanadi — upsert uni o'zgartirmaydi
+# (Sheets sinxronizatsiyasi kabi), summa esa mavjud yozuv belgisi bilan hisoblanadi
+UPSERT_FIELDS = (
+    "designation",
+    "name",
+    "total_pages",
+    "normative_type",
+    "document_category",
+    "complexity_level",
+    "development_deadline",
+    "executor_organization",
+    "notes",
+    "completed_amount",
+    "selected_base_coefficient",
+    "selected_complexity_coefficient",
+    "final_total_amount",
+    "planned_amount",
+)
+
+# Fon vazifasida progress va heartbeat bazaga ko'pi bilan shuncha soniyada bir marta yoziladi
+PROGRESS_INTERVAL = 1.0
+
+
+class XlsxImportError(Exception):
+    """Faylni umuman import qilib bo'lmaydi (o'qilmadi, bo'sh, ustunlar yetishmaydi).
+
+    extra — javobga qo'shiladigan qo'shimcha maydonlar (masalan missing_headers).
+    """
+
+    def __init__(self, detail: str, **extra):
+        super().__init__(detail)
+        self.detail = detail
+        self.extra = extra
+
+
+def normalize_header(value) -> str:
+    if value is None:
+        return ""
+    return str(value).strip().lower().replace(" ", "_")
+
+
+def to_text(value, default: str = "") -> str:
+    if value is None:
+        return default
+    return str(value).strip()
+
+
+def to_int(value, default: int = 0) -> int:
+    if value in (None, ""):
+        return default
+    try:
+        return int(float(str(value).replace(",", ".").strip()))
+    except (TypeError, ValueError):
+        return default
+
+
+def to_decimal(value, default: Decimal = Decimal("0.00")) -> Decimal:
+    if value in (None, ""):
+        return default
+    if isinstance(value, Decimal):
+        return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    normalized = str(value).replace("\u00a0", "").replace(" ", "").replace(",", ".").strip()
+    try:
+        return Decimal(normalized).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return default
+
+
+class XlsxSheet:
+    """Faol varaq: sarlavha indekslari va qatorlar oqimi.
+
+    Qatorlar fayldan oqim bilan o'qiladi — butun varaq xotiraga yuklanmaydi.
+    XLSX_IMPORT_READER="native" (standart) bo'lsa XlsxReader faqat import uchun
+    kerakli ustunlarni o'qiydi va header_index shu ustunlar tartibiga moslanadi;
+    "openpyxl" bo'lsa read_only workbook to'liq qatorlarni beradi. Kontekst
+    menejeri sifatida ishlatiladi (fayl yopiladi).
+    """
+
+    def __init__(self, source):
+        self._native = settings.XLSX_IMPORT_READER == "native"
+        try:
+            if self._native:
+                self._book = XlsxReader(source)
+            else:
+                self._book = load_workbook(source, read_only=True, data_only=True)
+        except Exception as exc:
+            raise XlsxImportError("XLSX faylni o'qib bo'lmadi.") from exc
+        try:
+            self._read_header()
+        except XlsxFormatError as exc:
+            self._book.close()
+            raise XlsxImportError("XLSX faylni o'qib bo'lmadi.") from exc
+        except Exception:
+            self._book.close()
+            raise
+
+    def _read_header(self):
+        if self._native:
+            # <dimension> bo'yicha taxminiy qatorlar soni — faqat progress uchun
+            self.estimated_rows = max(self._book.max_row - 1, 0) if self._book.max_row else None
+            header_rows = self._book.rows()
+            try:
+                header_row_number, header_row = next(header_rows, (1, None))
+            finally:
+                header_rows.close()
+        else:
+            worksheet = self._book.active
+            self.estimated_rows = max(worksheet.max_row - 1, 0) if worksheet.max_row else None
+            # Ba'zi dasturlar <dimension>ni noto'g'ri yozadi — varaq chegarasini o'zimiz aniqlaymiz
+            worksheet.reset_dimensions()
+            self._rows = worksheet.iter_rows(values_only=True)
+            header_row_number, header_row = 1, next(self._rows, None)
+        if not header_row:
+            raise XlsxImportError("XLSX fayl bo'sh.")
+
+        headers = [normalize_header(cell) for cell in header_row]
+        self.header_index = {header: idx for idx, header in enumerate(headers) if header}
+        missing_headers = [header for header in REQUIRED_HEADERS if header not in self.header_index]
+        if missing_headers:
+            raise XlsxImportError("XLSX ustunlari to'liq emas.", missing_headers=missing_headers)
+        self.final_total_header = next((key for key in FINAL_TOTAL_HEADERS if key in self.header_index), None)
+
+        if self._native:
+            # Faqat RowBuilder o'qiydigan ustunlar: qator tuple'ida shu tartibda keladi
+            used = [*REQUIRED_HEADERS, DESIGNATION_HEADER, self.final_total_header]
+            used = [header for header in dict.fromkeys(used) if header in self.header_index]
+            self._columns = [self.header_index[header] for header in used]
+            self.header_index = {header: position for position, header in enumerate(used)}
+            self._first_row = header_row_number + 1
+
+    def rows(self):
+        """(qator raqami, qiymatlar) juftliklari — sarlavhadan keyingi qatorlar."""
+        if not self._native:
+            return enumerate(self._rows, start=2)
+        return self._native_rows()
+
+    def _native_rows(self):
+        try:
+            yield from self._book.rows(self._columns, min_row=self._first_row)
+        except XlsxFormatError as exc:
+            raise XlsxImportError("XLSX faylni o'qib bo'lmadi.") from exc
+
+    def close(self):
+        self._book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RowBuilder:
+    """Varaq qatorlaridan DocumentCalculation obyektlarini yasaydi (bazaga yozmaydi).
+
+    Kategoriyalar va faol koeffitsientlar bir marta yuklanadi — so'rovlar soni
+    fayldagi qatorlar soniga bog'liq emas. Yangi kategoriyalar save() paytida
+    hujjatlar bilan birga bulk_create qilinadi.
+
+    research_keys — ilmiy tadqiqot belgilangan mavjud yozuvlar kalitlari (upsert
+    rejimida UpsertIndex to'ldiradi): shunday qatorlar summasi 1.4 koeffitsient bilan
+    hisoblanadi, aks holda upsert qo'lda belgilangan summani tushirib yuborardi.
+    """
+
+    def __init__(self, sheet: XlsxSheet):
+        self.header_index = sheet.header_index
+        self.final_total_header = sheet.final_total_header
+        self.normative_values = {choice[0] for choice in NormativeCoefficient.NormativeType.choices}
+        self.document_category_values = {choice[0] for choice in DocumentCalculation.DocumentCategory.choices}
+        self.complexity_values = {choice[0] for choice in DocumentCalculation.ComplexityLevel.choices}
+        self.categories = {category.name: category for category in DocumentCalculationCategory.objects.all()}
+        self.new_categories = []
+        self.matrices = NormativeCoefficient.active_by_type()
+        self.research_keys = frozenset()
+
+    def build(self, row_number: int, row) -> tuple[DocumentCalculation | None, dict | None]:
+        """(hujjat, None) — to'g'ri qator; (None, xato) — noto'g'ri; (None, None) — bo'sh qator."""
+        if row is None:
+            return None, None
+        if all(value in (None, "") for value in row):
+            return None, None
+
+        header_index = self.header_index
+        get_value = lambda key: (
+            row[header_index[key]] if key in header_index and header_index[key] < len(row) else None
+        )
+
+        name = to_text(get_value("name"))
+        if not name:
+            return None, None
+
+        designation = to_text(get_value(DESIGNATION_HEADER))
+        if len(designation) > DocumentCalculation._meta.get_field("designation").max_length:
+            return None, {
+                "row": row_number,
+                "field": "designation",
+                "message": f"Juda uzun qiymat: {designation[:20]}...",
+            }
+        category_name = to_text(get_value("category"))
+        development_deadline = to_text(get_value("development_deadline"))
+        executor_organization = to_text(get_value("executor_organization"))
+        notes = to_text(get_value("notes"))
+        total_pages = max(to_int(get_value("total_pages"), default=0), 0)
+        complexity_level = to_text(get_value("complexity_level"))
+        if complexity_level.endswith(".0"):
+            complexity_level = complexity_level[:-2]
+
+        raw_normative = to_text(get_value("normative_type"))
+        raw_document_category = to_text(get_value("document_category"))
+
+        # Fayldagi ustunlar joylashuvi almashib qolsa avtomatik tuzatamiz.
+        if raw_normative in self.document_category_values and raw_document_category in self.normative_values:
+            raw_normative, raw_document_category = raw_document_category, raw_normative
+
+        if raw_normative not in self.normative_values:
+            return None, {
+                "row": row_number,
+                "field": "normative_type",
+                "message": f"Noto'g'ri qiymat: {raw_normative}",
+            }
+        if raw_document_category not in self.document_category_values:
+            return None, {
+                "row": row_number,
+                "field": "document_category",
+                "message": f"Noto'g'ri qiymat: {raw_document_category}",
+            }
+        if complexity_level not in self.complexity_values:
+            return None, {
+                "row": row_number,
+                "field": "complexity_level",
+                "message": f"Noto'g'ri qiymat: {complexity_level}",
+            }
+
+        completed_amount = to_decimal(get_value("completed_amount"))
+        final_total_from_xlsx = (
+            to_decimal(row[header_index[self.final_total_header]], default=Decimal("0.00"))
+            if self.final_total_header and header_index[self.final_total_header] < len(row)
+            else None
+        )
+        category_obj = None
+        if category_name:
+            category_obj = self.categories.get(category_name)
+            if category_obj is None:
+                category_obj = DocumentCalculationCategory(name=category_name)
+                self.categories[category_name] = category_obj
+                self.new_categories.append(category_obj)
+
+        instance = DocumentCalculation(
+            calculation_category=category_obj,
+            designation=designation,
+            name=name,
+            total_pages=total_pages,
+            normative_type=raw_normative,
+            document_category=raw_document_category,
+            complexity_level=complexity_level,
+            is_research_required=natural_key(designation, name, category_name) in self.research_keys,
+            development_deadline=development_deadline,
+            executor_organization=executor_organization,
+            notes=notes,
+            completed_amount=completed_amount,
+        )
+        instance.apply_normative_coefficients(self.matrices)
+
+        if final_total_from_xlsx is not None:
+            instance.final_total_amount = final_total_from_xlsx
+        else:
+            instance.recalculate_final_total_amount()
+
+        # Shart: planned = final_total - completed, completed=0 bo'lsa planned=final_total bo'ladi.
+        instance.planned_amount = (instance.final_total_amount - completed_amount).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        return instance, None
+
+    def save(self, instances: list[DocumentCalculation]) -> None:
+        """Yangi kategoriyalarni, keyin hujjatlarni bulk_create qiladi."""
+        # Kategoriyalar avval yoziladi — hujjatlar ularning id'siga bog'lanadi
+        if self.new_categories:
+            DocumentCalculationCategory.objects.bulk_create(self.new_categories)
+            self.new_categories.clear()
+        DocumentCalculation.objects.bulk_create(instances)
+
+
+def natural_key(designation: str, name: str, category_name: str) -> tuple:
+    """Upsert kaliti: designation, u bo'sh bo'lsa (hujjat nomi, kategoriya nomi)."""
+    if designation:
+        return ("designation", designation)
+    return ("name", name, category_name)
+
+
+# DecimalField nomi → kasr xonalari soni (qator xeshida qiymatlarni bir xil ko'rinishga keltirish uchun)
+_DECIMAL_PLACES = {
+    field.name: field.decimal_places
+    for field in DocumentCalculation._meta.concrete_fields
+    if isinstance(field, models.DecimalField)
+}
+
+
+def row_hash(category_name: str, values, fields=UPSERT_FIELDS) -> bytes:
+    """fields maydonlari qiymatlari (shu tartibda) va kategoriya nomi xeshi.
+
+    Decimal qiymatlar ustunning kasr xonalariga keltiriladi — fayldagi 1250.5 va
+    bazadagi 1250.500 bir xil xesh beradi.
+    """
+    parts = [category_name or ""]
+    for name, value in zip(fields, values):
+        if value is None:
+            parts.append("")
+        elif name in _DECIMAL_PLACES:
+            exponent = Decimal(1).scaleb(-_DECIMAL_PLACES[name])
+            parts.append(str(Decimal(value).quantize(exponent, rounding=ROUND_HALF_UP)))
+        else:
+            parts.append(str(value))
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+
+class UpsertIndex:
+    """Mavjud yozuvlar indeksi: tabiiy kalit → (id, qator xeshi).
+
+    Bazadan bir so'rov bilan faqat UPSERT_FIELDS va ilmiy tadqiqot belgisi o'qiladi
+    (model obyektlari yasalmaydi). Bir kalitli bir nechta yozuv bo'lsa eng kichik
+    id'lisi olinadi.
+    Fayl ichida takrorlangan kalit xato — aks holda keyingi qator oldingisini
+    jimgina bosib ketardi.
+    """
+
+    INSERT = "insert"
+    UPDATE = "update"
+    UNCHANGED = "unchanged"
+
+    def __init__(self):
+        self.entries = {}
+        self.research_keys = set()
+        self.seen = set()
+        rows = DocumentCalculation.objects.order_by("id").values_list(
+            "id", "calculation_category__name", "is_research_required", *UPSERT_FIELDS
+        )
+        designation_pos = UPSERT_FIELDS.index("designation")
+        name_pos = UPSERT_FIELDS.index("name")
+        for pk, category_name, research_required, *values in rows.iterator(chunk_size=2000):
+            key = natural_key(values[designation_pos], values[name_pos], category_name or "")
+            if key not in self.entries:
+                self.entries[key] = (pk, row_hash(category_name, values))
+                if research_required:
+                    self.research_keys.add(key)
+
+    def classify(self, row_number: int, instance: DocumentCalculation) -> tuple[str | None, dict | None]:
+        """(amal, None) yoki (None, xato). UPDATE/UNCHANGED'da instance.pk o'rnatiladi."""
+        category_name = instance.calculation_category.name if instance.calculation_category else ""
+        key = natural_key(instance.designation, instance.name, category_name)
+        if key in self.seen:
+            return None, {
+                "row": row_number,
+                "field": "designation" if instance.designation else "name",
+                "message": f"Takrorlangan kalit: {' / '.join(part for part in key[1:] if part)}",
+            }
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            return self.INSERT, None
+        instance.pk, digest = entry
+        if row_hash(category_name, [getattr(instance, name) for name in UPSERT_FIELDS]) == digest:
+            return self.UNCHANGED, None
+        return self.UPDATE, None
+
+
+class ImportWriter:
+    """Tekshirilgan obyektlarni to'plab, flush() paytida bazaga yozadi.
+
+    append — har bir obyekt bulk_create qilinadi; upsert — UpsertIndex bo'yicha
+    yangilari bulk_create, o'zgarganlari bulk_update qilinadi, o'zgarmaganlari
+    faqat sanaladi.
+    """
+
+    def __init__(self, builder: RowBuilder, mode: str = XlsxImportJob.Mode.APPEND):
+        self.builder = builder
+        self.index = UpsertIndex() if mode == XlsxImportJob.Mode.UPSERT else None
+        if self.index is not None:
+            builder.research_keys = self.index.research_keys
+        self.to_create = []
+        self.to_update = []
+        self.unchanged = 0
+        self.counts = {"created_count": 0, "updated_count": 0, "unchanged_count": 0}
+
+    @property
+    def pending(self) -> int:
+        """Oxirgi flush()'dan beri qo'shilgan qatorlar (o'zgarmaganlari ham — fon
+        vazifasida checkpoint faqat yozmaydigan qatorlar bo'yicha ham siljishi uchun)."""
+        return len(self.to_create) + len(self.to_update) + self.unchanged
+
+    def add(self, row_number: int, instance: DocumentCalculation) -> dict | None:
+        """Obyektni navbatga qo'shadi; kalit takrorlangan bo'lsa xatoni qaytaradi."""
+        action = UpsertIndex.INSERT
+        if self.index is not None:
+            action, error = self.index.classify(row_number, instance)
+            if error is not None:
+                return error
+        if action == UpsertIndex.INSERT:
+            self.to_create.append(instance)
+        elif action == UpsertIndex.UPDATE:
+            self.to_update.append(instance)
+        else:
+            self.unchanged += 1
+        return None
+
+    def clear(self) -> None:
+        """Navbatdagilarni yozmasdan tashlab yuboradi (sonlari hisobga olinadi)."""
+        self.counts["created_count"] += len(self.to_create)
+        self.counts["updated_count"] += len(self.to_update)
+        self.counts["unchanged_count"] += self.unchanged
+        self.to_create = []
+        self.to_update = []
+        self.unchanged = 0
+
+    def flush(self) -> dict:
+        """Navbatdagilarni yozadi va shu bo'lakdagi sonlarni qaytaradi."""
+        batch_counts = {
+            "created_count": len(self.to_create),
+            "updated_count": len(self.to_update),
+            "unchanged_count": self.unchanged,
+        }
+        self.builder.save(self.to_create)
+        if self.to_update:
+            now = timezone.now()
+            for instance in self.to_update:
+                instance.updated_at = now
+            DocumentCalculation.objects.bulk_update(
+                self.to_update, [*UPSERT_FIELDS, "calculation_category", "updated_at"]
+            )
+        self.clear()
+        return batch_counts
+
+
+def import_sheet(sheet: XlsxSheet, mode: str = XlsxImportJob.Mode.APPEND) -> tuple[dict, list[dict]]:
+    """Varaqni bitta tranzaksiyada import qiladi: (created/updated/unchanged_count, xatolar).
+
+    Hammasi yoki hech narsa: birorta xato bo'lsa tranzaksiya bekor qilinadi.
+    Xato topilgach yozish to'xtaydi, lekin barcha xatolarni qaytarish uchun
+    qolgan qatorlar tekshirilishda davom etadi.
+    """
+    builder = RowBuilder(sheet)
+    batch_size = max(1, settings.XLSX_IMPORT_BATCH_SIZE)
+    errors = []
+
+    with transaction.atomic():
+        writer = ImportWriter(builder, mode)
+        for row_number, row in sheet.rows():
+            instance, error = builder.build(row_number, row)
+            if error is None and instance is not None:
+                error = writer.add(row_number, instance)
+            if error is not None:
+                errors.append(error)
+                continue
+            if errors:
+                writer.clear()
+            elif writer.pending >= batch_size:
+                writer.flush()
+
+        if errors:
+            transaction.set_rollback(True)
+            return {key: 0 for key in writer.counts}, errors
+        writer.flush()
+    return writer.counts, []
+
+
+# ---------------------------------------------------------------------------
+# Fon import vazifalari (XlsxImportJob)
+# ---------------------------------------------------------------------------
+
+
+def claim_next_import_job() -> XlsxImportJob | None:
+    """Navbatdagi eng eski import vazifasini egallaydi (bo'lmasa None)."""
+    while True:
+        job_id = (
+            XlsxImportJob.objects.filter(status=XlsxImportJob.Status.QUEUED)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = XlsxImportJob.objects.filter(pk=job_id, status=XlsxImportJob.Status.QUEUED).update(
+            status=XlsxImportJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return XlsxImportJob.objects.get(pk=job_id)
+        # vazifani boshqa worker oldi — keyingisini olamiz
+
+
+def requeue_stale_import_jobs() -> int:
+    """Heartbeat'i XLSX_IMPORT_STALE_SECONDS'dan beri yangilanmagan RUNNING vazifalarni
+    qayta navbatga qo'yadi. Bosqich va checkpoint saqlanadi — yozish davom ettiriladi."""
+    cutoff = timezone.now() - timedelta(seconds=settings.XLSX_IMPORT_STALE_SECONDS)
+    return XlsxImportJob.objects.filter(status=XlsxImportJob.Status.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=XlsxImportJob.Status.QUEUED,
+        heartbeat_at=None,
+    )
+
+
+def _validate_job(job: XlsxImportJob) -> bool:
+    """1-bosqich: butun faylni tekshiradi, hech narsa yozmaydi. Xato bo'lmasa True.
+
+    Xatolar ro'yxati (ko'pi bilan XLSX_IMPORT_MAX_ERRORS ta) progress bilan birga
+    bazaga yozib boriladi — status endpoint ularni tekshiruv davomida ko'rsatadi.
+    """
+    max_errors = settings.XLSX_IMPORT_MAX_ERRORS
+    with XlsxSheet(job.file.path) as sheet:
+        builder = RowBuilder(sheet)
+        # Faqat tasniflash uchun (takrorlangan kalitlar, dry-run sonlari) — hech narsa yozilmaydi
+        writer = ImportWriter(builder, job.mode)
+        errors = []
+        error_count = valid_count = processed = 0
+        XlsxImportJob.objects.filter(pk=job.pk).update(
+            total_rows=sheet.estimated_rows, processed_rows=0, valid_count=0, error_count=0, errors=[]
+        )
+
+        def report(**fields):
+            XlsxImportJob.objects.filter(pk=job.pk).update(
+                processed_rows=processed,
+                valid_count=valid_count,
+                error_count=error_count,
+                errors=errors,
+                heartbeat_at=timezone.now(),
+                **fields,
+            )
+
+        last_write = time.monotonic()
+        for row_number, row in sheet.rows():
+            processed += 1
+            instance, error = builder.build(row_number, row)
+            if error is None and instance is not None:
+                error = writer.add(row_number, instance)
+                writer.clear()
+            if error is not None:
+                error_count += 1
+                if len(errors) < max_errors:
+                    errors.append(error)
+            elif instance is not None:
+                valid_count += 1
+            if time.monotonic() - last_write >= PROGRESS_INTERVAL:
+                report()
+                last_write = time.monotonic()
+        # Endi aniq qatorlar soni ma'lum. Dry-run'da yaratiladigan/yangilanadigan yozuvlar
+        # soni ham yoziladi (haqiqiy importda ularni yozish bosqichi sanaydi)
+        report(total_rows=processed, **(writer.counts if job.dry_run else {}))
+    return error_count == 0
+
+
+def _write_job(job: XlsxImportJob) -> None:
+    """2-bosqich: checkpoint_row'dan keyingi qatorlarni bo'laklab yozadi.
+
+    Har bir bo'lak va yangi checkpoint bitta tranzaksiyada commit qilinadi —
+    yozilgan qatorlar va checkpoint hech qachon bir-biridan farq qilmaydi.
+    """
+    job.refresh_from_db()
+    checkpoint = job.checkpoint_row
+    batch_size = max(1, settings.XLSX_IMPORT_BATCH_SIZE)
+    with XlsxSheet(job.file.path) as sheet:
+        builder = RowBuilder(sheet)
+        # Davom ettirilganda indeks oldingi bo'laklarda yozilganlarni ham o'z ichiga oladi
+        writer = ImportWriter(builder, job.mode)
+        processed = 0
+        last_row = checkpoint
+
+        def commit():
+            with transaction.atomic():
+                counts = writer.flush()
+                XlsxImportJob.objects.filter(pk=job.pk).update(
+                    checkpoint_row=last_row,
+                    processed_rows=processed,
+                    heartbeat_at=timezone.now(),
+                    **{key: F(key) + value for key, value in counts.items()},
+                )
+
+        for row_number, row in sheet.rows():
+            processed += 1
+            if row_number <= checkpoint:
+                continue
+            instance, error = builder.build(row_number, row)
+            if error is None and instance is not None:
+                error = writer.add(row_number, instance)
+            if error is not None:
+                raise XlsxImportError(f"{row_number}-qator tekshiruvdan keyin o'zgargan: {error['message']}")
+            last_row = row_number
+            if writer.pending >= batch_size:
+                commit()
+        commit()
+
+
+def _finish_job(job: XlsxImportJob, status: str, keep_file: bool = False, **fields) -> None:
+    XlsxImportJob.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now(), **fields)
+    # Yuklangan fayl faqat vazifa davomida kerak (yozish bosqichida to'xtagan vazifani
+    # davom ettirish uchun esa saqlab qolinadi)
+    if job.file and not keep_file:
+        job.file.delete(save=False)
+        XlsxImportJob.objects.filter(pk=job.pk).update(file="")
+
+
+def _fail_job(job: XlsxImportJob, message: str) -> None:
+    """Vazifani FAILED qiladi. Yozish bosqichida commit qilingan bo'laklar saqlanadi va
+    fayl o'chirilmaydi — qayta navbatga qo'yish (admin) checkpoint'dan davom ettiradi."""
+    job.refresh_from_db(fields=["phase"])
+    _finish_job(
+        job, XlsxImportJob.Status.FAILED, keep_file=job.phase == XlsxImportJob.Phase.WRITE, error=message
+    )
+
+
+def run_import_job(job: XlsxImportJob) -> None:
+    """Egallangan import vazifasini bajaradi (tekshiruv, keyin bo'laklab yozish).
+
+    Dry-run faqat tekshiruv bosqichini bajaradi. Tekshiruvda xato bo'lsa hech narsa
+    yozilmaydi va vazifa FAILED bo'ladi — avvalgi "hammasi yoki hech narsa" qoidasi.
+    """
+    try:
+        if job.phase == XlsxImportJob.Phase.VALIDATE:
+            valid = _validate_job(job)
+            if job.dry_run:
+                _finish_job(job, XlsxImportJob.Status.DONE)
+                return
+            if not valid:
+                _finish_job(job, XlsxImportJob.Status.FAILED, error="XLSX importda xatoliklar bor.")
+                return
+            XlsxImportJob.objects.filter(pk=job.pk).update(
+                phase=XlsxImportJob.Phase.WRITE, processed_rows=0, created_count=0, updated_count=0, unchanged_count=0
+            )
+        _write_job(job)
+    except XlsxImportError as exc:
+        missing = exc.extra.get("missing_headers")
+        _fail_job(job, f"{exc.detail} ({', '.join(missing)})" if missing else exc.detail)
+        return
+    except Exception as exc:
+        logger.exception("XLSX import #%s bajarilmadi", job.pk)
+        _fail_job(job, str(exc))
+        return
+    _finish_job(job, XlsxImportJob.Status.DONE)
@@ -0,0 +1,235 @@
+"""Yengil .xlsx o'quvchi: varaq XML'i zip ichidan to'g'ridan-to'g'ri (lxml iterparse).
+
+openpyxl read_only rejimda ham har bir katak uchun obyekt yaratadi va uslublarni
+o'qiydi. Import va Sheets sinxronizatsiyasiga faqat bir nechta ustunning oddiy
+qiymatlari kerak — XlsxReader umumiy satrlar jadvali (sharedStrings.xml) va varaq
+qatorlarini oqim bilan o'qib, faqat so'ralgan ustunlar qiymatlarini tuple qilib
+beradi.
+
+Qiymatlar openpyxl(data_only=True) bilan bir xil: satr, int/float, bool, xato
+matni (#REF!) yoki None. Farqi: uslublar o'qilmaydi — sana formatidagi raqam
+datetime'ga emas, Excel seriya raqamiga (float) aylanadi.
+"""
+
+import posixpath
+import zipfile
+
+from lxml import etree
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_ROW = f"{{{MAIN_NS}}}row"
+_CELL = f"{{{MAIN_NS}}}c"
+_VALUE = f"{{{MAIN_NS}}}v"
+_TEXT = f"{{{MAIN_NS}}}t"
+_RUN = f"{{{MAIN_NS}}}r"
+_INLINE = f"{{{MAIN_NS}}}is"
+_SHARED_ITEM = f"{{{MAIN_NS}}}si"
+_DIMENSION = f"{{{MAIN_NS}}}dimension"
+_SHEET_DATA = f"{{{MAIN_NS}}}sheetData"
+
+
+class XlsxFormatError(ValueError):
+    """Fayl .xlsx emas yoki tuzilishi buzilgan."""
+
+
+def column_index(letters: str) -> int:
+    """Ustun harflari → 0 dan boshlanuvchi indeks: A → 0, Z → 25, AA → 26."""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def _iterparse(source, **kwargs):
+    # Tashqi entity va tarmoq o'chirilgan — yuklangan fayl ishonchsiz bo'lishi mumkin
+    return etree.iterparse(source, resolve_entities=False, no_network=True, **kwargs)
+
+
+def _string_item_text(item) -> str:
+    """<si>/<is> matni: oddiy <t> va rich text <r><t> bo'laklari (fonetik <rPh> tashlanadi)."""
+    parts = []
+    for child in item:
+        if child.tag == _TEXT:
+            parts.append(child.text or "")
+        elif child.tag == _RUN:
+            text = child.find(_TEXT)
+            if text is not None:
+                parts.append(text.text or "")
+    # openpyxl bilan bir xil: Excel'ning "_x005F_" ekranlash prefiksi olib tashlanadi
+    return "".join(parts).replace("x005F_", "")
+
+
+class XlsxReader:
+    """.xlsx kitobning bitta varag'ini oqim bilan o'qiydi.
+
+    sheet — varaq nomi yoki 0 dan boshlanuvchi tartib raqami; berilmasa faol
+    varaq (openpyxl'dagi workbook.active). Kontekst menejeri sifatida ishlatiladi.
+    """
+
+    def __init__(self, source, sheet: str | int | None = None):
+        try:
+            self._zip = zipfile.ZipFile(source)
+        except zipfile.BadZipFile as exc:
+            raise XlsxFormatError("Fayl .xlsx (zip) formatida emas.") from exc
+        try:
+            self.sheet_path = self._find_sheet(sheet)
+            self.shared_strings = self._read_shared_strings()
+            self.max_row = self._read_dimension()
+        except XlsxFormatError:
+            self._zip.close()
+            raise
+        except (KeyError, ValueError, IndexError, etree.XMLSyntaxError) as exc:
+            self._zip.close()
+            raise XlsxFormatError(f"XLSX tuzilishi buzilgan: {exc}") from exc
+
+    def _rels(self, path: str) -> dict:
+        """Part yonidagi _rels/<nom>.rels: rId → to'liq part yo'li."""
+        directory, name = posixpath.split(path)
+        rels_path = posixpath.join(directory, "_rels", f"{name}.rels")
+        try:
+            root = etree.fromstring(self._zip.read(rels_path))
+        except KeyError:
+            return {}
+        targets = {}
+        for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                targets[rel.get("Id")] = target.lstrip("/")
+            else:
+                targets[rel.get("Id")] = posixpath.normpath(posixpath.join(directory, target))
+        return targets
+
+    def _find_sheet(self, sheet) -> str:
+        root_rels = self._rels("")
+        workbook_path = next(
+            (path for path in root_rels.values() if path.endswith("workbook.xml")), "xl/workbook.xml"
+        )
+        workbook = etree.fromstring(self._zip.read(workbook_path))
+        sheets = workbook.findall(f"{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet")
+        if not sheets:
+            raise XlsxFormatError("Kitobda varaq yo'q.")
+        if sheet is None:
+            view = workbook.find(f"{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView")
+            sheet = int(view.get("activeTab", 0)) if view is not None else 0
+            if sheet >= len(sheets):
+                sheet = 0
+        if isinstance(sheet, int):
+            element = sheets[sheet]
+        else:
+            element = next((item for item in sheets if item.get("name") == sheet), None)
+            if element is None:
+                raise XlsxFormatError(f"Varaq topilmadi: {sheet}")
+        self.sheet_name = element.get("name", "")
+        return self._rels(workbook_path)[element.get(f"{{{REL_NS}}}id")]
+
+    def _read_shared_strings(self) -> list[str]:
+        workbook_dir = posixpath.dirname(posixpath.dirname(self.sheet_path))
+        path = posixpath.join(workbook_dir, "sharedStrings.xml")
+        if path not in self._zip.NameToInfo:
+            return []
+        strings = []
+        with self._zip.open(path) as fh:
+            for _, item in _iterparse(fh, tag=_SHARED_ITEM):
+                strings.append(_string_item_text(item))
+                item.clear()
+                while item.getprevious() is not None:
+                    del item.getparent()[0]
+        return strings
+
+    def _read_dimension(self) -> int | None:
+        """<dimension ref="A1:K20001"> bo'yicha oxirgi qator raqami (faqat taxmin uchun)."""
+        with self._zip.open(self.sheet_path) as fh:
+            for _, element in _iterparse(fh, events=("start",), tag=(_DIMENSION, _SHEET_DATA)):
+                if element.tag != _DIMENSION:
+                    return None
+                last = element.get("ref", "").rpartition(":")[2].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ$")
+                return int(last) if last.isdigit() else None
+        return None
+
+    def rows(self, columns=None, min_row: int = 1):
+        """(qator raqami, qiymatlar tuple'i) — min_row'dan boshlab, bo'sh qatorlarsiz.
+
+        columns — kerakli ustun indekslari (0 dan); berilsa tuple aynan shu
+        tartibda, yo'q kataklar o'rnida None. Berilmasa qatorning birinchi
+        ustunidan oxirgi to'ldirilgan katagigacha.
+        """
+        wanted = {column: position for position, column in enumerate(columns)} if columns is not None else None
+        width = len(wanted) if wanted is not None else 0
+        shared = self.shared_strings
+        # ustun harflari → (ustun indeksi, tuple'dagi o'rni yoki -1 — kerak emas)
+        slots = {}
+        row_number = 0
+        try:
+            with self._zip.open(self.sheet_path) as fh:
+                for _, row in _iterparse(fh, tag=_ROW):
+                    ref = row.get("r")
+                    row_number = int(ref) if ref else row_number + 1
+                    if row_number < min_row:
+                        row.clear()
+                        while row.getprevious() is not None:
+                            del row.getparent()[0]
+                        continue
+                    values = [None] * width if wanted is not None else []
+                    column = -1
+                    for cell in row:
+                        ref = cell.get("r")
+                        if ref is not None:
+                            letters = ref.rstrip("0123456789")
+                            slot = slots.get(letters)
+                            if slot is None:
+                                index = column_index(letters)
+                                slot = slots[letters] = (index, wanted.get(index, -1) if wanted is not None else index)
+                            column, position = slot
+                        elif cell.tag == _CELL:
+                            column += 1
+                            position = wanted.get(column, -1) if wanted is not None else column
+                        else:
+                            continue
+                        if position < 0:
+                            continue
+                        if wanted is None and position >= len(values):
+                            values.extend([None] * (position + 1 - len(values)))
+
+                        data_type = cell.get("t", "n")
+                        if data_type == "inlineStr":
+                            inline = cell.find(_INLINE)
+                            value = _string_item_text(inline) if inline is not None else None
+                        else:
+                            # findtext() ElementPath orqali ishlaydi — bolalarni to'g'ridan-to'g'ri
+                            # ko'rish bir necha barobar tez (<f> formula ham bo'lishi mumkin)
+                            value = None
+                            for child in cell:
+                                if child.tag == _VALUE:
+                                    value = child.text or None
+                                    break
+                            if value is None:
+                                pass
+                            elif data_type == "n":
+                                value = float(value) if "." in value or "E" in value or "e" in value else int(value)
+                            elif data_type == "s":
+                                value = shared[int(value)]
+                            elif data_type == "b":
+                                value = bool(int(value))
+                            # "str" (formula natijasi), "e" (xato), "d" (ISO sana) — matnicha
+                        values[position] = value
+
+                    # O'qilgan qatorlar xotirada to'planib qolmasin
+                    row.clear()
+                    while row.getprevious() is not None:
+                        del row.getparent()[0]
+                    if any(value is not None for value in values):
+                        yield row_number, tuple(values)
+        except (KeyError, ValueError, IndexError, etree.XMLSyntaxError, zipfile.BadZipFile) as exc:
+            raise XlsxFormatError(f"XLSX varag'ini o'qib bo'lmadi: {exc}") from exc
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -126,12 +126,58 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Bulk ZIP eksportda hujjatlarni parallel render qiluvchi jarayonlar soni (0 — CPU soni)
+DOCUMENT_RENDER_WORKERS = int(os.getenv("DOCUMENT_RENDER_WORKERS", "0"))
+
+# .docx render engine: "xml" — word/document.xml ustida to'g'ridan-to'g'ri (lxml),
+# "docx" — python-docx obyekt modeli orqali (avvalgi usul). document.xml bir xil.
+DOCUMENT_RENDER_ENGINE = os.getenv("DOCUMENT_RENDER_ENGINE", "xml")
+
+# XLSX o'quvchi: "native" — zip + lxml iterparse (app_main.xlsx_reader), faqat kerakli
+# ustunlar o'qiladi; "openpyxl" — read_only openpyxl (avvalgi usul)
+XLSX_IMPORT_READER = os.getenv("XLSX_IMPORT_READER", "native")
+# XLSX importda bitta INSERT so'roviga yoziladigan qatorlar soni (bulk_create)
+XLSX_IMPORT_BATCH_SIZE = int(os.getenv("XLSX_IMPORT_BATCH_SIZE", "500"))
+# Fon XLSX import (import-jobs/): saqlanadigan tekshiruv xatolari soni (jami soni
+# baribir hisoblanadi) va to'xtab qolgan vazifani qayta navbatga qo'yish vaqti
+XLSX_IMPORT_MAX_ERRORS = int(os.getenv("XLSX_IMPORT_MAX_ERRORS", "1000"))
+XLSX_IMPORT_STALE_SECONDS = int(os.getenv("XLSX_IMPORT_STALE_SECONDS", "600"))
+# Fon Sheets sinxronizatsiyasi (sync-sheets/): heartbeat shuncha soniya yangilanmasa vazifa FAILED
+SHEETS_SYNC_STALE_SECONDS = int(os.getenv("SHEETS_SYNC_STALE_SECONDS", "600"))
+
+# Fon bulk eksportlari (manage.py run_export_worker):
+# bir vaqtda bajariladigan eksportlar soni, tayyor arxiv saqlanish muddati va
+# worker'i to'xtab qolgan (heartbeat yangilanmagan) vazifani qayta navbatga qo'yish vaqti
+BULK_EXPORT_MAX_CONCURRENT = int(os.getenv("BULK_EXPORT_MAX_CONCURRENT", "1"))
+BULK_EXPORT_TTL_HOURS = int(os.getenv("BULK_EXPORT_TTL_HOURS", "24"))
+BULK_EXPORT_STALE_SECONDS = int(os.getenv("BULK_EXPORT_STALE_SECONDS", "600"))
+
+
+# "documents" — tayyor .docx hujjatlar keshi: gunicorn va export_worker uchun umumiy disk
+# (docker-compose'da ./backend/cache ikkala servisga ulanadi, qayta ishga tushganda saqlanadi)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "documents": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("DOCUMENT_CACHE_DIR", str(BASE_DIR / "cache" / "documents")),
+        "TIMEOUT": int(os.getenv("DOCUMENT_CACHE_TIMEOUT", str(7 * 24 * 3600))),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("DOCUMENT_CACHE_MAX_ENTRIES", "5000")),
+        },
+    },
+}
+
+
 CORS_ALLOW_ALL_ORIGINS = to_bool(os.getenv("CORS_ALLOW_ALL_ORIGINS"), default=False)
 CORS_ALLOW_CREDENTIALS = to_bool(os.getenv("CORS_ALLOW_CREDENTIALS"), default=True)
 CORS_ALLOWED_ORIGINS = split_csv(
     os.getenv("CORS_ALLOWED_ORIGINS"),
     default=["https://adreska.tmsiti.uz"],
 )
+# Hujjat yuklab olishda brauzer fayl nomi va ETag'ni o'qiy olishi uchun
+CORS_EXPOSE_HEADERS = ["Content-Disposition", "ETag"]
 CSRF_TRUSTED_ORIGINS = split_csv(
     os.getenv("CSRF_TRUSTED_ORIGINS"),
     default=["https://adreska.tmsiti.uz", "https://adreska-api.tmsiti.uz"],
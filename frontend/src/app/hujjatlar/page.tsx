@@ -22,6 +22,13 @@ type DocumentCalculationCategoryItem = {
   name: string;
 };
 
+type SheetSyncJob = {
+  id: number;
+  status: "queued" | "running" | "done" | "failed";
+  skipped: boolean;
+  error: string;
+};
+
 type DocumentCategory =
   | "new"
   | "rework_harmonization"
@@ -935,13 +942,30 @@ export default function HujjatlarPage() {
         const err = (await response.json().catch(() => ({}))) as { detail?: string };
         throw new Error(err.detail ?? "Sync xatoligi yuz berdi.");
       }
+      // Sinxronizatsiya fonda bajariladi — vazifa tugaguncha holatini so'raymiz
+      let job = (await response.json()) as SheetSyncJob;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => window.setTimeout(resolve, 1500));
+        const statusResponse = await fetch(`${API_BASE_URL}/sync-sheets/${job.id}/`);
+        if (!statusResponse.ok) {
+          throw new Error("Sync holatini olishda xatolik yuz berdi.");
+        }
+        job = (await statusResponse.json()) as SheetSyncJob;
+      }
+      if (job.status === "failed") {
+        throw new Error(job.error || "Sync xatoligi yuz berdi.");
+      }
       const now = new Date().toLocaleTimeString("uz-UZ", { hour: "2-digit", minute: "2-digit" });
       const newCount = syncCount + 1;
       setSyncCount(newCount);
       setLastSyncTime(now);
       localStorage.setItem("shnq_sync_count", String(newCount));
       localStorage.setItem("shnq_last_sync", now);
-      setToastMessage(`Sheets dan yangilandi. Jami: ${newCount} marta.`);
+      setToastMessage(
+        job.skipped
+          ? "Sheets o'zgarmagan, yangilash shart emas."
+          : `Sheets dan yangilandi. Jami: ${newCount} marta.`,
+      );
       setShowToast(true);
       await loadDocuments();
     } catch (error) {